@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Tuple
+
+# usage counters that are summed across users
+TOTAL_FIELDS = ("conversations", "messages", "total_user_words", "total_bot_words")
+
+
+class AdminFeed:
+    """Fan-out of admin events with running totals.
+
+    Every subscriber gets its own bounded queue. A slow admin client drops
+    its oldest events instead of buffering without limit; usage events carry
+    the full per-user counters so a dropped one is healed by the next.
+    ``publish`` may be called from any thread.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.totals: Dict[str, int] = {k: 0 for k in TOTAL_FIELDS}
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.pop(queue, None)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        subscribers: Tuple = tuple(self._subscribers.items())
+        for queue, loop in subscribers:
+            if loop is current:
+                self._put(queue, event)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self._put, queue, event)
+
+    def record_usage(
+        self, user: str, stats: Dict[str, Any], delta: Dict[str, int]
+    ) -> None:
+        """Fold ``delta`` into the totals and announce ``user``'s new stats."""
+        for key, value in delta.items():
+            if key in self.totals:
+                self.totals[key] += value
+        if self._subscribers:
+            self.publish(
+                {
+                    "type": "usage",
+                    "username": user,
+                    "usage": dict(stats),
+                    "totals": dict(self.totals),
+                }
+            )
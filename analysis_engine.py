@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# how much each availability level contributes to food security risk
+AVAILABILITY_WEIGHTS = {"high": 0.2, "moderate": 0.5, "low": 0.9}
+
+# upper bounds (in %) of the stable and elevated volatility bands
+VOLATILITY_BANDS = ((5.0, "stable"), (15.0, "elevated"))
+
+RISK_LEVELS = ((25.0, "low"), (50.0, "moderate"), (75.0, "high"))
+
+RECOMMENDATIONS = {
+    "low": (
+        "No immediate intervention is needed, but routine market monitoring "
+        "should continue."
+    ),
+    "moderate": (
+        "Authorities should monitor markets closely and prepare targeted support "
+        "for vulnerable households in case prices keep rising."
+    ),
+    "high": (
+        "Targeted cash or in-kind assistance for vulnerable households and "
+        "measures to ease supply constraints are recommended."
+    ),
+    "severe": (
+        "Urgent action is recommended, including emergency assistance, release "
+        "of strategic reserves and steps to secure imports."
+    ),
+}
+
+
+def _clip(value: float) -> float:
+    return min(max(value, 0.0), 1.0)
+
+
+@dataclass
+class MarketAssessment:
+    """Numbers behind a food security analysis, computed locally."""
+
+    commodity: str
+    country: str
+    last: float
+    prev: float
+    availability: str
+    pct_change: float
+    volatility: float
+    band: str
+    risk_score: float
+    risk_level: str
+    metrics: Optional[Dict[str, Any]] = None
+
+
+def assess(
+    commodity: str,
+    country: str,
+    last: float,
+    prev: float,
+    availability: str,
+    metrics: Optional[Dict[str, Any]] = None,
+) -> MarketAssessment:
+    """Compute price change, volatility band and a 0-100 risk score.
+
+    Volatility comes from the price history when available, otherwise the
+    size of the latest monthly move is used as a proxy.
+    """
+    pct_change = (last - prev) / prev * 100.0 if prev else 0.0
+    volatility = abs(pct_change)
+    if metrics and metrics.get("volatility") is not None:
+        volatility = metrics["volatility"]
+    band = next((n for bound, n in VOLATILITY_BANDS if volatility < bound), "high")
+
+    avail = availability.lower().strip()
+    score = 100.0 * (
+        0.45 * _clip(pct_change / 30.0)
+        + 0.20 * _clip(volatility / 20.0)
+        + 0.35 * AVAILABILITY_WEIGHTS.get(avail, AVAILABILITY_WEIGHTS["moderate"])
+    )
+    level = next((n for bound, n in RISK_LEVELS if score < bound), "severe")
+    return MarketAssessment(
+        commodity=commodity,
+        country=country,
+        last=last,
+        prev=prev,
+        availability=avail,
+        pct_change=pct_change,
+        volatility=volatility,
+        band=band,
+        risk_score=round(score, 1),
+        risk_level=level,
+        metrics=metrics,
+    )
+
+
+def facts(a: MarketAssessment) -> str:
+    """Compact, precomputed figures for an LLM prompt."""
+    lines = [
+        f"Commodity: {a.commodity}",
+        f"Country: {a.country}",
+        f"Price two months ago: {a.prev:g}",
+        f"Price last month: {a.last:g}",
+        f"Month-on-month change: {a.pct_change:+.1f}%",
+        f"Volatility: {a.volatility:.1f}% ({a.band})",
+        f"Availability: {a.availability}",
+        f"Risk score: {a.risk_score:.0f}/100 ({a.risk_level})",
+    ]
+    m = a.metrics or {}
+    if m.get("zscore") is not None:
+        lines.append(f"Z-score vs. history: {m['zscore']:+.2f}")
+    if m.get("seasonal_index") is not None:
+        lines.append(f"Seasonal index this month: {m['seasonal_index']:.2f}")
+    return "\n".join(lines)
+
+
+def render(a: MarketAssessment) -> str:
+    """Render a structured ``Analysis:`` narrative from an assessment."""
+    if a.pct_change > 0.05:
+        move = f"an increase of {a.pct_change:.1f}%"
+    elif a.pct_change < -0.05:
+        move = f"a decrease of {abs(a.pct_change):.1f}%"
+    else:
+        move = "no meaningful change"
+    sentences = [
+        f"Analysis: The price of {a.commodity} in {a.country} moved from "
+        f"{a.prev:g} to {a.last:g}, {move} month on month.",
+        f"At {a.volatility:.1f}%, price movements fall in the {a.band} volatility "
+        f"band.",
+        {
+            "high": f"Availability of {a.commodity} is high, which cushions "
+            "households against price shocks.",
+            "moderate": f"Availability of {a.commodity} is moderate, leaving "
+            "limited buffer if supply tightens further.",
+            "low": f"Availability of {a.commodity} is low, which sharply raises "
+            "the risk that households cannot meet their needs.",
+        }.get(a.availability, f"Availability of {a.commodity} is {a.availability}."),
+        f"Combining price pressure, volatility and availability gives a food "
+        f"security risk score of {a.risk_score:.0f} out of 100, which is "
+        f"{a.risk_level}.",
+    ]
+    m = a.metrics or {}
+    if m.get("zscore") is not None:
+        side = "above" if m["zscore"] >= 0 else "below"
+        sentences.append(
+            f"Current prices sit {abs(m['zscore']):.1f} standard deviations {side} "
+            f"their historical average."
+        )
+    else:
+        sentences.append(
+            "No longer price history is available, so this assessment relies on "
+            "the last two months only."
+        )
+    if m.get("seasonal_index") is not None:
+        seasonal = (m["seasonal_index"] - 1.0) * 100.0
+        side = "above" if seasonal >= 0 else "below"
+        sentences.append(
+            f"Prices at this time of year typically run {abs(seasonal):.1f}% {side} "
+            f"the annual average."
+        )
+    sentences.append(
+        f"Country-specific factors such as trade policy, climate conditions and "
+        f"conflict can amplify these dynamics in {a.country}."
+    )
+    sentences.append(RECOMMENDATIONS[a.risk_level])
+    sentences.append(
+        "Prices and availability should be reviewed again next month to confirm "
+        "whether the trend persists."
+    )
+    return " ".join(sentences)
@@ -0,0 +1,107 @@
+"""Runner.run throughput with request logging off, printed, or structured.
+
+Run from the repository root::
+
+    python benchmarks/bench_logging.py [--requests N] [--concurrency C]
+
+The upstream is an in-process fake that answers immediately, so the numbers
+isolate the Runner's own overhead. ``print`` reproduces the old behaviour of
+writing every outgoing history synchronously; ``structured`` uses the
+queue-backed JSON-lines logger. Both write to a temporary file.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import simple_agents  # noqa: E402
+from analysis_engine import assess, render  # noqa: E402
+from simple_agents import Agent, Runner  # noqa: E402
+from structured_log import StructuredLogger, log_event, set_logger  # noqa: E402
+
+
+class FakeCompletions:
+    async def create(self, model, messages, **kwargs):
+        message = SimpleNamespace(content="Analysis: stable.", function_call=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def conversation(i: int, analysis: str):
+    history = []
+    for turn in range(10):
+        history.append({"role": "user", "content": f"user {i} question {turn}"})
+        history.append({"role": "assistant", "content": analysis})
+    history.append({"role": "user", "content": f"what changed for maize in region {i}"})
+    return history
+
+
+async def run_batch(requests: int, concurrency: int, analysis: str) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        agent = Agent("Bench", "You are a benchmark.", [])
+        async with gate:
+            await Runner.run(agent, input=conversation(i, analysis))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    analysis = render(assess("maize", "kenya", 130.0, 110.0, "low", None))
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    sink = tempfile.NamedTemporaryFile("w", suffix=".log", delete=False)
+
+    timed_completion = simple_agents._timed_completion
+
+    async def printed(client, route, **payload):
+        print("Sending messages to OpenAI:", payload["messages"], file=sink, flush=True)
+        return await timed_completion(client, route, **payload)
+
+    structured = StructuredLogger(sink)
+    off = lambda event, **fields: None  # noqa: E731
+    # mode → (log_event, _timed_completion)
+    modes = {
+        "off": (off, timed_completion),
+        "print": (off, printed),
+        "structured": (log_event, timed_completion),
+    }
+    print(f"{'logging':<12}{'req/s':>10}")
+    try:
+        with patch("simple_agents.load_api_key", return_value="bench"), patch(
+            "simple_agents.get_async_client", return_value=client
+        ), patch.object(Runner, "local_intents", frozenset()):
+            for name, (log, completion) in modes.items():
+                set_logger(structured if name == "structured" else None)
+                with patch.object(simple_agents, "log_event", log), patch.object(
+                    simple_agents, "_timed_completion", completion
+                ):
+                    rate = asyncio.run(
+                        run_batch(args.requests, args.concurrency, analysis)
+                    )
+                structured.flush()
+                print(f"{name:<12}{rate:>10.0f}")
+        print(f"\nstructured logger: {structured.stats()}")
+    finally:
+        structured.close()
+        sink.close()
+        os.unlink(sink.name)
+
+
+if __name__ == "__main__":
+    main()
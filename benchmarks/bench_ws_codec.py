@@ -0,0 +1,94 @@
+"""Compare /ws/chat frame encodings: bytes on the wire and CPU per frame.
+
+Run from the repository root::
+
+    python benchmarks/bench_ws_codec.py [--repeat N]
+
+Each codec is measured raw and with permessage-deflate, simulated with a
+raw-deflate stream that keeps its context across frames, as browsers and
+uvicorn do by default.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from analysis_engine import assess, render  # noqa: E402
+from ws_codec import CODECS  # noqa: E402
+
+
+def sample_frames() -> Dict[str, List[Any]]:
+    analysis = render(
+        assess(
+            "maize",
+            "kenya",
+            130.0,
+            110.0,
+            "low",
+            {"volatility": 9.5, "zscore": 1.8, "seasonal_index": 1.07},
+        )
+    )
+    history = [
+        {
+            "who": "bot" if i % 2 else "user",
+            "text": analysis if i % 2 else f"analyze maize in region {i}",
+            "ts": 1_700_000_000_000 + i,
+        }
+        for i in range(40)
+    ]
+    return {
+        "short replies": [{"reply": "Hello! How can I assist you today?"}] * 50,
+        "analyses": [{"reply": analysis}] * 50,
+        "history replay": [{"messages": history}] * 5,
+    }
+
+
+def deflated_size(payloads: List[bytes]) -> int:
+    """Bytes sent with permessage-deflate and context takeover."""
+    compressor = zlib.compressobj(wbits=-15)
+    total = 0
+    for payload in payloads:
+        data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        total += len(data) - 4  # the 00 00 ff ff tail is not transmitted
+    return total
+
+
+def per_frame_us(func: Callable[[Any], Any], items: List[Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(items))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'workload':<16}{'codec':<9}{'bytes':>9}{'deflated':>10}"
+        f"{'encode us':>11}{'decode us':>11}"
+    )
+    for workload, frames in sample_frames().items():
+        for name, codec in CODECS.items():
+            payloads = [codec.encode(f) for f in frames]
+            raw = [p.encode("utf-8") if isinstance(p, str) else p for p in payloads]
+            print(
+                f"{workload:<16}{name:<9}{sum(map(len, raw)):>9}"
+                f"{deflated_size(raw):>10}"
+                f"{per_frame_us(codec.encode, frames, args.repeat):>11.2f}"
+                f"{per_frame_us(codec.decode, payloads, args.repeat):>11.2f}"
+            )
+    if "msgpack" not in CODECS:
+        print("\nmsgpack is not installed; only JSON was measured.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,76 @@
+import asyncio
+import json
+import logging
+import math
 import os
+import threading
 import time
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from fastapi import (
+    BackgroundTasks,
     Depends,
     FastAPI,
     File,
+    Form,
     HTTPException,
+    Query,
+    Request,
     UploadFile,
     WebSocket,
     WebSocketDisconnect,
     status,
 )
-from fastapi.responses import HTMLResponse
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.security.api_key import APIKeyHeader, APIKeyQuery
-from pydantic import BaseModel
-
-from food_security import food_security_analyst
-from info_tools import get_information
-from simple_agents import Agent, Runner
+from pydantic import BaseModel, ConfigDict, Field
+
+from admin_feed import AdminFeed
+from food_security import food_basket_index, food_security_analyst
+from info_tools import get_information, preload_docs
+from ingestion import (
+    SUPPORTED_SUFFIXES,
+    IngestionPipeline,
+    IngestJob,
+    remove_outputs,
+    topic_owner,
+)
+from passage_store import PassageStore, get_passage_store
+from model_router import RouteRule
+from openai_config import close_clients, warm_up_clients
+from session_store import ConversationStore, DialogStore, SessionStore
+from simple_agents import (
+    Agent,
+    Runner,
+    clear_tool_cache,
+    dump_dialog,
+    restore_dialog,
+    shutdown_tool_processes,
+    tool_specs,
+)
+from static_assets import StaticAsset
+from uploads import (
+    BodyLimit,
+    ChecksumMismatch,
+    InvalidFilename,
+    NameConflict,
+    UploadError,
+    UploadTooLarge,
+    safe_filename,
+    store_upload,
+)
+from watchlist import Watchlist, WatchlistScheduler
+from ws_codec import accept_with_codec
+from ws_session import ChatSession
 
 SYSTEM_PROMPT = (
     "You are an agentic assistant. You are able to reason, plan, gather "
@@ -38,6 +89,39 @@ api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 # only keep the last N user/assistant exchanges when sending to the agent
 HISTORY_EXCHANGES = int(os.getenv("CHAT_HISTORY_LIMIT", "20"))
 
+# idle users are spilled to STATE_DIR once resident histories pass this size
+MEMORY_CAP_BYTES = int(os.getenv("CHAT_MEMORY_CAP_BYTES", str(64 * 1024 * 1024)))
+STATE_DIR = Path(os.getenv("CHAT_STATE_DIR", "state"))
+
+# seconds between batched writes of in-progress dialogs to STATE_DIR
+DIALOG_FLUSH_INTERVAL = float(os.getenv("DIALOG_FLUSH_INTERVAL", "0.5"))
+
+# pending turns and unsent frames allowed per /ws/chat connection
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "8"))
+WS_SEND_BUFFER = int(os.getenv("WS_SEND_BUFFER", "16"))
+
+# permessage-deflate on websockets (negotiated with each client by uvicorn)
+WS_DEFLATE = os.getenv("WS_DEFLATE", "1").lower() in {"1", "true", "yes"}
+
+# per-file limit for /admin/docs uploads
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+# whole-request limit for /admin/docs/batch, enforced before the body is spooled
+UPLOAD_MAX_REQUEST_BYTES = int(
+    os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(100 * 1024 * 1024))
+)
+# room for multipart boundaries, part headers and form fields
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# prime connections, docs and local replies before reporting /ready
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1").lower() in {"1", "true", "yes"}
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "5"))
+
+# precompute watchlist analyses in the background (see WATCHLIST_* in watchlist.py)
+WATCHLIST_ENABLED = os.getenv("WATCHLIST_ENABLED", "1").lower() in {"1", "true", "yes"}
+
+# routing tier per user (JSON object, e.g. {"user1": "premium"})
+USER_TIERS = json.loads(os.getenv("USER_TIERS", "{}"))
+
 # track activation state
 user_status = {username: True for username in USER_API_KEYS.values()}
 
@@ -76,9 +160,19 @@ usage = defaultdict(
         "total_bot_words": 0,
     }
 )
-conversations = defaultdict(list)  # user → list of {role, content, ts}
+# pushes usage/message events to /ws/admin and keeps running totals
+admin_feed = AdminFeed()
+session_store = SessionStore(STATE_DIR)
+# user → list of {role, content, ts}; idle users spill to session_store
+conversations = ConversationStore(session_store, MEMORY_CAP_BYTES)
+# user → half-finished food security dialog, flushed in batches
+dialogs = DialogStore(session_store)
+# commodity/country pairs whose analyses are precomputed off-peak
+watchlist = Watchlist(session_store)
+watchlist_scheduler = WatchlistScheduler.from_env(watchlist)
 DOCS_DIR = Path("docs")
-DOCS_DIR.mkdir(exist_ok=True)
+# extracted text and chunks of every ingested document
+KB_DIR = DOCS_DIR / "kb"
 
 
 def ensure_history(user: str) -> None:
@@ -87,41 +181,300 @@ def ensure_history(user: str) -> None:
         conversations[user].append(
             {"role": "system", "content": SYSTEM_PROMPT, "ts": int(time.time() * 1000)}
         )
+        conversations.touch(user)
+
+
+def record_usage(user: str, ts: Optional[int] = None, **delta: int) -> None:
+    """Apply counter deltas to ``usage[user]`` and notify admin subscribers."""
+    u = usage[user]
+    if ts is not None:
+        # first request?
+        if u["first_request"] is None:
+            u["first_request"] = ts
+        u["last_request"] = ts
+    for key, value in delta.items():
+        u[key] += value
+    admin_feed.record_usage(user, u, delta)
+
+
+def append_message(user: str, role: str, content: str) -> dict:
+    """Store a message with a per-user strictly increasing ``ts``."""
+    history = conversations[user]
+    ts = int(time.time() * 1000)
+    if history and history[-1]["ts"] >= ts:
+        ts = history[-1]["ts"] + 1
+    entry = {"role": role, "content": content, "ts": ts}
+    history.append(entry)
+    conversations[user] = history[-HISTORY_EXCHANGES * 2 - 1 :]
+    if admin_feed.subscribers:
+        admin_feed.publish(
+            {"type": "message", "username": user, "message": _to_client(entry)}
+        )
+    return entry
+
+
+def clear_conversation(user: str) -> None:
+    if user in conversations:
+        del conversations[user]
+    dialogs.save(user, {})
+    ensure_history(user)
+
+
+def _to_client(m: dict) -> dict:
+    return {
+        "who": m["role"] == "assistant" and "bot" or "user",
+        "text": m["content"],
+        "ts": m["ts"],
+    }
 
 
 # ─── AGENT SETUP ───────────────────────────────────────────────
+# template for the per-turn agents built by agent_for()
 agent = Agent(
     name="Utility Bot",
     instructions=SYSTEM_PROMPT,
-    tools=[get_information, food_security_analyst],
+    tools=[get_information, food_security_analyst, food_basket_index],
+)
+
+
+def agent_for(user: str) -> Agent:
+    """A fresh agent for one turn, carrying ``user``'s saved dialog."""
+    turn_agent = Agent(agent.name, agent.instructions, agent.tools)
+    restore_dialog(turn_agent, dialogs.load(user))
+    return turn_agent
+
+
+async def flush_dialogs() -> None:
+    """Write pending dialog states every ``DIALOG_FLUSH_INTERVAL`` seconds."""
+    while True:
+        await asyncio.sleep(DIALOG_FLUSH_INTERVAL)
+        if dialogs.pending:
+            try:
+                await asyncio.to_thread(dialogs.flush)
+            except Exception as exc:
+                logging.getLogger(__name__).error("Dialog flush failed: %s", exc)
+
+
+# opt-in: answer paraphrases of earlier questions without an upstream call
+if os.getenv("SEMANTIC_CACHE", "0").lower() in {"1", "true", "yes"}:
+    from semantic_cache import SemanticCache
+
+    Runner.semantic_cache = SemanticCache.from_env(DOCS_DIR)
+
+
+def invalidate_answer_cache() -> None:
+    if Runner.semantic_cache is not None:
+        Runner.semantic_cache.invalidate()
+    clear_tool_cache("get_information")
+
+
+def startup() -> None:
+    """Work deferred from import time: docs directory and tool schemas."""
+    DOCS_DIR.mkdir(exist_ok=True)
+    tool_specs(agent.tools)
+
+
+# canned requests replayed through Runner's local path during warm-up
+WARMUP_MESSAGES = (
+    "hello",
+    "help",
+    "tell me about rice",
+    "analyze maize",
+    "120",
+    "progress",
 )
 
-app = FastAPI()
+# reported by /ready; ``ready`` flips once warm-up has finished
+warmup_status: Dict[str, Any] = {"ready": False, "steps": {}}
+
+
+def _open_passages() -> int:
+    """Map the passage store, building it first if only chunk files exist.
+
+    Also embeds a store that has no dense index yet, since queries no longer
+    build one on demand.
+    """
+    store = get_passage_store(KB_DIR)
+    if store is None and any(KB_DIR.glob("*.json")):
+        rebuild_passages()
+        store = get_passage_store(KB_DIR)
+    elif store is not None:
+        from dense_index import DenseIndex  # imports numpy
+
+        with _rebuild_lock:
+            if DenseIndex.load(KB_DIR, store) is None:
+                DenseIndex.build(KB_DIR)
+    return len(store) if store is not None else 0
+
+
+def _load_price_history() -> bool:
+    from food_security import get_price_history
+
+    return get_price_history() is not None
+
+
+async def warm_up() -> None:
+    """Prime docs, price history, local replies and upstream connections.
+
+    A failing step is logged and recorded but does not hold back readiness:
+    the server works without any of them, only slower on first use.
+    """
+    start = time.perf_counter()
+    steps = {
+        "passages": _open_passages,
+        "docs": preload_docs,
+        "price_history": _load_price_history,
+        "local_replies": lambda: Runner.warm_up(agent, list(WARMUP_MESSAGES)),
+    }
+    for name, func in steps.items():
+        step_start = time.perf_counter()
+        try:
+            result: Any = await asyncio.to_thread(func)
+        except Exception as exc:
+            logging.getLogger(__name__).warning("Warm-up step %s failed: %s", name, exc)
+            result = f"failed: {exc}"
+        warmup_status["steps"][name] = {
+            "result": result,
+            "ms": round((time.perf_counter() - step_start) * 1000, 1),
+        }
+
+    step_start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(warm_up_clients(WARMUP_TIMEOUT), WARMUP_TIMEOUT)
+    except Exception as exc:
+        logging.getLogger(__name__).warning("Upstream warm-up failed: %s", exc)
+        result = f"failed: {exc}"
+    warmup_status["steps"]["upstream"] = {
+        "result": result,
+        "ms": round((time.perf_counter() - step_start) * 1000, 1),
+    }
+    warmup_status["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    warmup_status["ready"] = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup()
+    warmup_status.update(ready=not WARMUP_ENABLED, steps={})
+    tasks = [asyncio.create_task(flush_dialogs())]
+    # warm up in the background so /ready can answer 503 meanwhile
+    if WARMUP_ENABLED:
+        tasks.append(asyncio.create_task(warm_up()))
+    if WATCHLIST_ENABLED:
+        tasks.append(asyncio.create_task(watchlist_scheduler.run_forever()))
+    yield
+    warmup_status["ready"] = False
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    dialogs.flush()
+    ingestion.shutdown()
+    shutdown_tool_processes()
+    await close_clients()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _upload_body_limit(path: str) -> Optional[int]:
+    if path == "/admin/docs":
+        return min(UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD, UPLOAD_MAX_REQUEST_BYTES)
+    if path == "/admin/docs/batch":
+        return UPLOAD_MAX_REQUEST_BYTES
+    return None
+
+
+app.add_middleware(BodyLimit, limit=_upload_body_limit)
+
+
+# ─── READINESS ────────────────────────────────────────────────
+@app.get("/ready")
+async def ready():
+    """Report 200 once warm-up has finished, 503 until then."""
+    if warmup_status["ready"]:
+        return warmup_status
+    return JSONResponse(warmup_status, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
 # ─── SERVE FRONTEND ────────────────────────────────────────────
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "60"))
+BASE_DIR = Path(__file__).resolve().parent
+index_page = StaticAsset(BASE_DIR / "index.html", max_age=STATIC_MAX_AGE)
+admin_page = StaticAsset(BASE_DIR / "admin.html", max_age=STATIC_MAX_AGE)
+
+
 @app.get("/", response_class=HTMLResponse)
-async def serve_index():
-    return HTMLResponse(open("index.html", encoding="utf-8").read())
+async def serve_index(request: Request):
+    return index_page.response(request.headers)
+
+
+@app.get("/admin", response_class=HTMLResponse)
+async def serve_admin(request: Request):
+    return admin_page.response(request.headers)
 
 
 # ─── USER HISTORY & USAGE ──────────────────────────────────────
+HISTORY_PAGE_LIMIT = int(os.getenv("HISTORY_PAGE_LIMIT", "100"))
+
+
+def _history_page(
+    request: Request,
+    username: str,
+    msgs: List[dict],
+    before: Optional[int],
+    after: Optional[int],
+    limit: Optional[int],
+) -> Response:
+    """Return one page of ``msgs`` selected by ``ts`` cursors, or a 304.
+
+    Without cursors the newest ``limit`` messages are returned. ``before``
+    pages backwards and ``after`` fetches only messages newer than a ``ts``
+    the client already has.
+    """
+    # the same version can serve different pages, so the cursors are part of it
+    etag = f'W/"{conversations.version(username)}-{before}-{after}-{limit}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    limit = limit or HISTORY_PAGE_LIMIT
+    lo = 0 if after is None else bisect_right(msgs, after, key=lambda m: m["ts"])
+    hi = len(msgs)
+    if before is not None:
+        hi = bisect_left(msgs, before, key=lambda m: m["ts"])
+    if after is not None:
+        page, has_more = msgs[lo : min(hi, lo + limit)], hi > lo + limit
+    else:
+        page, has_more = msgs[max(lo, hi - limit) : hi], hi - lo > limit
+    body = {
+        "username": username,
+        "history": [_to_client(m) for m in page],
+        "has_more": has_more,
+        "before": page[0]["ts"] if page else before,
+        "after": page[-1]["ts"] if page else after,
+        # oldest stored ts: clients drop cached messages older than this
+        "first": msgs[0]["ts"] if msgs else None,
+        # False once the ``after`` message is gone, i.e. the history was
+        # cleared or trimmed past the client's cursor
+        "after_found": after is None or (lo > 0 and msgs[lo - 1]["ts"] == after),
+    }
+    return JSONResponse(body, headers={"ETag": etag})
+
+
 @app.get("/history")
-async def get_history(user: str = Depends(get_user)):
+async def get_history(
+    request: Request,
+    before: Optional[int] = Query(None),
+    after: Optional[int] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    user: str = Depends(get_user),
+):
     """
-    Return [{ who:'user'|'bot', text:str, ts:int }, ...]
+    Return { username, history: [{ who:'user'|'bot', text:str, ts:int }, ...],
+             has_more, before, after, first, after_found }
     """
+    await conversations.load(user)
     ensure_history(user)
-    mapped = []
-    for m in conversations[user]:
-        mapped.append(
-            {
-                "who": m["role"] == "assistant" and "bot" or "user",
-                "text": m["content"],
-                "ts": m["ts"],
-            }
-        )
-    return {"username": user, "history": mapped}
+    return _history_page(request, user, conversations[user], before, after, limit)
 
 
 @app.get("/usage")
@@ -144,6 +497,13 @@ async def user_usage(user: str = Depends(get_user)):
 
 
 # ─── ADMIN: LIST & TOGGLE USERS ───────────────────────────────
+def _users_snapshot() -> dict:
+    return {
+        u: {**usage[u], "active": user_status.get(u, False)}
+        for u in USER_API_KEYS.values()
+    }
+
+
 @app.get("/admin/users")
 async def admin_list_users(admin: str = Depends(get_admin)):
     """
@@ -151,10 +511,8 @@ async def admin_list_users(admin: str = Depends(get_admin)):
     """
     return {
         "username": admin,
-        "users": {
-            u: {**usage[u], "active": user_status.get(u, False)}
-            for u in USER_API_KEYS.values()
-        },
+        "users": _users_snapshot(),
+        "totals": admin_feed.totals,
     }
 
 
@@ -171,18 +529,150 @@ async def admin_toggle_user(
     if username not in user_status:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Unknown user")
     user_status[username] = upd.active
+    admin_feed.publish({"type": "status", "username": username, "active": upd.active})
     return {"username": username, "active": upd.active}
 
 
+@app.websocket("/ws/admin")
+async def websocket_admin(ws: WebSocket):
+    """Push a snapshot, then usage, message and status events as they happen."""
+    if ws.query_params.get(API_KEY_NAME) not in ADMIN_API_KEYS:
+        await ws.close(code=1008)
+        return
+    await ws.accept()
+    queue = admin_feed.subscribe()
+    # only used to notice the client going away
+    receiver = asyncio.ensure_future(ws.receive_text())
+    try:
+        await ws.send_json(
+            {"type": "snapshot", "users": _users_snapshot(), "totals": admin_feed.totals}
+        )
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {getter, receiver}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                await ws.send_json(getter.result())
+            else:
+                getter.cancel()
+            if receiver in done:
+                if receiver.exception() is not None:
+                    break
+                receiver = asyncio.ensure_future(ws.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        admin_feed.unsubscribe(queue)
+        receiver.cancel()
+
+
+# ─── ADMIN: DOCUMENTS ─────────────────────────────────────────
+logger = logging.getLogger(__name__)
+
+_UPLOAD_ERROR_STATUS = {
+    InvalidFilename: status.HTTP_400_BAD_REQUEST,
+    UploadTooLarge: status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    ChecksumMismatch: status.HTTP_422_UNPROCESSABLE_ENTITY,
+    NameConflict: status.HTTP_409_CONFLICT,
+}
+
+
+def _publish_ingest(job: IngestJob) -> None:
+    if admin_feed.subscribers:
+        admin_feed.publish({"type": "ingest", "job": job.as_dict()})
+
+
+# builds name their files after the next generation, so they must not overlap
+_rebuild_lock = threading.Lock()
+
+
+def rebuild_passages() -> Dict[str, int]:
+    """Repack KB_DIR into the passage store and re-embed it for dense search.
+
+    Runs in worker threads; concurrent calls are serialized.
+    """
+    from dense_index import DenseIndex  # imports numpy
+
+    with _rebuild_lock:
+        stats = PassageStore.build(KB_DIR)
+        index = DenseIndex.build(KB_DIR)
+    stats["dense_rows"] = len(index) if index is not None else 0
+    logger.info("Passage store rebuilt: %s", stats)
+    return stats
+
+
+async def _ingest_complete(job: IngestJob) -> None:
+    logger.info(
+        "Ingestion job %s finished: %d ok, %d failed", job.id, job.done, job.failed
+    )
+    if job.done:
+        await asyncio.to_thread(rebuild_passages)
+    invalidate_answer_cache()
+
+
+# parses uploads into KB_DIR across worker processes (INGEST_WORKERS)
+ingestion = IngestionPipeline.from_env(
+    KB_DIR, on_progress=_publish_ingest, on_complete=_ingest_complete
+)
+
+
+async def _store_document(file: UploadFile, sha256: Optional[str] = None) -> dict:
+    # both files would be ingested into the same knowledge-base topic
+    owner = topic_owner(DOCS_DIR, safe_filename(file.filename))
+    if owner is not None:
+        raise NameConflict(f"{file.filename} clashes with existing document {owner}")
+    stored = await store_upload(file, DOCS_DIR, UPLOAD_MAX_BYTES, sha256)
+    return {"filename": stored.filename, "size": stored.size, "sha256": stored.sha256}
+
+
 @app.post("/admin/docs")
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    sha256: Optional[str] = Form(None),
     admin: str = Depends(get_admin),
 ):
-    dest = DOCS_DIR / file.filename
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    return {"filename": file.filename}
+    """Stream one document into DOCS_DIR, verifying ``sha256`` if given."""
+    try:
+        stored = await _store_document(file, sha256)
+    except UploadError as exc:
+        raise HTTPException(_UPLOAD_ERROR_STATUS[type(exc)], str(exc))
+    job = ingestion.create_job([DOCS_DIR / stored["filename"]])
+    background_tasks.add_task(ingestion.run, job)
+    return {**stored, "job": job.id}
+
+
+@app.post("/admin/docs/batch")
+async def upload_documents(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    sha256: List[str] = Form([]),
+    admin: str = Depends(get_admin),
+):
+    """Store several documents; failures are reported per file.
+
+    Optional ``sha256`` fields are matched to ``files`` by position and
+    verified like a single upload's; an empty value skips that file's check.
+    """
+    if len(sha256) > len(files):
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY, "More sha256 values than files"
+        )
+    results = []
+    for i, file in enumerate(files):
+        expected = sha256[i] if i < len(sha256) else None
+        try:
+            stored = await _store_document(file, expected or None)
+        except UploadError as exc:
+            results.append({"filename": file.filename, "error": str(exc)})
+            continue
+        results.append(stored)
+    paths = [DOCS_DIR / r["filename"] for r in results if "error" not in r]
+    job = ingestion.create_job(paths) if paths else None
+    if job is not None:
+        background_tasks.add_task(ingestion.run, job)
+    return {"username": admin, "files": results, "job": job and job.id}
 
 
 @app.get("/admin/docs")
@@ -199,24 +689,65 @@ async def delete_document(filename: str, admin: str = Depends(get_admin)):
     deleted = dest.is_file()
     if deleted:
         dest.unlink()
+        if remove_outputs(KB_DIR, filename):
+            await asyncio.to_thread(rebuild_passages)
+        invalidate_answer_cache()
     return {"filename": filename, "deleted": deleted}
 
 
+@app.post("/admin/ingest")
+async def ingest_all(
+    background_tasks: BackgroundTasks,
+    admin: str = Depends(get_admin),
+):
+    """Re-ingest every supported document in DOCS_DIR, e.g. after a bulk copy."""
+    paths = sorted(
+        p
+        for p in DOCS_DIR.glob("*")
+        if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES
+    )
+    job = ingestion.create_job(paths)
+    background_tasks.add_task(ingestion.run, job)
+    return {"username": admin, **job.as_dict()}
+
+
+@app.get("/admin/ingest")
+async def ingest_jobs(admin: str = Depends(get_admin)):
+    """Return recent ingestion jobs, newest last, with their progress."""
+    return {"username": admin, "jobs": [j.as_dict() for j in ingestion.jobs.values()]}
+
+
+@app.get("/admin/ingest/{job_id}")
+async def ingest_job(job_id: str, admin: str = Depends(get_admin)):
+    job = ingestion.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Unknown ingestion job")
+    return job.as_dict()
+
+
+@app.get("/admin/history/export")
+async def admin_export_history(admin: str = Depends(get_admin)):
+    """Stream every user's history as NDJSON, one message per line."""
+
+    def lines():
+        for username in list(conversations):
+            for m in conversations.peek(username):
+                yield json.dumps({"username": username, **_to_client(m)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @app.get("/admin/history/{username}")
 async def admin_history(
+    request: Request,
     username: str,
+    before: Optional[int] = Query(None),
+    after: Optional[int] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     admin: str = Depends(get_admin),
 ):
-    msgs = conversations.get(username, [])
-    mapped = [
-        {
-            "who": m["role"] == "assistant" and "bot" or "user",
-            "text": m["content"],
-            "ts": m["ts"],
-        }
-        for m in msgs
-    ]
-    return {"username": username, "history": mapped}
+    msgs = await conversations.load(username) if username in conversations else []
+    return _history_page(request, username, msgs, before, after, limit)
 
 
 @app.delete("/admin/history/{username}")
@@ -225,11 +756,197 @@ async def admin_clear_history(
     admin: str = Depends(get_admin),
 ):
     """Clear all stored messages for the given user."""
+    if username not in user_status:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Unknown user")
     if username in conversations:
-        conversations[username].clear()
+        del conversations[username]
+    dialogs.save(username, {})
     return {"username": username, "cleared": True}
 
 
+@app.get("/admin/memory")
+async def admin_memory(admin: str = Depends(get_admin)):
+    """Return resident vs. spilled conversation counts and memory use."""
+    return {"username": admin, **conversations.stats(), "dialogs": dialogs.stats()}
+
+
+class RouteRuleModel(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    name: str
+    model: str
+    intents: List[str] = []
+    tiers: List[str] = []
+    min_chars: int = Field(0, ge=0)
+    max_chars: Optional[int] = Field(None, ge=0)
+    needs_tools: Optional[bool] = None
+    max_latency_ms: Optional[float] = Field(None, gt=0)
+
+
+class RoutingUpdate(BaseModel):
+    default_model: Optional[str] = None
+    override: Optional[str] = None
+    rules: Optional[List[RouteRuleModel]] = None
+
+
+@app.get("/admin/routing")
+async def admin_routing(admin: str = Depends(get_admin)):
+    """Return routing rules plus per-route latency and token stats."""
+    return {
+        "username": admin,
+        **Runner.router.snapshot(),
+        "local": Runner.local_stats(),
+    }
+
+
+@app.put("/admin/routing")
+async def admin_update_routing(upd: RoutingUpdate, admin: str = Depends(get_admin)):
+    """Replace the default model, override (empty string clears) or rules."""
+    router = Runner.router
+    if upd.rules is not None:
+        router.rules = [RouteRule(**r.model_dump()) for r in upd.rules]
+    if upd.default_model:
+        router.default_model = upd.default_model
+    if "override" in upd.model_fields_set:
+        router.override = upd.override or None
+    return {"username": admin, **router.snapshot()}
+
+
+@app.get("/admin/cache")
+async def admin_cache(admin: str = Depends(get_admin)):
+    """Return semantic response cache statistics, if the cache is enabled."""
+    cache = Runner.semantic_cache
+    stats = cache.stats() if cache is not None else {}
+    return {"username": admin, "enabled": cache is not None, **stats}
+
+
+class BasketPrice(BaseModel):
+    commodity: str
+    country: str
+    price: float
+
+
+def _food_basket():
+    from food_basket import get_food_basket  # numpy, loaded on first use
+
+    basket = get_food_basket()
+    if basket is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "No price history loaded")
+    return basket
+
+
+@app.get("/admin/basket")
+async def admin_basket(admin: str = Depends(get_admin)):
+    """Return the food basket cost and monthly change for every country."""
+    basket = _food_basket()
+    return {"username": admin, "month": basket.month, "countries": basket.results()}
+
+
+@app.put("/admin/basket/weights/{country}")
+async def admin_basket_weights(
+    country: str, weights: Dict[str, float], admin: str = Depends(get_admin)
+):
+    """Replace one country's basket weights (commodity → weight)."""
+    import food_basket
+
+    _food_basket()
+    if not all(math.isfinite(w) and w >= 0 for w in weights.values()):
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid weight")
+    try:
+        return food_basket.set_weights(country, weights)
+    except KeyError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Unknown country")
+
+
+@app.post("/admin/basket/prices")
+async def admin_basket_prices(
+    prices: List[BasketPrice], admin: str = Depends(get_admin)
+):
+    """Apply new latest prices; only the affected countries are recomputed."""
+    import food_basket
+
+    _food_basket()
+    if not all(math.isfinite(p.price) and p.price >= 0 for p in prices):
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid price")
+    updated: Dict[str, Any] = {}
+    for p in prices:
+        result = food_basket.update_price(p.commodity, p.country, p.price)
+        updated[result["country"]] = result
+    return {"username": admin, "countries": list(updated.values())}
+
+
+class WatchEntry(BaseModel):
+    commodity: str
+    country: str
+
+
+@app.get("/admin/watchlist")
+async def admin_watchlist(admin: str = Depends(get_admin)):
+    """Return the watchlist, the last refresh and analysis cache stats."""
+    return {"username": admin, **watchlist_scheduler.snapshot()}
+
+
+@app.put("/admin/watchlist")
+async def admin_update_watchlist(
+    entries: List[WatchEntry], admin: str = Depends(get_admin)
+):
+    """Replace the watchlist; it is picked up by the next scheduled refresh."""
+    try:
+        watchlist.replace(e.model_dump() for e in entries)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc))
+    return {"username": admin, "entries": watchlist.entries}
+
+
+@app.post("/admin/watchlist/refresh")
+async def admin_refresh_watchlist(
+    background_tasks: BackgroundTasks, admin: str = Depends(get_admin)
+):
+    """Start a refresh now instead of waiting for the schedule."""
+    started = not watchlist_scheduler.running
+    if started:
+        background_tasks.add_task(watchlist_scheduler.refresh)
+    return {"username": admin, "started": started}
+
+
+@app.get("/admin/tools")
+async def admin_tools(admin: str = Depends(get_admin)):
+    """Return per-tool options, call counts, cache hit rates and latencies."""
+    return {"username": admin, "tools": Runner.tool_stats()}
+
+
+# ─── CHAT ─────────────────────────────────────────────────────
+async def chat_turn(user: str, msg: str) -> str:
+    """Record ``msg``, run the agent on recent history and store the reply."""
+    # the history may have been spilled since the last turn
+    await conversations.load(user)
+    entry = append_message(user, "user", msg)
+    record_usage(user, entry["ts"], messages=1, total_user_words=len(msg.split()))
+
+    # build OpenAI chat history limited to last N exchanges
+    recent = conversations[user][-HISTORY_EXCHANGES * 2 :]
+    chat_hist = [{"role": m["role"], "content": m["content"]} for m in recent]
+    turn_agent = agent_for(user)
+    saved = dump_dialog(turn_agent)
+    try:
+        result = await Runner.run(
+            turn_agent,
+            input=chat_hist,
+            tier=USER_TIERS.get(user, "standard"),
+        )
+        reply = result.final_output
+    except Exception as exc:
+        agent.logger.exception("Runner failed: %s", exc)
+        reply = "Sorry, I couldn't generate a response."
+    state = dump_dialog(turn_agent)
+    if state != saved:
+        dialogs.save(user, state)
+
+    record_usage(user, total_bot_words=len(reply.split()))
+    append_message(user, "assistant", reply)
+    return reply
+
+
 # ─── WEBSOCKET CHAT ───────────────────────────────────────────
 @app.websocket("/ws/chat")
 async def websocket_chat(ws: WebSocket):
@@ -243,53 +960,21 @@ async def websocket_chat(ws: WebSocket):
         await ws.close(code=1008)
         return
 
+    await conversations.load(user)
     ensure_history(user)
-    usage[user]["conversations"] += 1
-    await ws.accept()
-
-    while True:
-        try:
-            data = await ws.receive_json()
-        except WebSocketDisconnect:
-            break
-
-        msg = data.get("message", "").strip()
-        if not msg:
-            continue
-
-        if msg.lower() == "clear history":
-            conversations[user].clear()
-            ensure_history(user)
-            await ws.send_json({"reply": "History cleared."})
-            continue
-
-        ts = int(time.time() * 1000)
-        u = usage[user]
-        # first request?
-        if u["first_request"] is None:
-            u["first_request"] = ts
-        u["messages"] += 1
-        u["last_request"] = ts
-        u["total_user_words"] += len(msg.split())
-
-        # store and call
-        conversations[user].append({"role": "user", "content": msg, "ts": ts})
-        conversations[user] = conversations[user][-HISTORY_EXCHANGES * 2 - 1 :]
-        # build OpenAI chat history limited to last N exchanges
-        recent = conversations[user][-HISTORY_EXCHANGES * 2 :]
-        chat_hist = [{"role": m["role"], "content": m["content"]} for m in recent]
-        try:
-            result = await Runner.run(agent, input=chat_hist)
-            reply = result.final_output
-        except Exception as exc:
-            agent.logger.exception("Runner failed: %s", exc)
-            reply = "Sorry, I couldn't generate a response."
-
-        u["total_bot_words"] += len(reply.split())
-        conversations[user].append({"role": "assistant", "content": reply, "ts": ts})
-        conversations[user] = conversations[user][-HISTORY_EXCHANGES * 2 - 1 :]
-
-        await ws.send_json({"reply": reply})
+    record_usage(user, conversations=1)
+    # JSON text frames unless the client offers the "msgpack" subprotocol
+    codec = await accept_with_codec(ws)
+
+    session = ChatSession(
+        ws,
+        handle_turn=lambda msg: chat_turn(user, msg),
+        handle_clear=lambda: clear_conversation(user),
+        queue_size=WS_QUEUE_SIZE,
+        send_buffer=WS_SEND_BUFFER,
+        codec=codec,
+    )
+    await session.serve()
 
 
 # ─── OPTIONAL HTTP CHAT ───────────────────────────────────────
@@ -306,46 +991,23 @@ async def chat_http(
     req: ChatRequest,
     user: str = Depends(get_user),
 ):
+    await conversations.load(user)
     ensure_history(user)
-    ts = int(time.time() * 1000)
     if req.message.strip().lower() == "clear history":
-        conversations[user].clear()
-        ensure_history(user)
+        clear_conversation(user)
         return ChatResponse(reply="History cleared.")
 
-    u = usage[user]
-    if u["first_request"] is None:
-        u["first_request"] = ts
-    u["messages"] += 1
-    u["last_request"] = ts
-    u["total_user_words"] += len(req.message.split())
-
-    conversations[user].append(
-        {
-            "role": "user",
-            "content": req.message,
-            "ts": ts,
-        }
-    )
-    conversations[user] = conversations[user][-HISTORY_EXCHANGES * 2 - 1 :]
-    recent = conversations[user][-HISTORY_EXCHANGES * 2 :]
-    chat_hist = [{"role": m["role"], "content": m["content"]} for m in recent]
-    try:
-        result = await Runner.run(agent, input=chat_hist)
-        reply = result.final_output
-    except Exception as exc:
-        agent.logger.exception("Runner failed: %s", exc)
-        reply = "Sorry, I couldn't generate a response."
-
-    u["total_bot_words"] += len(reply.split())
-    conversations[user].append({"role": "assistant", "content": reply, "ts": ts})
-    conversations[user] = conversations[user][-HISTORY_EXCHANGES * 2 - 1 :]
-
-    return ChatResponse(reply=reply)
+    return ChatResponse(reply=await chat_turn(user, req.message))
 
 
 # ─── RUNNER ───────────────────────────────────────────────────
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("chatbot_server:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "chatbot_server:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_per_message_deflate=WS_DEFLATE,
+    )
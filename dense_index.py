@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from passage_store import PassageStore, get_passage_store
+from semantic_cache import embed, normalize
+
+DENSE_DIM = int(os.getenv("DENSE_DIM", "512"))
+# corpora with at least this many chunks get an IVF coarse quantizer
+IVF_MIN_ROWS = int(os.getenv("DENSE_IVF_MIN_ROWS", "4096"))
+# clusters searched per query when IVF is active
+IVF_NPROBE = int(os.getenv("DENSE_IVF_NPROBE", "8"))
+
+_WORD = re.compile(r"\w+")
+
+Hit = Tuple[float, int]
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top ``k`` of a 2-D score matrix, best first."""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(k), (scores.shape[0], k))
+    top = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-top, axis=1)
+    rows = np.take_along_axis(part, order, axis=1)
+    return rows, np.take_along_axis(top, order, axis=1)
+
+
+def _save_atomic(path: Path, save) -> None:
+    """Write via ``save(file)`` to a temp file, then rename it over ``path``."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix="_tmp-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            save(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _kmeans(x: np.ndarray, nlist: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit rows; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), min(len(x), 64 * nlist), replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # reseed empty clusters from random sample rows
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class DenseIndex:
+    """Chunk embeddings in one contiguous float32 matrix.
+
+    Row ``i`` embeds the passage store entry ``entries[i]``. Queries are
+    embedded with the same local hashed n-gram function as the semantic cache
+    and scored in one batched matrix multiply, with ``argpartition`` picking
+    the top k. Large corpora get an IVF layer: rows are grouped by their
+    nearest k-means centroid and only the ``nprobe`` closest groups are
+    scored.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        entries: np.ndarray,
+        docs: np.ndarray,
+        centroids: Optional[np.ndarray] = None,
+        assign: Optional[np.ndarray] = None,
+        nprobe: int = IVF_NPROBE,
+    ):
+        self.vectors = vectors
+        self.entries = entries
+        self.docs = docs
+        self.centroids = centroids
+        self.nprobe = nprobe
+        self._lists: List[np.ndarray] = []
+        if centroids is not None and assign is not None:
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+            self._lists = [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @staticmethod
+    def _rows(store: PassageStore) -> Tuple[np.ndarray, np.ndarray]:
+        entries: List[int] = []
+        docs: List[int] = []
+        for d, doc in enumerate(store.docs.values()):
+            first = doc["entry"] + 1
+            entries.extend(range(first, first + doc["count"]))
+            docs.extend([d] * doc["count"])
+        return np.array(entries, dtype=np.int64), np.array(docs, dtype=np.int32)
+
+    @classmethod
+    def build(
+        cls,
+        kb_dir: Path,
+        dim: int = DENSE_DIM,
+        ivf_min_rows: int = IVF_MIN_ROWS,
+    ) -> Optional["DenseIndex"]:
+        """Embed every chunk of the current passage store and save the matrix.
+
+        Vectors go to ``_dense-<generation>.npy`` (memory-mapped on load) and
+        the IVF layout, if any, to ``_dense-<generation>.ivf.npz``. Both are
+        renamed into place complete, so readers never map a partial file.
+        """
+        kb_dir = Path(kb_dir)
+        store = PassageStore.open(kb_dir)
+        if store is None:
+            return None
+        entries, docs = cls._rows(store)
+        vectors = np.zeros((len(entries), dim), dtype=np.float32)
+        for row, entry in enumerate(entries):
+            vectors[row] = embed(normalize(store.entry(int(entry))), dim)
+
+        base = kb_dir / f"_dense-{store.generation}"
+        _save_atomic(Path(f"{base}.npy"), lambda f: np.save(f, vectors))
+        centroids = assign = None
+        if len(vectors) >= ivf_min_rows:
+            nlist = max(int(np.sqrt(len(vectors))), 1)
+            centroids = _kmeans(vectors, nlist)
+            assign = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+            _save_atomic(
+                Path(f"{base}.ivf.npz"),
+                lambda f: np.savez(f, centroids=centroids, assign=assign),
+            )
+        for old in kb_dir.glob("_dense-*"):
+            if not old.name.startswith(base.name + "."):
+                try:
+                    old.unlink()
+                except OSError:  # pragma: no cover - still mapped on Windows
+                    pass
+        return cls(vectors, entries, docs, centroids, assign)
+
+    @classmethod
+    def load(cls, kb_dir: Path, store: PassageStore) -> Optional["DenseIndex"]:
+        base = Path(kb_dir) / f"_dense-{store.generation}"
+        try:
+            vectors = np.load(f"{base}.npy", mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        entries, docs = cls._rows(store)
+        if len(entries) != len(vectors):
+            return None
+        try:
+            with np.load(f"{base}.ivf.npz") as ivf:
+                return cls(vectors, entries, docs, ivf["centroids"], ivf["assign"])
+        except FileNotFoundError:
+            return cls(vectors, entries, docs)
+
+    def search(self, queries: Sequence[str], k: int = 5) -> List[List[Hit]]:
+        """Return ``(score, row)`` hits for each query, best first."""
+        if not len(self) or not queries:
+            return [[] for _ in queries]
+        dim = self.vectors.shape[1]
+        q = np.stack([embed(normalize(text), dim) for text in queries])
+        if not self._lists:
+            rows, scores = _top_k(q @ self.vectors.T, k)
+            return [list(zip(s.tolist(), r.tolist())) for s, r in zip(scores, rows)]
+
+        probe = min(self.nprobe, len(self._lists))
+        nearest, _ = _top_k(q @ self.centroids.T, probe)
+        results = []
+        for qi, clusters in enumerate(nearest):
+            candidates = np.concatenate([self._lists[c] for c in clusters])
+            if not len(candidates):
+                results.append([])
+                continue
+            sims = self.vectors[candidates] @ q[qi]
+            rows, scores = _top_k(sims[None, :], k)
+            results.append(list(zip(scores[0].tolist(), candidates[rows[0]].tolist())))
+        return results
+
+
+def keyword_score(query: str, passage: str) -> float:
+    """Share of the query's content words that occur in ``passage``."""
+    terms = set(normalize(query).split())
+    if not terms:
+        return 0.0
+    words = set(_WORD.findall(passage.lower()))
+    return len(terms & words) / len(terms)
+
+
+# kb_dir → (passage store generation, index)
+_indexes: Dict[Path, Tuple[int, DenseIndex]] = {}
+
+
+def get_dense_index(kb_dir: Path) -> Optional[DenseIndex]:
+    """Return the saved index for the current passage store, if there is one.
+
+    Never builds: embedding the corpus is left to the rebuild after ingestion,
+    so a query arriving mid-rebuild does not start a second build.
+    """
+    kb_dir = Path(kb_dir)
+    store = get_passage_store(kb_dir)
+    if store is None:
+        return None
+    cached = _indexes.get(kb_dir)
+    if cached is None or cached[0] != store.generation:
+        index = DenseIndex.load(kb_dir, store)
+        if index is None:
+            return None
+        cached = _indexes[kb_dir] = (store.generation, index)
+    return cached[1]
+
+
+def _keyword_retrieve(
+    store: PassageStore, query: str, k: int
+) -> List[Tuple[float, str, str]]:
+    ranked = []
+    for doc in store.docs.values():
+        first = doc["entry"] + 1
+        for entry in range(first, first + doc["count"]):
+            text = store.entry(entry)
+            score = keyword_score(query, text)
+            if score > 0:
+                ranked.append((score, doc["source"], text))
+    ranked.sort(key=lambda hit: -hit[0])
+    return ranked[:k]
+
+
+def retrieve(
+    kb_dir: Path, query: str, k: int = 3, hybrid: bool = False, alpha: float = 0.7
+) -> List[Tuple[float, str, str]]:
+    """Top passages for ``query`` as ``(score, source, text)``.
+
+    With ``hybrid`` the dense candidates (4k of them) are re-ranked by
+    ``alpha * cosine + (1 - alpha) * keyword_score``. Until the index for
+    the current passage store has been built, passages are ranked by
+    ``keyword_score`` alone.
+    """
+    store = get_passage_store(kb_dir)
+    if store is None:
+        return []
+    index = get_dense_index(kb_dir)
+    if index is None:
+        return _keyword_retrieve(store, query, k)
+    hits = index.search([query], k * 4 if hybrid else k)[0]
+    sources = [d["source"] for d in store.docs.values()]
+    ranked = []
+    for score, row in hits:
+        if score <= 0:
+            continue
+        text = store.entry(int(index.entries[row]))
+        if hybrid:
+            score = alpha * score + (1 - alpha) * keyword_score(query, text)
+        ranked.append((score, sources[index.docs[row]], text))
+    ranked.sort(key=lambda hit: -hit[0])
+    return ranked[:k]
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from price_history import PriceHistory, get_price_history, prices_changed
+
+# per-country basket weights: {"kenya": {"maize": 0.5, ...}, "default": {...}}
+BASKET_WEIGHTS_PATH = Path(os.getenv("BASKET_WEIGHTS_PATH", "data/basket_weights.json"))
+
+Weights = Mapping[str, Mapping[str, float]]
+
+
+def _clean(name: str) -> str:
+    return name.strip().lower()
+
+
+def load_weights(path: Path) -> Dict[str, Dict[str, float]]:
+    """Read basket weights; a missing file means equal weights everywhere."""
+    try:
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return {
+        _clean(country): {_clean(c): float(w) for c, w in basket.items()}
+        for country, basket in raw.items()
+    }
+
+
+class FoodBasket:
+    """Weighted basket cost per country over a country × commodity grid.
+
+    ``last`` and ``prev`` hold the latest and previous month's prices (NaN
+    where unknown) and ``weights`` the basket composition. Costs and
+    month-on-month changes for every country come from a few array passes;
+    :meth:`update_price` re-derives only the affected country's row.
+
+    The change compares like with like: only commodities priced in both
+    months count, so a newly reported item does not look like inflation.
+    """
+
+    def __init__(
+        self,
+        countries: List[str],
+        commodities: List[str],
+        last: np.ndarray,
+        prev: np.ndarray,
+        weights: Weights,
+        month: Optional[str] = None,
+    ):
+        self.countries = countries
+        self.commodities = commodities
+        self.c_idx = {c: i for i, c in enumerate(countries)}
+        self.k_idx = {k: i for i, k in enumerate(commodities)}
+        self.last = last
+        self.prev = prev
+        self.month = month
+        self.config = {_clean(c): dict(b) for c, b in weights.items()}
+        self.weights = np.zeros_like(last)
+        for row in range(len(countries)):
+            self._set_row_weights(row)
+        self.cost = np.zeros(len(countries))
+        self.change = np.full(len(countries), np.nan)
+        self.coverage = np.zeros(len(countries))
+        self._compute(slice(None))
+
+    @classmethod
+    def from_history(cls, history: PriceHistory, weights: Weights) -> "FoodBasket":
+        countries = sorted({country for _, country in history.series})
+        # basket items without any price yet still get a column, so they
+        # count against coverage
+        configured = {_clean(k) for basket in weights.values() for k in basket}
+        commodities = sorted({k for k, _ in history.series} | configured)
+        last = np.full((len(countries), len(commodities)), np.nan)
+        prev = np.full_like(last, np.nan)
+        n_months = history.prices.shape[1] if history.series else 0
+        if n_months:
+            c_idx = {c: i for i, c in enumerate(countries)}
+            k_idx = {k: i for i, k in enumerate(commodities)}
+            rows = np.array([c_idx[c] for _, c in history.series], dtype=int)
+            cols = np.array([k_idx[k] for k, _ in history.series], dtype=int)
+            # raw columns, not the forward-filled metrics: a price last seen
+            # years ago must not count as this month's
+            last[rows, cols] = history.prices[:, -1]
+            if n_months > 1:
+                prev[rows, cols] = history.prices[:, -2]
+        month = history.months[-1] if history.months else None
+        return cls(countries, commodities, last, prev, weights, month)
+
+    def _set_row_weights(self, row: int) -> None:
+        basket = self.config.get(self.countries[row]) or self.config.get("default")
+        w = np.zeros(len(self.commodities))
+        if basket:
+            for commodity, weight in basket.items():
+                col = self.k_idx.get(commodity)
+                if col is not None:
+                    w[col] = weight
+        else:
+            # no configured basket: every commodity priced here counts equally
+            w[~np.isnan(self.last[row])] = 1.0
+        self.weights[row] = w
+
+    def _compute(self, rows: Any) -> None:
+        w, last, prev = self.weights[rows], self.last[rows], self.prev[rows]
+        has_last = ~np.isnan(last)
+        both = has_last & ~np.isnan(prev)
+        self.cost[rows] = np.where(has_last, w * last, 0.0).sum(axis=-1)
+        now = np.where(both, w * last, 0.0).sum(axis=-1)
+        before = np.where(both, w * prev, 0.0).sum(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.change[rows] = np.where(before > 0, (now / before - 1.0) * 100.0, np.nan)
+            total = w.sum(axis=-1)
+            covered = np.where(has_last, w, 0.0).sum(axis=-1)
+            self.coverage[rows] = np.where(total > 0, covered / total, 0.0)
+
+    def _cell(self, commodity: str, country: str) -> Tuple[int, int]:
+        commodity, country = _clean(commodity), _clean(country)
+        if country not in self.c_idx:
+            self.c_idx[country] = len(self.countries)
+            self.countries.append(country)
+            grow = np.full((1, len(self.commodities)), np.nan)
+            self.last = np.vstack([self.last, grow])
+            self.prev = np.vstack([self.prev, grow])
+            self.weights = np.vstack([self.weights, np.zeros_like(grow)])
+            self.cost = np.append(self.cost, 0.0)
+            self.change = np.append(self.change, np.nan)
+            self.coverage = np.append(self.coverage, 0.0)
+        if commodity not in self.k_idx:
+            self.k_idx[commodity] = len(self.commodities)
+            self.commodities.append(commodity)
+            grow = np.full((len(self.countries), 1), np.nan)
+            self.last = np.hstack([self.last, grow])
+            self.prev = np.hstack([self.prev, grow])
+            self.weights = np.hstack([self.weights, np.zeros_like(grow)])
+        return self.c_idx[country], self.k_idx[commodity]
+
+    def update_price(self, commodity: str, country: str, price: float) -> Dict[str, Any]:
+        """Set the latest price of one commodity and refresh that country only."""
+        row, col = self._cell(commodity, country)
+        self.last[row, col] = float(price)
+        self._set_row_weights(row)
+        self._compute(row)
+        return self.result(self.countries[row])
+
+    def set_weights(self, country: str, basket: Mapping[str, float]) -> Dict[str, Any]:
+        """Replace one country's basket composition."""
+        country = _clean(country)
+        if country not in self.c_idx:
+            raise KeyError(country)
+        for commodity in basket:
+            self._cell(commodity, country)
+        self.config[country] = {_clean(k): float(v) for k, v in basket.items()}
+        row = self.c_idx[country]
+        self._set_row_weights(row)
+        self._compute(row)
+        return self.result(country)
+
+    def result(self, country: str) -> Optional[Dict[str, Any]]:
+        row = self.c_idx.get(_clean(country))
+        if row is None:
+            return None
+        change = self.change[row]
+        return {
+            "country": self.countries[row],
+            "month": self.month,
+            "cost": round(float(self.cost[row]), 2),
+            "change_pct": None if np.isnan(change) else round(float(change), 2),
+            "coverage": round(float(self.coverage[row]), 3),
+            "weights": {
+                self.commodities[k]: float(w)
+                for k, w in enumerate(self.weights[row])
+                if w
+            },
+        }
+
+    def results(self) -> List[Dict[str, Any]]:
+        return [self.result(country) for country in self.countries]
+
+
+_basket: Optional[FoodBasket] = None
+_basket_source: Optional[Tuple[int, Optional[float]]] = None
+# prices set through update_price, re-applied when the table reloads
+_overrides: Dict[Tuple[str, str], float] = {}
+_weight_overrides: Dict[str, Dict[str, float]] = {}
+
+
+def _weights_mtime(path: Path) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def get_food_basket(
+    history: Optional[PriceHistory] = None, weights_path: Optional[Path] = None
+) -> Optional[FoodBasket]:
+    """Shared basket, rebuilt when the price table or the weights file changes."""
+    global _basket, _basket_source
+    history = history if history is not None else get_price_history()
+    weights_path = weights_path or BASKET_WEIGHTS_PATH
+    if history is None:
+        return None
+    source = (id(history), _weights_mtime(weights_path))
+    if _basket is None or source != _basket_source:
+        weights = {**load_weights(weights_path), **_weight_overrides}
+        basket = FoodBasket.from_history(history, weights)
+        for (commodity, country), price in _overrides.items():
+            basket.update_price(commodity, country, price)
+        _basket, _basket_source = basket, source
+    return _basket
+
+
+def update_price(commodity: str, country: str, price: float) -> Optional[Dict[str, Any]]:
+    """Record a new latest price and incrementally refresh its country."""
+    basket = get_food_basket()
+    if basket is None:
+        return None
+    _overrides[(_clean(commodity), _clean(country))] = float(price)
+    result = basket.update_price(commodity, country, price)
+    prices_changed()
+    return result
+
+
+def set_weights(country: str, basket_weights: Mapping[str, float]) -> Dict[str, Any]:
+    """Override one country's basket weights at runtime."""
+    basket = get_food_basket()
+    if basket is None:
+        raise LookupError("No price history loaded")
+    result = basket.set_weights(country, basket_weights)
+    _weight_overrides[_clean(country)] = basket.config[_clean(country)]
+    return result
@@ -1,15 +1,22 @@
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import logging
+import os
+import time
 
-try:
-    import openai
-except Exception:  # pragma: no cover - openai optional for tests
-    openai = None
-
+from analysis_engine import MarketAssessment, assess, facts, render
 from openai_config import load_api_key, get_client
 
-from simple_agents import function_tool, _msg_attr
+from simple_agents import Runner, function_tool, _msg_attr
+from structured_log import log_event
+from watchlist import analysis_cache
+
+# let OpenAI expand the locally computed analysis when a key is configured
+ENRICH_WITH_LLM = os.getenv("FOOD_SECURITY_ENRICH", "1").lower() not in {
+    "0",
+    "false",
+    "no",
+}
 
 # OpenAI-compatible tool schema
 FOOD_SECURITY_SCHEMA = {
@@ -57,6 +64,20 @@ FOOD_SECURITY_SCHEMA = {
 }
 
 
+def get_price_history():
+    """Shared price history; numpy is imported on the first analysis."""
+    from price_history import get_price_history as _load
+
+    return _load()
+
+
+def prices_version() -> int:
+    """Version of the shared prices; see ``price_history.prices_version``."""
+    from price_history import prices_version as _version
+
+    return _version()
+
+
 @dataclass
 class FoodSecurityHandler:
     """Stateful handler that collects required fields before analysis."""
@@ -102,47 +123,78 @@ class FoodSecurityHandler:
                     return f"Which country are we assessing for {item}?"
         return self._analysis()
 
-    def _analysis(self) -> str:
-        """Generate a detailed market assessment using OpenAI."""
-        name = self.data["commodity_name"]
-        country = self.data["country"]
-        last = float(self.data["price_last_month"])
-        prev = float(self.data["price_two_months_ago"])
-        avail = self.data["availability_level"]
+    def history_metrics(self) -> Optional[Dict[str, Any]]:
+        """Return precomputed price-history metrics for this commodity/country."""
+        history = get_price_history()
+        if history is None:
+            return None
+        return history.metrics_for(self.data["commodity_name"], self.data["country"])
 
-        load_api_key()
-        if not openai or not getattr(openai, "api_key", None):
-            return "Analysis failed: OpenAI API key not configured."
-
-        system_prompt = (
-            "You are a professional food security analyst. Use the provided figures "
-            "to produce a thorough assessment. Discuss price trends in percentage and "
-            "volatility, the impact of availability, any relevant country context such "
-            "as policy, climate, or conflict, and conclude with potential recommendations. "
-            "Your reply must contain at least eight sentences and begin with 'Analysis:'"
+    def assessment(self) -> MarketAssessment:
+        """Compute the local market assessment for the collected data."""
+        return assess(
+            self.data["commodity_name"],
+            self.data["country"],
+            float(self.data["price_last_month"]),
+            float(self.data["price_two_months_ago"]),
+            self.data["availability_level"],
+            self.history_metrics(),
         )
 
-        user_content = (
-            f"Commodity: {name}\n"
-            f"Price last month: {last}\n"
-            f"Price two months ago: {prev}\n"
-            f"Availability level: {avail}\n"
-            f"Country: {country}"
+    def _analysis(self, cached: bool = True) -> str:
+        """Return the local analysis, optionally enriched by OpenAI.
+
+        The numbers are always computed locally. When an API key is set and
+        ``FOOD_SECURITY_ENRICH`` is on, the model only receives those figures
+        and is asked to add context; any failure falls back to the local text.
+        Inputs precomputed by the watchlist scheduler are served from
+        ``analysis_cache`` unless ``cached`` is False, and only while the
+        prices they were computed from are unchanged.
+        """
+        if cached:
+            text = analysis_cache.get(self.data, prices_version())
+            if text is not None:
+                return text
+
+        assessment = self.assessment()
+        local_text = render(assessment)
+
+        if not ENRICH_WITH_LLM or not load_api_key():
+            return local_text
+
+        system_prompt = (
+            "You are a professional food security analyst. The figures below are "
+            "precomputed and correct; do not recalculate them. Turn them into an "
+            "assessment that adds relevant country context such as policy, climate "
+            "or conflict and ends with recommendations. Your reply must contain at "
+            "least eight sentences and begin with 'Analysis:'"
         )
 
+        prompt = facts(assessment)
+        route = Runner.router.route(prompt, intent="analysis")
         try:
             client = get_client()
             if not client:
                 raise RuntimeError("OpenAI client not configured")
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content},
-                ],
+            start = time.perf_counter()
+            try:
+                response = client.chat.completions.create(
+                    model=route.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt},
+                    ],
+                )
+            except Exception:
+                Runner.router.record(
+                    route, (time.perf_counter() - start) * 1000, error=True
+                )
+                raise
+            Runner.router.record(
+                route,
+                (time.perf_counter() - start) * 1000,
+                getattr(response, "usage", None),
             )
-            logging.getLogger(__name__).debug("Food security response: %s", response)
-            client.close()
             try:
                 choice = response.choices[0]
                 msg = _msg_attr(choice, "message")
@@ -152,21 +204,25 @@ class FoodSecurityHandler:
                     "Invalid food security response structure: %s", response
                 )
                 text = ""
+            log_event(
+                "food_security.response",
+                model=route.model,
+                content=text,
+                usage=getattr(response, "usage", None),
+            )
 
             if not text or not text.strip():
-                return "Sorry, I was unable to generate the analysis. Please try again."
+                return local_text
             if not text.lower().startswith("analysis"):
                 text = f"Analysis: {text}"
             return text
         except Exception as exc:  # pragma: no cover - network call
             logging.getLogger(__name__).error("OpenAI API error: %s", exc)
-            return (
-                "Analysis: An error occurred while contacting the analysis service: "
-                f"{exc}"
-            )
+            return local_text
 
 
-@function_tool
+# the optional enrichment is a blocking OpenAI call
+@function_tool(timeout=60, executor="thread", max_concurrency=4)
 def food_security_analyst(
     commodity_name: str,
     price_last_month: float,
@@ -188,3 +244,56 @@ def food_security_analyst(
 
 
 food_security_analyst.openai_schema = FOOD_SECURITY_SCHEMA
+
+
+FOOD_BASKET_SCHEMA = {
+    "type": "function",
+    "function": {
+        "name": "food_basket_index",
+        "description": (
+            "Cost of the weighted food basket and its month-on-month change, "
+            "for one country or for every tracked country."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "country": {
+                    "type": "string",
+                    "description": "Country of interest, or 'all' for every country",
+                },
+            },
+            "required": ["country"],
+        },
+    },
+}
+
+
+def _basket_line(result: Dict[str, Any]) -> str:
+    change = result["change_pct"]
+    trend = "n/a" if change is None else f"{change:+.1f}%"
+    return (
+        f"{result['country'].title()}: basket cost {result['cost']:.2f} "
+        f"({trend} month on month, {result['coverage']:.0%} of basket priced)"
+    )
+
+
+@function_tool(executor="thread")
+def food_basket_index(country: str = "all") -> str:
+    """Return the weighted food basket index for a country or all countries."""
+    from food_basket import get_food_basket  # numpy, loaded on first use
+
+    basket = get_food_basket()
+    if basket is None:
+        return "No price history is available to compute a food basket index."
+    if not country or country.strip().lower() == "all":
+        results = basket.results()
+    else:
+        result = basket.result(country)
+        if result is None:
+            return f"No basket prices are tracked for {country}."
+        results = [result]
+    month = f" ({basket.month})" if basket.month else ""
+    return f"Food basket index{month}:\n" + "\n".join(map(_basket_line, results))
+
+
+food_basket_index.openai_schema = FOOD_BASKET_SCHEMA
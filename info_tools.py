@@ -1,37 +1,106 @@
 from __future__ import annotations
 
 import logging
+import os
+import re
+import stat
 from pathlib import Path
-import requests
+from typing import Dict, Optional, Tuple
 
+from passage_store import get_passage_store
 from simple_agents import function_tool
 
 DOCS_DIR = Path("docs")
 
+# passages returned by the "dense" and "hybrid" sources
+DENSE_TOP_K = int(os.getenv("DENSE_TOP_K", "3"))
 
-@function_tool
+# path → (mtime_ns, text) of knowledge-base files already read
+_kb_cache: Dict[Path, Tuple[int, str]] = {}
+
+
+class SearchFailed(Exception):
+    """An internet lookup failed; raised so the failure is not cached."""
+
+
+def read_kb(path: Path) -> Optional[str]:
+    """Return a knowledge-base file's text, re-reading it only after changes."""
+    try:
+        st = path.stat()
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        cached = _kb_cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns:
+            return cached[1]
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        _kb_cache.pop(path, None)
+        return None
+    _kb_cache[path] = (st.st_mtime_ns, text)
+    return text
+
+
+def _ingested_text(topic: str) -> Optional[str]:
+    """Text of an ingested document, sliced from the mmap'd passage store.
+
+    Documents ingested after the last store rebuild are read from their
+    ``kb/<topic>.txt`` until the rebuild lands.
+    """
+    kb_dir = DOCS_DIR / "kb"
+    store = get_passage_store(kb_dir)
+    text = store.document(topic) if store is not None else None
+    return text if text is not None else read_kb(kb_dir / f"{topic}.txt")
+
+
+def preload_docs() -> int:
+    """Load hand-written notes and map the passage store; returns doc count."""
+    count = sum(read_kb(path) is not None for path in DOCS_DIR.glob("*.txt"))
+    store = get_passage_store(DOCS_DIR / "kb")
+    return count + (len(store.docs) if store is not None else 0)
+
+
+# kb lookups are cheap but internet ones block, so run off the event loop
+@function_tool(cache_ttl=60, timeout=15, executor="thread")
 def get_information(topic: str, source: str) -> str:
-    """Retrieve information on a topic from 'kb' or 'internet'."""
+    """Retrieve information on a topic from 'kb', 'dense', 'hybrid' or 'internet'.
+
+    'kb' looks the topic up by name; 'dense' finds the closest knowledge-base
+    passages by embedding similarity and 'hybrid' re-ranks those by keyword
+    overlap as well.
+    """
     topic = topic.lower().strip()
     if source == "kb":
-        file_path = DOCS_DIR / f"{topic}.txt"
-        if file_path.is_file():
-            return file_path.read_text(encoding="utf-8")
+        # hand-written notes first, then text extracted by the ingestion pipeline
+        text = read_kb(DOCS_DIR / f"{topic}.txt")
+        if text is None:
+            text = _ingested_text(re.sub(r"\W+", "_", topic).strip("_"))
+        if text is not None:
+            return text
         return "No information found in the knowledge base."
+    if source in ("dense", "hybrid"):
+        from dense_index import retrieve  # numpy is only needed for this source
+
+        hits = retrieve(DOCS_DIR / "kb", topic, DENSE_TOP_K, hybrid=source == "hybrid")
+        if not hits:
+            return "No information found in the knowledge base."
+        return "\n\n".join(f"[{src}] {text}" for _, src, text in hits)
     if source == "internet":
+        import requests  # only needed for live lookups
+
         try:
             resp = requests.get(
                 f"https://duckduckgo.com/?q={topic}&format=json", timeout=10
             )
-            if resp.ok:
-                data = resp.json()
-                abstract = data.get("Abstract") or "No information found."
-                return abstract
-            return f"Internet search failed with status {resp.status_code}."
+            data = resp.json() if resp.ok else None
         except Exception as exc:  # pragma: no cover - network call
             logging.getLogger(__name__).error("Internet search failed: %s", exc)
-            return f"Internet search failed: {exc}"
-    return "Invalid source. Use 'internet' or 'kb'."
+            raise SearchFailed(f"Internet search failed: {exc}") from exc
+        if data is None:
+            raise SearchFailed(
+                f"Internet search failed with status {resp.status_code}."
+            )
+        return data.get("Abstract") or "No information found."
+    return "Invalid source. Use 'internet', 'kb', 'dense' or 'hybrid'."
 
 
 get_information.openai_schema = {
@@ -39,14 +108,18 @@ get_information.openai_schema = {
     "function": {
         "name": "get_information",
         "description": (
-            "Retrieve additional information from a topic using either the"
-            " internet or the knowledge base."
+            "Retrieve additional information from a topic using the internet or"
+            " the knowledge base: 'kb' looks a topic up by name, 'dense' searches"
+            " passages by meaning and 'hybrid' combines meaning and keywords."
         ),
         "parameters": {
             "type": "object",
             "properties": {
                 "topic": {"type": "string"},
-                "source": {"type": "string", "enum": ["internet", "kb"]},
+                "source": {
+                    "type": "string",
+                    "enum": ["internet", "kb", "dense", "hybrid"],
+                },
             },
             "required": ["topic", "source"],
         },
@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import inspect
+import json
+import os
+import re
+import tempfile
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# formats the pipeline can extract text from
+SUPPORTED_SUFFIXES = frozenset(
+    {".txt", ".md", ".markdown", ".csv", ".html", ".htm", ".pdf"}
+)
+
+
+class IngestError(Exception):
+    """A document could not be turned into knowledge-base text."""
+
+
+class UnsupportedFormat(IngestError):
+    pass
+
+
+# ─── extraction ──────────────────────────────────────────────
+
+
+class _TextExtractor(HTMLParser):
+    _SKIP = {"script", "style", "noscript", "template", "head"}
+    _BLOCK = set(
+        "p div br li tr section article header footer table ul ol pre "
+        "h1 h2 h3 h4 h5 h6".split()
+    )
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in self._SKIP:
+            self._skipping += 1
+        elif tag in self._BLOCK:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._SKIP:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in self._BLOCK:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def _html_text(raw: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(raw)
+    parser.close()
+    return "".join(parser.parts)
+
+
+_MD_RULES = (
+    (re.compile(r"^```.*$", re.M), ""),  # code fences, keep the code
+    (re.compile(r"!\[[^\]]*\]\([^)]*\)"), ""),  # images
+    (re.compile(r"\[([^\]]*)\]\([^)]*\)"), r"\1"),  # links → their text
+    (re.compile(r"^\s{0,3}#{1,6}\s*", re.M), ""),  # headings
+    (re.compile(r"^\s{0,3}>\s?", re.M), ""),  # block quotes
+    (re.compile(r"(\*\*|__|\*|_|`)(?=\S)(.+?)(?<=\S)\1"), r"\2"),  # emphasis
+    (re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$", re.M), ""),  # rules
+)
+
+
+def _markdown_text(raw: str) -> str:
+    for pattern, repl in _MD_RULES:
+        raw = pattern.sub(repl, raw)
+    return raw
+
+
+def _csv_text(path: Path) -> str:
+    """One line per row, ``column: value`` pairs, so rows stay self-describing."""
+    with path.open(newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.DictReader(f)
+        lines = [
+            "; ".join(f"{k}: {v}" for k, v in row.items() if k and v)
+            for row in reader
+        ]
+    return "\n".join(line for line in lines if line)
+
+
+def _pdf_text(path: Path) -> str:
+    try:
+        from pypdf import PdfReader  # optional, only needed for PDF input
+    except ImportError as exc:
+        raise UnsupportedFormat("PDF support requires the 'pypdf' package") from exc
+    reader = PdfReader(str(path))
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_text(path: Path) -> str:
+    """Return the plain text of ``path`` based on its extension."""
+    suffix = path.suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise UnsupportedFormat(f"Unsupported document type: {suffix or path.name}")
+    if suffix == ".pdf":
+        return _pdf_text(path)
+    if suffix == ".csv":
+        return _csv_text(path)
+    raw = path.read_text(encoding="utf-8", errors="replace")
+    if suffix in {".html", ".htm"}:
+        return _html_text(raw)
+    if suffix in {".md", ".markdown"}:
+        return _markdown_text(raw)
+    return raw
+
+
+# ─── normalization & chunking ────────────────────────────────
+_SPACES = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalize, collapse runs of spaces and of blank lines."""
+    text = unicodedata.normalize("NFKC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = (_SPACES.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _pieces(paragraph: str, max_chars: int) -> List[str]:
+    """Split an oversized paragraph at sentence ends, then hard-wrap."""
+    if len(paragraph) <= max_chars:
+        return [paragraph]
+    out: List[str] = []
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            out.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            out.append(sentence)
+    return out
+
+
+def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200) -> List[str]:
+    """Pack paragraphs into chunks of at most ``max_chars``.
+
+    Each chunk after the first repeats up to ``overlap`` characters from the
+    end of the previous one so passages keep some context.
+    """
+    pieces = [
+        piece
+        for para in text.split("\n\n")
+        for piece in _pieces(para.strip(), max_chars)
+    ]
+    chunks: List[str] = []
+    current = ""
+    for piece in filter(None, pieces):
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            tail = tail[tail.find(" ") + 1 :] if " " in tail else tail
+            current = tail if tail and len(tail) + 2 + len(piece) <= max_chars else ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# ─── knowledge-base output ───────────────────────────────────
+
+
+def topic_for(filename: str) -> str:
+    """Knowledge-base key for a document: its lowercased stem."""
+    return re.sub(r"\W+", "_", Path(filename).stem.lower()).strip("_") or "document"
+
+
+def topic_owner(docs_dir: Path, filename: str) -> Optional[str]:
+    """Another document in ``docs_dir`` that maps to the same topic, if any.
+
+    ``rice.txt`` and ``rice.csv`` would write the same outputs, so only one
+    of them may exist at a time.
+    """
+    topic = topic_for(filename)
+    for path in Path(docs_dir).glob("*"):
+        if (
+            path.name != filename
+            and path.suffix.lower() in SUPPORTED_SUFFIXES
+            and path.is_file()
+            and topic_for(path.name) == topic
+        ):
+            return path.name
+    return None
+
+
+def _source(kb_dir: Path, topic: str) -> Optional[str]:
+    try:
+        meta = json.loads((kb_dir / f"{topic}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return meta.get("source")
+
+
+def _write_atomic(path: Path, data: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def ingest_file(
+    path: str, kb_dir: str, max_chars: int = 1200, overlap: int = 200
+) -> Dict[str, Any]:
+    """Extract, normalize and chunk one document into ``kb_dir``.
+
+    Writes ``<topic>.txt`` (the normalized text) and ``<topic>.json`` (source
+    and chunks). Runs in a worker process, so it only takes plain arguments.
+    """
+    src = Path(path)
+    text = normalize_text(extract_text(src))
+    if not text:
+        raise IngestError(f"No text found in {src.name}")
+    chunks = chunk_text(text, max_chars, overlap)
+    out = Path(kb_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    topic = topic_for(src.name)
+    owner = _source(out, topic)
+    if owner not in (None, src.name) and (src.parent / owner).is_file():
+        raise IngestError(f"Topic {topic!r} already belongs to {owner}")
+    _write_atomic(out / f"{topic}.txt", text)
+    _write_atomic(
+        out / f"{topic}.json",
+        json.dumps({"source": src.name, "chunks": chunks}, ensure_ascii=False),
+    )
+    return {"file": src.name, "topic": topic, "chars": len(text), "chunks": len(chunks)}
+
+
+def remove_outputs(kb_dir: Path, filename: str) -> bool:
+    """Delete what ``ingest_file`` wrote for ``filename``.
+
+    Outputs recorded as coming from another source are left alone.
+    """
+    topic = topic_for(filename)
+    if _source(Path(kb_dir), topic) not in (None, filename):
+        return False
+    removed = False
+    for suffix in (".txt", ".json"):
+        try:
+            (Path(kb_dir) / f"{topic}{suffix}").unlink()
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+# ─── jobs ────────────────────────────────────────────────────
+
+
+@dataclass
+class IngestJob:
+    id: str
+    files: List[str]
+    status: str = "queued"
+    done: int = 0
+    failed: int = 0
+    chunks: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": len(self.files),
+            "done": self.done,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "errors": dict(self.errors),
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class IngestionPipeline:
+    """Run ``ingest_file`` for batches of documents across worker processes.
+
+    ``workers=0`` parses in a thread instead, which suits small deployments.
+    ``on_progress`` is called with the job after every file and
+    ``on_complete`` (which may be a coroutine function) once the whole batch
+    is done.
+    """
+
+    def __init__(
+        self,
+        kb_dir: Path,
+        workers: Optional[int] = None,
+        max_chars: int = 1200,
+        overlap: int = 200,
+        keep_jobs: int = 50,
+        on_progress: Optional[Callable[[IngestJob], None]] = None,
+        on_complete: Optional[Callable[[IngestJob], Any]] = None,
+    ):
+        self.kb_dir = Path(kb_dir)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.keep_jobs = keep_jobs
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls, kb_dir: Path, **kwargs: Any) -> "IngestionPipeline":
+        workers = os.getenv("INGEST_WORKERS")
+        return cls(
+            kb_dir,
+            workers=int(workers) if workers else None,
+            max_chars=int(os.getenv("INGEST_CHUNK_CHARS", "1200")),
+            overlap=int(os.getenv("INGEST_CHUNK_OVERLAP", "200")),
+            **kwargs,
+        )
+
+    def executor(self) -> Optional[Executor]:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def create_job(self, paths: Sequence[Path]) -> IngestJob:
+        job = IngestJob(id=uuid.uuid4().hex[:12], files=[str(p) for p in paths])
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.keep_jobs:
+            self.jobs.popitem(last=False)
+        return job
+
+    async def _ingest(self, path: str) -> Dict[str, Any]:
+        args = (path, str(self.kb_dir), self.max_chars, self.overlap)
+        executor = self.executor()
+        if executor is None:
+            return await asyncio.to_thread(ingest_file, *args)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, ingest_file, *args
+        )
+
+    async def run(self, job: IngestJob) -> IngestJob:
+        """Process every file of ``job``; failures are recorded per file."""
+        job.status = "running"
+        job.started = time.time()
+
+        async def one(path: str):
+            try:
+                return path, await self._ingest(path), None
+            except Exception as exc:
+                return path, None, exc
+
+        for finished in asyncio.as_completed([one(p) for p in job.files]):
+            path, result, exc = await finished
+            if exc is None:
+                job.done += 1
+                job.chunks += result["chunks"]
+            else:
+                job.failed += 1
+                job.errors[Path(path).name] = str(exc) or type(exc).__name__
+            if self.on_progress:
+                self.on_progress(job)
+
+        job.status = "done"
+        job.finished = time.time()
+        if self.on_complete:
+            result = self.on_complete(job)
+            if inspect.isawaitable(result):
+                await result
+        return job
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
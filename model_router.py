@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+_INTENT_PATTERNS = (
+    ("analysis", re.compile(r"\banaly[sz]|\banalysis\b")),
+    ("info", re.compile(r"\b(?:info(?:rmation)?|tell me about)\b")),
+    ("greeting", re.compile(r"^(?:hi|hello|hey)\b")),
+    ("help", re.compile(r"^help\b")),
+)
+
+
+# wording that suggests a lookup, a price or an analysis rather than small talk
+_TOOL_HINTS = re.compile(
+    r"\b(?:price|prices|cost|basket|index|market|food security|availability"
+    r"|search|look up|lookup|information|latest)\b"
+)
+
+
+def needs_tools(message: str, intent: Optional[str] = None) -> bool:
+    """Whether answering ``message`` is likely to need the agent's tools."""
+    intent = intent or detect_intent(message)
+    return intent in ("analysis", "info") or bool(_TOOL_HINTS.search(message.lower()))
+
+
+def detect_intent(message: str) -> str:
+    """Cheap keyword intent used to pick a route."""
+    lowered = message.lower().strip()
+    for name, pattern in _INTENT_PATTERNS:
+        if pattern.search(lowered):
+            return name
+    return "chat"
+
+
+@dataclass
+class RouteRule:
+    """Send matching requests to ``model``.
+
+    Empty ``intents``/``tiers`` and ``None`` limits match anything. A rule is
+    skipped while its model's recent latency exceeds ``max_latency_ms``; the
+    latency expires after the router's ``latency_ttl`` so the model is retried.
+    """
+
+    name: str
+    model: str
+    intents: List[str] = field(default_factory=list)
+    tiers: List[str] = field(default_factory=list)
+    min_chars: int = 0
+    max_chars: Optional[int] = None
+    needs_tools: Optional[bool] = None
+    max_latency_ms: Optional[float] = None
+
+    def matches(self, length: int, intent: str, needs_tools: bool, tier: str) -> bool:
+        return (
+            (not self.intents or intent in self.intents)
+            and (not self.tiers or tier in self.tiers)
+            and length >= self.min_chars
+            and (self.max_chars is None or length <= self.max_chars)
+            and (self.needs_tools is None or self.needs_tools == needs_tools)
+        )
+
+
+@dataclass
+class Route:
+    name: str
+    model: str
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    errors: int = 0
+    total_latency_ms: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["avg_latency_ms"] = self.total_latency_ms / self.calls if self.calls else 0.0
+        return data
+
+
+class ModelRouter:
+    """Pick a model per request from ordered rules; first match wins."""
+
+    # weight of the newest sample in the per-model latency average
+    LATENCY_ALPHA = 0.2
+
+    def __init__(
+        self,
+        rules: Sequence[RouteRule] = (),
+        default_model: str = DEFAULT_MODEL,
+        override: Optional[str] = None,
+        latency_ttl: float = 60.0,
+        clock=time.monotonic,
+    ):
+        self.rules = list(rules)
+        self.default_model = default_model
+        self.override = override
+        self.latency_ttl = latency_ttl
+        self._clock = clock
+        self.latency_ms: Dict[str, float] = {}
+        self._latency_at: Dict[str, float] = {}
+        self.stats: Dict[str, RouteStats] = {}
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """Build from ``MODEL_ROUTES`` (JSON list of rules) and ``MODEL_OVERRIDE``."""
+        rules = [RouteRule(**r) for r in json.loads(os.getenv("MODEL_ROUTES", "[]"))]
+        return cls(
+            rules,
+            DEFAULT_MODEL,
+            os.getenv("MODEL_OVERRIDE") or None,
+            latency_ttl=float(os.getenv("MODEL_LATENCY_TTL", "60")),
+        )
+
+    def recent_latency(self, model: str) -> Optional[float]:
+        """Average latency of ``model``, or None once it is older than ``latency_ttl``.
+
+        A model skipped for being slow gets no new samples, so without expiry
+        it would never be tried again.
+        """
+        at = self._latency_at.get(model)
+        if at is None or self._clock() - at > self.latency_ttl:
+            return None
+        return self.latency_ms.get(model)
+
+    def route(
+        self,
+        message: str,
+        *,
+        intent: Optional[str] = None,
+        needs_tools: bool = False,
+        tier: str = "standard",
+    ) -> Route:
+        if self.override:
+            return Route("override", self.override)
+        intent = intent or detect_intent(message)
+        for rule in self.rules:
+            if not rule.matches(len(message), intent, needs_tools, tier):
+                continue
+            recent = self.recent_latency(rule.model)
+            if rule.max_latency_ms is not None and recent and recent > rule.max_latency_ms:
+                continue
+            return Route(rule.name, rule.model)
+        return Route("default", self.default_model)
+
+    def record(
+        self,
+        route: Route,
+        latency_ms: float,
+        usage: Any = None,
+        error: bool = False,
+    ) -> None:
+        """Account one upstream call made for ``route``."""
+        stats = self.stats.setdefault(route.name, RouteStats())
+        stats.calls += 1
+        stats.errors += int(error)
+        stats.total_latency_ms += latency_ms
+        if usage is not None:
+            stats.prompt_tokens += _usage_value(usage, "prompt_tokens")
+            stats.completion_tokens += _usage_value(usage, "completion_tokens")
+        prev = self.recent_latency(route.model)
+        self.latency_ms[route.model] = (
+            latency_ms
+            if prev is None
+            else prev + self.LATENCY_ALPHA * (latency_ms - prev)
+        )
+        self._latency_at[route.model] = self._clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "default_model": self.default_model,
+            "override": self.override,
+            "rules": [asdict(r) for r in self.rules],
+            "latency_ms": dict(self.latency_ms),
+            "routes": {name: s.as_dict() for name, s in self.stats.items()},
+        }
+
+
+def _usage_value(usage: Any, key: str) -> int:
+    value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, 0)
+    return value if isinstance(value, int) else 0
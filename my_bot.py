@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
 
-from food_security import food_security_analyst
+from food_security import food_basket_index, food_security_analyst
 from info_tools import get_information
 from simple_agents import Agent, Runner
 
@@ -11,7 +11,7 @@ agent = Agent(
         "You are an agentic assistant. You are able to reason, plan, gather information, "
         "and analyze food security conditions using available tools. Think before you act."
     ),
-    tools=[get_information, food_security_analyst],
+    tools=[get_information, food_security_analyst, food_basket_index],
 )
 
 app = FastAPI()
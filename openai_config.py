@@ -1,21 +1,43 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-import httpx
+import sys
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Optional
 
-try:
+if TYPE_CHECKING:  # pragma: no cover - used for linting only
     import openai
-except Exception:  # pragma: no cover - openai optional for tests
-    openai = None
 
+# keep-alive connections held open to the API by the shared clients
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
 
-def load_api_key() -> str | None:
-    """Load OpenAI API key from environment or optional .env file."""
-    if not openai:
+# clients are shared so requests reuse pooled connections; the async one is
+# tied to the event loop it was created on
+_async_client: Any = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_client: Any = None
+
+
+def _openai() -> Optional[ModuleType]:
+    """Import openai on first use; it is optional and slow to import."""
+    try:
+        import openai
+    except Exception:  # pragma: no cover - openai optional for tests
         return None
-    if getattr(openai, "api_key", None):
-        return openai.api_key
+    return openai
+
+
+def load_api_key() -> str | None:
+    """Load OpenAI API key from environment or optional .env file.
+
+    openai itself is only imported once a key is found, so servers running
+    without one never pay for the import.
+    """
+    loaded = sys.modules.get("openai")
+    if loaded is not None and getattr(loaded, "api_key", None):
+        return loaded.api_key
 
     key = os.getenv("OPENAI_API_KEY")
     if not key:
@@ -28,6 +50,9 @@ def load_api_key() -> str | None:
             key = None
 
     if key:
+        openai = _openai()
+        if not openai:
+            return None
         openai.api_key = key
     else:
         logging.getLogger(__name__).warning("OpenAI API key not configured.")
@@ -42,17 +67,68 @@ def require_api_key() -> str:
     return key
 
 
+def _limits() -> Any:
+    import httpx
+
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS
+    )
+
+
 def get_async_client() -> "openai.AsyncOpenAI | None":
-    """Return an AsyncOpenAI client or None if not configured."""
-    if not load_api_key() or not openai:
+    """Return the shared AsyncOpenAI client or None if not configured."""
+    global _async_client, _async_loop
+    if not load_api_key():
         return None
-    return openai.AsyncOpenAI(
-        http_client=httpx.AsyncClient(proxy=None, trust_env=False)
-    )
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _async_client is None or loop is not _async_loop:
+        import httpx
+
+        _async_client = _openai().AsyncOpenAI(
+            http_client=httpx.AsyncClient(
+                proxy=None, trust_env=False, limits=_limits()
+            )
+        )
+        _async_loop = loop
+    return _async_client
 
 
 def get_client() -> "openai.OpenAI | None":
-    """Return a synchronous OpenAI client or None if not configured."""
-    if not load_api_key() or not openai:
+    """Return the shared synchronous OpenAI client or None if not configured."""
+    global _sync_client
+    if not load_api_key():
         return None
-    return openai.OpenAI(http_client=httpx.Client(proxy=None, trust_env=False))
+    if _sync_client is None:
+        import httpx
+
+        _sync_client = _openai().OpenAI(
+            http_client=httpx.Client(proxy=None, trust_env=False, limits=_limits())
+        )
+    return _sync_client
+
+
+async def warm_up_clients(timeout: float = 5.0) -> bool:
+    """Open a pooled connection to the API before the first real request.
+
+    Returns False when no key is configured.
+    """
+    client = get_async_client()
+    if client is None:
+        return False
+    await client.with_options(timeout=timeout, max_retries=0).models.list()
+    return True
+
+
+async def close_clients() -> None:
+    """Close the shared clients and their connection pools."""
+    global _async_client, _async_loop, _sync_client
+    client, _async_client = _async_client, None
+    if client is not None and _async_loop is asyncio.get_running_loop():
+        await client.close()
+    _async_loop = None
+    client, _sync_client = _sync_client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _map(path: Path) -> Any:
+    """Map ``path`` read-only; empty files map to an empty bytes object."""
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class PassageStore:
+    """Knowledge-base text packed into one memory-mapped file.
+
+    ``_passages-<gen>.bin`` holds every entry as UTF-8 back to back and
+    ``_passages-<gen>.idx`` holds ``n + 1`` native uint64 offsets into it. Each
+    document contributes its full text followed by its chunks; the small
+    ``_passages.json`` maps topics to entry numbers and names the current
+    generation. Lookups decode just the requested slice, and because the
+    files are mapped read-only every worker process shares one page cache.
+    """
+
+    # ingested topics never start with "_", so these names cannot collide
+    META = "_passages.json"
+
+    def __init__(self, kb_dir: Path, meta: Dict[str, Any]):
+        self.kb_dir = Path(kb_dir)
+        self.generation = meta["generation"]
+        self.docs: Dict[str, Dict[str, Any]] = {d["topic"]: d for d in meta["docs"]}
+        self._data = _map(self.kb_dir / meta["data"])
+        index = _map(self.kb_dir / meta["index"])
+        self._offsets = memoryview(index).cast("Q") if len(index) else array("Q", [0])
+
+    @classmethod
+    def open(cls, kb_dir: Path) -> Optional["PassageStore"]:
+        try:
+            meta = json.loads((Path(kb_dir) / cls.META).read_text(encoding="utf-8"))
+            return cls(kb_dir, meta)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def build(cls, kb_dir: Path) -> Dict[str, int]:
+        """Pack every ``<topic>.json`` written by the ingestion pipeline.
+
+        A new generation is written next to the current one and published by
+        atomically replacing ``_passages.json``; older generations are removed
+        afterwards (open maps keep working on POSIX).
+        """
+        kb_dir = Path(kb_dir)
+        kb_dir.mkdir(parents=True, exist_ok=True)
+        previous = cls.open(kb_dir)
+        generation = previous.generation + 1 if previous else 1
+        data_name = f"_passages-{generation}.bin"
+        index_name = f"_passages-{generation}.idx"
+
+        offsets = array("Q", [0])
+        docs: List[Dict[str, Any]] = []
+        with (kb_dir / data_name).open("wb") as data:
+            for path in sorted(kb_dir.glob("*.json")):
+                if path.name == cls.META:
+                    continue
+                try:
+                    record = json.loads(path.read_text(encoding="utf-8"))
+                    text = (kb_dir / f"{path.stem}.txt").read_text(encoding="utf-8")
+                except (OSError, ValueError):
+                    continue
+                docs.append(
+                    {
+                        "topic": path.stem,
+                        "source": record.get("source", path.stem),
+                        "entry": len(offsets) - 1,
+                        "count": len(record.get("chunks", [])),
+                    }
+                )
+                for entry in [text, *record.get("chunks", [])]:
+                    data.write(entry.encode("utf-8"))
+                    offsets.append(data.tell())
+        with (kb_dir / index_name).open("wb") as index:
+            offsets.tofile(index)
+
+        meta = {
+            "generation": generation,
+            "data": data_name,
+            "index": index_name,
+            "docs": docs,
+        }
+        fd, tmp = tempfile.mkstemp(dir=kb_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, separators=(",", ":"))
+        os.replace(tmp, kb_dir / cls.META)
+
+        for old in kb_dir.glob("_passages-*.*"):
+            if old.name not in (data_name, index_name):
+                try:
+                    old.unlink()
+                except OSError:  # pragma: no cover - still mapped on Windows
+                    pass
+        return {
+            "generation": generation,
+            "documents": len(docs),
+            "entries": len(offsets) - 1,
+        }
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def entry(self, i: int) -> str:
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._data[start:end].decode("utf-8")
+
+    def document(self, topic: str) -> Optional[str]:
+        """Full normalized text of ``topic``, or None if it is not stored."""
+        doc = self.docs.get(topic)
+        return None if doc is None else self.entry(doc["entry"])
+
+    def passages(self, topic: str) -> List[str]:
+        doc = self.docs.get(topic)
+        if doc is None:
+            return []
+        first = doc["entry"] + 1
+        return [self.entry(i) for i in range(first, first + doc["count"])]
+
+
+# kb_dir → (_passages.json mtime, open store)
+_stores: Dict[Path, Tuple[int, PassageStore]] = {}
+
+
+def get_passage_store(kb_dir: Path) -> Optional[PassageStore]:
+    """Return the store for ``kb_dir``, reopening it after a rebuild."""
+    kb_dir = Path(kb_dir)
+    try:
+        mtime = (kb_dir / PassageStore.META).stat().st_mtime_ns
+    except FileNotFoundError:
+        _stores.pop(kb_dir, None)
+        return None
+    cached = _stores.get(kb_dir)
+    if cached is None or cached[0] != mtime:
+        store = PassageStore.open(kb_dir)
+        if store is None:
+            return None
+        cached = _stores[kb_dir] = (mtime, store)
+    return cached[1]
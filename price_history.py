@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import csv
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# default location of the commodity × country × month price table
+PRICE_HISTORY_PATH = Path(os.getenv("PRICE_HISTORY_PATH", "data/prices.csv"))
+
+SeriesKey = Tuple[str, str]
+
+
+def _key(commodity: str, country: str) -> SeriesKey:
+    return commodity.strip().lower(), country.strip().lower()
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along the month axis for every series at once."""
+    mask = np.isnan(values)
+    idx = np.where(~mask, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return values[np.arange(values.shape[0])[:, None], idx]
+
+
+class PriceHistory:
+    """Monthly prices for every commodity/country series in one NumPy matrix.
+
+    ``prices`` has one row per series and one column per month (``YYYY-MM``),
+    with NaN for missing observations. ``refresh`` computes trend metrics for
+    the latest month across all series in a handful of vectorized passes.
+    """
+
+    def __init__(
+        self,
+        series: List[SeriesKey],
+        months: List[str],
+        prices: np.ndarray,
+        window: int = 6,
+    ):
+        self.series = series
+        self.months = months
+        self.prices = prices
+        self.window = window
+        self.index: Dict[SeriesKey, int] = {k: i for i, k in enumerate(series)}
+        self.metrics: Dict[str, np.ndarray] = {}
+        self.refresh()
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Tuple[str, str, str, float]], window: int = 6
+    ) -> "PriceHistory":
+        """Build from ``(commodity, country, month, price)`` rows."""
+        rows = [(_key(c, k), m.strip()[:7], float(p)) for c, k, m, p in records]
+        series = sorted({r[0] for r in rows})
+        months = sorted({r[1] for r in rows})
+        s_idx = {k: i for i, k in enumerate(series)}
+        m_idx = {m: i for i, m in enumerate(months)}
+        prices = np.full((len(series), len(months)), np.nan)
+        for key, month, price in rows:
+            prices[s_idx[key], m_idx[month]] = price
+        return cls(series, months, prices, window)
+
+    @classmethod
+    def load(cls, path: Path, window: int = 6) -> "PriceHistory":
+        """Load a CSV (or Parquet, if pandas is installed) price table.
+
+        Expected columns: ``commodity``, ``country``, ``month``, ``price``.
+        """
+        path = Path(path)
+        if path.suffix.lower() == ".parquet":
+            import pandas as pd  # optional, only needed for Parquet input
+
+            columns = ["commodity", "country", "month", "price"]
+            frame = pd.read_parquet(path, columns=columns)
+            records = frame.astype({"month": str}).itertuples(index=False, name=None)
+            return cls.from_records(records, window)
+        with path.open(newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            records = [
+                (r["commodity"], r["country"], r["month"], r["price"])
+                for r in reader
+                if r.get("price") not in (None, "")
+            ]
+        return cls.from_records(records, window)
+
+    def refresh(self) -> None:
+        """Recompute latest-month metrics for every series."""
+        n_series, n_months = self.prices.shape
+        if n_months == 0:
+            self.metrics = {}
+            return
+        filled = _ffill(self.prices)
+        last = filled[:, -1]
+        prev = filled[:, -2] if n_months > 1 else np.full(n_series, np.nan)
+
+        # all-NaN rows and short series legitimately produce NaN metrics
+        with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            pct_change = (last - prev) / prev * 100.0
+            returns = np.diff(np.log(filled), axis=1)[:, -self.window :]
+            # rolling volatility over the trailing window of monthly log returns
+            volatility = np.nanstd(returns, axis=1) * 100.0
+            mean = np.nanmean(self.prices, axis=1)
+            std = np.nanstd(self.prices, axis=1)
+            zscore = (last - mean) / std
+
+            # seasonal index: mean price in the latest calendar month vs overall
+            month_of_year = np.array([int(m[5:7]) for m in self.months])
+            same_month = month_of_year == month_of_year[-1]
+            seasonal = np.nanmean(self.prices[:, same_month], axis=1) / mean
+
+        self.metrics = {
+            "last_price": last,
+            "previous_price": prev,
+            "pct_change": pct_change,
+            "volatility": volatility,
+            "zscore": zscore,
+            "seasonal_index": seasonal,
+        }
+
+    def metrics_for(self, commodity: str, country: str) -> Optional[Dict[str, float]]:
+        """Return precomputed metrics for one series, or None if unknown."""
+        row = self.index.get(_key(commodity, country))
+        if row is None or not self.metrics:
+            return None
+        out = {}
+        for name, values in self.metrics.items():
+            value = float(values[row])
+            out[name] = None if np.isnan(value) or np.isinf(value) else value
+        out["month"] = self.months[-1]
+        return out
+
+
+_history: Optional[PriceHistory] = None
+_history_mtime: Optional[float] = None
+# bumped on every reload or override, so caches of derived figures can tell
+_version = 0
+
+
+def get_price_history(path: Path = PRICE_HISTORY_PATH) -> Optional[PriceHistory]:
+    """Return the shared price history, reloading it when the file changes."""
+    global _history, _history_mtime
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+    if _history is None or mtime != _history_mtime:
+        _history = PriceHistory.load(path)
+        _history_mtime = mtime
+        prices_changed()
+    return _history
+
+
+def prices_changed() -> None:
+    """Record a price change made outside the table file (e.g. an override)."""
+    global _version
+    _version += 1
+
+
+def prices_version(path: Path = PRICE_HISTORY_PATH) -> int:
+    """Counter that changes with the shared prices; reloads the file first."""
+    get_price_history(path)
+    return _version
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_TOKEN = re.compile(r"\w+")
+
+# request phrasing that does not change what is being asked about
+_FILLER = frozenset(
+    "a about an any are can could details do explain give i info information is "
+    "know me more of on please show some tell the what whats you".split()
+)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and filler words, collapse whitespace."""
+    words = _NON_WORD.sub(" ", text.lower()).split()
+    return " ".join(w for w in words if w not in _FILLER)
+
+
+def embed(text: str, dim: int = 512) -> np.ndarray:
+    """Embed ``text`` as a unit vector of hashed word and character n-grams.
+
+    Purely local and deterministic: no model or network access is needed.
+    """
+    words = text.split()
+    padded = f" {text} "
+    grams = words + [padded[i : i + 3] for i in range(len(padded) - 2)]
+    vec = np.zeros(dim, dtype=np.float32)
+    if not grams:
+        return vec
+    hashes = np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams),
+        dtype=np.uint32,
+        count=len(grams),
+    )
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(vec, hashes % dim, signs)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def fingerprint(context: str) -> int:
+    return zlib.crc32(context.encode("utf-8"))
+
+
+def key_tokens(text: str, entities: FrozenSet[str] = frozenset()) -> FrozenSet[str]:
+    """Tokens a cached answer must share exactly: numbers and named entities.
+
+    Entities are words capitalized mid-sentence plus any word in ``entities``;
+    n-gram similarity alone barely notices ``2023`` vs ``2024``.
+    """
+    tokens = _TOKEN.findall(text)
+    keys = set()
+    for i, token in enumerate(tokens):
+        lowered = token.lower()
+        if (
+            any(c.isdigit() for c in token)
+            or lowered in entities
+            or (i > 0 and token[0].isupper())
+        ):
+            keys.add(lowered)
+    return frozenset(keys)
+
+
+class SemanticCache:
+    """Answers for past questions, looked up by cosine similarity.
+
+    Entries live in a fixed-size float32 matrix so a lookup is one
+    matrix-vector product. Entries expire after ``ttl`` seconds, the least
+    recently used one is replaced when full, and everything is dropped when
+    the contents of ``docs_dir`` change.
+
+    A hit also needs the same :func:`key_tokens`, and questions shorter than
+    ``min_chars`` once normalized ("why?", "and then") are never cached.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+        dim: int = 512,
+        docs_dir: Optional[Path] = None,
+        check_interval: float = 5.0,
+        min_chars: int = 4,
+        entities: Iterable[str] = (),
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dim = dim
+        self.docs_dir = docs_dir
+        self.check_interval = check_interval
+        self.min_chars = min_chars
+        self.entities = frozenset(e.strip().lower() for e in entities if e.strip())
+        self.hits = 0
+        self.misses = 0
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._contexts = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._answers: List[Optional[str]] = [None] * max_entries
+        self._keys: List[FrozenSet[str]] = [frozenset()] * max_entries
+        self._docs_signature: Optional[Tuple] = None
+        self._checked = 0.0
+
+    @classmethod
+    def from_env(cls, docs_dir: Optional[Path] = None) -> "SemanticCache":
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "1024")),
+            docs_dir=docs_dir,
+            min_chars=int(os.getenv("SEMANTIC_CACHE_MIN_CHARS", "4")),
+            entities=os.getenv("SEMANTIC_CACHE_ENTITIES", "").split(","),
+        )
+
+    def _docs_changed(self) -> bool:
+        if self.docs_dir is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            signature = tuple(
+                sorted(
+                    (e.name, e.stat().st_mtime_ns, e.stat().st_size)
+                    for e in os.scandir(self.docs_dir)
+                    if e.is_file()
+                )
+            )
+        except FileNotFoundError:
+            signature = ()
+        previous, self._docs_signature = self._docs_signature, signature
+        return previous is not None and signature != previous
+
+    def invalidate(self) -> None:
+        """Drop every cached answer."""
+        self._expires[:] = 0
+        self._answers = [None] * len(self._answers)
+
+    def lookup(self, message: str, context: str) -> Optional[str]:
+        """Return a cached answer for a paraphrase of ``message``, if any."""
+        if self._docs_changed():
+            self.invalidate()
+        key = normalize(message)
+        if len(key) < self.min_chars:
+            self.misses += 1
+            return None
+        now = time.time()
+        valid = (self._expires > now) & (self._contexts == fingerprint(context))
+        tokens = key_tokens(message, self.entities)
+        for slot in np.flatnonzero(valid):
+            if self._keys[slot] != tokens:
+                valid[slot] = False
+        if valid.any():
+            sims = self._vectors @ embed(key, self.dim)
+            sims[~valid] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                self.hits += 1
+                self._last_used[best] = now
+                return self._answers[best]
+        self.misses += 1
+        return None
+
+    def store(self, message: str, context: str, answer: str) -> None:
+        key = normalize(message)
+        if len(key) < self.min_chars:
+            return
+        now = time.time()
+        free = np.flatnonzero(self._expires <= now)
+        slot = int(free[0]) if free.size else int(np.argmin(self._last_used))
+        self._vectors[slot] = embed(key, self.dim)
+        self._contexts[slot] = fingerprint(context)
+        self._expires[slot] = now + self.ttl
+        self._last_used[slot] = now
+        self._answers[slot] = answer
+        self._keys[slot] = key_tokens(message, self.entities)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": int((self._expires > time.time()).sum()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from itertools import count
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+# rough bookkeeping cost of one stored message (dict, keys, timestamp)
+_MESSAGE_OVERHEAD = 240
+
+
+class SessionStore:
+    """Small JSON-file store keyed by ``(kind, user)``."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, kind: str, user: str) -> Path:
+        if not user or user.startswith(".") or "/" in user or "\\" in user:
+            raise ValueError(f"Invalid session key: {user!r}")
+        return self.root / kind / f"{user}.json"
+
+    def write(self, kind: str, user: str, data: Any) -> None:
+        """Atomically persist ``data`` for ``user``."""
+        path = self._path(kind, user)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def read(self, kind: str, user: str, default: Any = None) -> Any:
+        try:
+            with self._path(kind, user).open(encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+
+    def delete(self, kind: str, user: str) -> bool:
+        try:
+            self._path(kind, user).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def keys(self, kind: str) -> List[str]:
+        folder = self.root / kind
+        if not folder.is_dir():
+            return []
+        return [p.stem for p in folder.glob("*.json")]
+
+
+def _history_size(msgs: List[Dict[str, Any]]) -> int:
+    return sum(len(str(m.get("content", ""))) + _MESSAGE_OVERHEAD for m in msgs)
+
+
+class ConversationStore(MutableMapping):
+    """Per-user histories with a global memory cap.
+
+    Behaves like ``defaultdict(list)``. Once the approximate size of all
+    resident histories passes ``cap_bytes`` the least recently active users
+    are spilled to ``store`` and reloaded transparently on next access.
+    Async callers use :meth:`load` to read a spilled history off the event
+    loop. A reloaded user's file is kept until the next spill overwrites it
+    or the history is deleted, so a crash after reload loses only what
+    changed since.
+    """
+
+    KIND = "history"
+
+    def __init__(self, store: SessionStore, cap_bytes: int):
+        self.store = store
+        self.cap_bytes = cap_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._resident: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}
+        self._clock = count(1)
+        # distinguishes versions handed out by different processes
+        self.epoch = os.urandom(4).hex()
+        self._spilled = set(store.keys(self.KIND))
+
+    def __getitem__(self, user: str) -> List[Dict[str, Any]]:
+        msgs = self._resident.get(user)
+        if msgs is None:
+            msgs = []
+            if user in self._spilled:
+                msgs = self.store.read(self.KIND, user, [])
+                self._spilled.discard(user)
+            self._resident[user] = msgs
+            self.touch(user)
+        else:
+            self._resident.move_to_end(user)
+        return msgs
+
+    def __setitem__(self, user: str, msgs: List[Dict[str, Any]]) -> None:
+        self._spilled.discard(user)
+        self._resident[user] = msgs
+        self._resident.move_to_end(user)
+        self.touch(user)
+
+    def __delitem__(self, user: str) -> None:
+        if user not in self:
+            raise KeyError(user)
+        if self._resident.pop(user, None) is not None:
+            self.bytes -= self._sizes.pop(user, 0)
+        self._versions[user] = next(self._clock)
+        # a resident user may still have the file it was reloaded from
+        self._spilled.discard(user)
+        self.store.delete(self.KIND, user)
+
+    def __contains__(self, user: object) -> bool:
+        return user in self._resident or user in self._spilled
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(self._resident)
+        yield from list(self._spilled - self._resident.keys())
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._spilled)
+
+    def get(self, user: str, default: Any = None) -> Any:
+        return self[user] if user in self else default
+
+    async def load(self, user: str) -> List[Dict[str, Any]]:
+        """Like ``self[user]``, but a spilled history is read in a thread."""
+        if user in self._spilled:
+            msgs = await asyncio.to_thread(self.store.read, self.KIND, user, [])
+            # skip if another request reloaded or replaced it meanwhile
+            if user in self._spilled:
+                self._spilled.discard(user)
+                self._resident[user] = msgs
+                self.touch(user)
+        return self[user]
+
+    def peek(self, user: str) -> List[Dict[str, Any]]:
+        """Return a copy of ``user``'s history without changing residency."""
+        msgs = self._resident.get(user)
+        if msgs is not None:
+            return list(msgs)
+        if user in self._spilled:
+            return self.store.read(self.KIND, user, [])
+        return []
+
+    def version(self, user: str) -> str:
+        """Opaque token that changes whenever ``user``'s history changes."""
+        return f"{self.epoch}-{self._versions.get(user, 0)}"
+
+    def touch(self, user: str) -> None:
+        """Re-measure ``user`` after an in-place change and enforce the cap."""
+        msgs = self._resident.get(user)
+        if msgs is None:
+            return
+        self._versions[user] = next(self._clock)
+        size = _history_size(msgs)
+        self.bytes += size - self._sizes.get(user, 0)
+        self._sizes[user] = size
+        while self.bytes > self.cap_bytes and len(self._resident) > 1:
+            self._spill_oldest()
+
+    def _spill_oldest(self) -> None:
+        user, msgs = self._resident.popitem(last=False)
+        self.bytes -= self._sizes.pop(user, 0)
+        self.store.write(self.KIND, user, msgs)
+        self._spilled.add(user)
+        self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "resident": len(self._resident),
+            "spilled": len(self._spilled),
+            "bytes": self.bytes,
+            "cap_bytes": self.cap_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class DialogStore:
+    """Per-user dialog state, persisted write-behind in batches.
+
+    ``save`` only updates memory; ``flush`` writes every pending user at once
+    and removes the files of finished dialogs. Reads prefer unflushed state
+    and otherwise go to ``store``, so a dialog survives restarts and is seen
+    by other workers once flushed.
+    """
+
+    KIND = "dialog"
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+        self.flushes = 0
+        self.writes = 0
+        self.dropped = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # batch being written by ``flush``, still authoritative for reads
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def load(self, user: str) -> Dict[str, Any]:
+        # ``flush`` may swap the dicts in another thread; read each one once
+        for states in (self._pending, self._flushing):
+            state = states.get(user)
+            if state is not None:
+                return state
+        return self.store.read(self.KIND, user, {})
+
+    def save(self, user: str, state: Dict[str, Any]) -> None:
+        """Queue ``state`` (empty when the dialog is over) for the next flush."""
+        self._pending[user] = state
+
+    def flush(self) -> int:
+        """Write all pending states; safe to run in a worker thread.
+
+        Each user is written on its own: a failed write is retried on the
+        next flush (unless a newer state was saved meanwhile) and re-raised
+        after the rest of the batch, while a key the store rejects outright
+        is dropped so it cannot block later flushes.
+        """
+        # publish the batch as flushing before emptying pending, so a
+        # concurrent load always finds it in one of the two
+        batch = self._flushing = self._pending
+        self._pending = {}
+        written = 0
+        error = None
+        try:
+            for user, state in batch.items():
+                try:
+                    if state:
+                        self.store.write(self.KIND, user, state)
+                    else:
+                        self.store.delete(self.KIND, user)
+                except ValueError:
+                    self.dropped += 1
+                except Exception as exc:
+                    self._pending.setdefault(user, state)
+                    error = error or exc
+                else:
+                    written += 1
+        finally:
+            self._flushing = {}
+        self.flushes += 1
+        self.writes += written
+        if error is not None:
+            raise error
+        return written
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "dropped": self.dropped,
+        }
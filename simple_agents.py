@@ -1,21 +1,40 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
 import inspect
 import json
 import logging
+import os
 import re
+import time
+import weakref
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 if TYPE_CHECKING:  # pragma: no cover - used for linting only
     from food_security import FoodSecurityHandler
+    from semantic_cache import SemanticCache
 
-try:
-    import openai
-except Exception:  # pragma: no cover - openai optional for tests
-    openai = None
-
+from model_router import ModelRouter, Route, detect_intent, needs_tools
 from openai_config import get_async_client, load_api_key
+from structured_log import log_event
 
 
 def _msg_attr(obj: Any, attr: str, default: Any | None = None) -> Any:
@@ -34,10 +53,273 @@ def _msg_to_dict(obj: Any) -> Dict[str, Any]:
     return {}
 
 
-def function_tool(func: Callable) -> Callable:
-    """Decorator to mark a function as an agent tool."""
-    func.is_tool = True
-    return func
+TOOL_EXECUTORS = ("inline", "thread", "process")
+
+
+@dataclass(frozen=True)
+class ToolOptions:
+    """How ``invoke_tool`` runs a tool.
+
+    ``cache_ttl`` enables an LRU of ``cache_size`` results keyed on the bound
+    arguments. ``executor`` runs sync tools on the event loop, in a worker
+    thread or in a shared process pool (the tool and its arguments must then
+    be picklable); a ``timeout`` on an inline sync tool moves it to a thread
+    so it can be abandoned. ``max_concurrency`` caps simultaneous calls.
+
+    A timeout only stops waiting: a thread cannot be interrupted, so it runs
+    to completion and keeps whatever it holds (e.g. an upstream connection)
+    after its ``max_concurrency`` slot has been released. Only successful
+    results are cached, so tools should raise rather than return an error
+    text they do not want repeated.
+    """
+
+    cache_ttl: Optional[float] = None
+    cache_size: int = 128
+    timeout: Optional[float] = None
+    executor: str = "inline"
+    max_concurrency: Optional[int] = None
+
+
+def function_tool(
+    func: Optional[Callable] = None,
+    *,
+    cache_ttl: Optional[float] = None,
+    cache_size: int = 128,
+    timeout: Optional[float] = None,
+    executor: str = "inline",
+    max_concurrency: Optional[int] = None,
+) -> Callable:
+    """Decorator to mark a function as an agent tool.
+
+    Usable bare (``@function_tool``) or with options
+    (``@function_tool(cache_ttl=60, executor="thread")``). The function itself
+    is returned unchanged; the options apply when the Runner calls it.
+    """
+    if executor not in TOOL_EXECUTORS:
+        raise ValueError(f"executor must be one of {TOOL_EXECUTORS}, not {executor!r}")
+    options = ToolOptions(cache_ttl, cache_size, timeout, executor, max_concurrency)
+
+    def mark(f: Callable) -> Callable:
+        f.is_tool = True
+        f.tool_options = options
+        _TOOL_STATE.pop(f.__name__, None)
+        return f
+
+    return mark(func) if func is not None else mark
+
+
+class ToolTimeout(Exception):
+    """A tool did not finish within its ``timeout``."""
+
+
+class _ToolState:
+    """Result cache, concurrency gate and call statistics of one tool."""
+
+    def __init__(self, func: Callable):
+        self.options: ToolOptions = getattr(func, "tool_options", ToolOptions())
+        self.signature = inspect.signature(func)
+        self.cache: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self.calls = 0
+        self.hits = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        # asyncio primitives belong to one loop, so keep a gate per loop
+        self._gates: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def key(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """Hashable form of the bound arguments, or None if not cacheable."""
+        if not self.options.cache_ttl:
+            return None
+        try:
+            bound = self.signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(bound.arguments.items())
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def lookup(self, key: Any) -> Tuple[bool, Any]:
+        entry = self.cache.get(key) if key is not None else None
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        self.cache.move_to_end(key)
+        self.calls += 1
+        self.hits += 1
+        return True, entry[1]
+
+    def store(self, key: Any, value: Any) -> None:
+        if key is None:
+            return
+        self.cache[key] = (time.monotonic() + self.options.cache_ttl, value)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.options.cache_size:
+            self.cache.popitem(last=False)
+
+    def record(self, ms: float, error: bool = False, timeout: bool = False) -> None:
+        self.calls += 1
+        self.errors += error
+        self.timeouts += timeout
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def gate(self) -> Optional[asyncio.Semaphore]:
+        if not self.options.max_concurrency:
+            return None
+        loop = asyncio.get_running_loop()
+        gate = self._gates.get(loop)
+        if gate is None:
+            gate = self._gates[loop] = asyncio.Semaphore(self.options.max_concurrency)
+        return gate
+
+    def stats(self) -> Dict[str, Any]:
+        executed = self.calls - self.hits
+        return {
+            **vars(self.options),
+            "calls": self.calls,
+            "cache_hits": self.hits,
+            "hit_rate": self.hits / self.calls if self.calls else 0.0,
+            "cached": len(self.cache),
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": self.total_ms / executed if executed else 0.0,
+            "max_ms": self.max_ms,
+        }
+
+
+# tool name → cache and stats, created on the first call
+_TOOL_STATE: Dict[str, _ToolState] = {}
+_process_pool: Optional[ProcessPoolExecutor] = None
+# off during warm-up, so replayed messages leave no stats or cached results
+_tool_accounting: "contextvars.ContextVar[bool]" = contextvars.ContextVar(
+    "tool_accounting", default=True
+)
+# worker threads for ``call_tool``; async callers use asyncio.to_thread
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _tool_state(func: Callable) -> _ToolState:
+    state = _TOOL_STATE.get(func.__name__)
+    if state is None:
+        state = _TOOL_STATE[func.__name__] = _ToolState(func)
+    return state
+
+
+def _tool_processes() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        workers = os.getenv("TOOL_PROCESS_WORKERS")
+        _process_pool = ProcessPoolExecutor(int(workers) if workers else None)
+    return _process_pool
+
+
+def _tool_threads() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(thread_name_prefix="tool")
+    return _thread_pool
+
+
+async def _execute(func: Callable, options: ToolOptions, args: Any, kwargs: Any) -> Any:
+    if inspect.iscoroutinefunction(func):
+        call = func(*args, **kwargs)
+    elif options.executor == "process":
+        call = asyncio.get_running_loop().run_in_executor(
+            _tool_processes(), functools.partial(func, *args, **kwargs)
+        )
+    elif options.executor == "thread" or options.timeout:
+        call = asyncio.to_thread(func, *args, **kwargs)
+    else:
+        return func(*args, **kwargs)
+    if options.timeout:
+        return await asyncio.wait_for(call, options.timeout)
+    return await call
+
+
+async def invoke_tool(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call ``func`` as its ``function_tool`` options describe."""
+    state = _tool_state(func)
+    key = state.key(args, kwargs)
+    hit, value = state.lookup(key)
+    if hit:
+        return value
+    gate = state.gate()
+    start = time.perf_counter()
+    try:
+        if gate is None:
+            result = await _execute(func, state.options, args, kwargs)
+        else:
+            async with gate:
+                result = await _execute(func, state.options, args, kwargs)
+    except asyncio.TimeoutError:
+        state.record((time.perf_counter() - start) * 1000, error=True, timeout=True)
+        raise ToolTimeout(
+            f"{func.__name__} timed out after {state.options.timeout:g}s"
+        ) from None
+    except Exception:
+        state.record((time.perf_counter() - start) * 1000, error=True)
+        raise
+    state.record((time.perf_counter() - start) * 1000)
+    state.store(key, result)
+    return result
+
+
+def call_tool(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Synchronous call for the local fallback.
+
+    Applies the cache, ``executor`` and ``timeout`` like :func:`invoke_tool`;
+    ``max_concurrency`` is an asyncio gate and does not apply here.
+    """
+    if not _tool_accounting.get():
+        return func(*args, **kwargs)
+    state = _tool_state(func)
+    key = state.key(args, kwargs)
+    hit, value = state.lookup(key)
+    if hit:
+        return value
+    options = state.options
+    start = time.perf_counter()
+    try:
+        if options.executor == "process":
+            future = _tool_processes().submit(func, *args, **kwargs)
+            result = future.result(options.timeout)
+        elif options.executor == "thread" or options.timeout:
+            future = _tool_threads().submit(func, *args, **kwargs)
+            result = future.result(options.timeout)
+        else:
+            result = func(*args, **kwargs)
+    except FutureTimeout:
+        state.record((time.perf_counter() - start) * 1000, error=True, timeout=True)
+        raise ToolTimeout(
+            f"{func.__name__} timed out after {options.timeout:g}s"
+        ) from None
+    except Exception:
+        state.record((time.perf_counter() - start) * 1000, error=True)
+        raise
+    state.record((time.perf_counter() - start) * 1000)
+    state.store(key, result)
+    return result
+
+
+def clear_tool_cache(name: Optional[str] = None) -> None:
+    """Drop cached results of tool ``name``, or of every tool."""
+    for tool, state in _TOOL_STATE.items():
+        if name is None or tool == name:
+            state.cache.clear()
+
+
+def shutdown_tool_processes() -> None:
+    global _process_pool, _thread_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
 
 
 @dataclass
@@ -57,6 +339,48 @@ class Result:
         self.final_output = final_output
 
 
+@dataclass
+class BatchResult:
+    """One conversation's outcome from ``Runner.run_many``."""
+
+    index: int
+    final_output: Optional[str]
+    error: Optional[str] = None
+    # when the conversation started, counted from the start of the batch,
+    # and how long it ran
+    started_ms: float = 0.0
+    elapsed_ms: float = 0.0
+
+
+_RECALL_PHRASES = (
+    "what did i just say",
+    "what was my last message",
+    "what was my last question",
+    "what did i just ask",
+)
+_GREETINGS = {"hi", "hello"}
+_ANALYZE_RE = re.compile(r"(?:analy[sz]e|analysis(?: of)?)\s+(\w+)")
+_INFO_RE = re.compile(r"(?:info(?:rmation)?(?: about)?|tell me about)\s+(\w+)")
+_NUMBER_RE = re.compile(r"[-+]?\d*\.?\d+")
+_DIGIT_RE = re.compile(r"\d")
+# words that make a message depend on the turns before it
+_FOLLOW_UP_RE = re.compile(
+    r"^\s*(?:and|but|so|what about|how about)\b"
+    r"|\b(?:it|its|that|this|those|these|they|them|their|why|more|else|again"
+    r"|same|above|previous|earlier)\b",
+    re.IGNORECASE,
+)
+
+# intents answered in-process even when OpenAI is configured
+LOCAL_INTENTS = frozenset(
+    name.strip()
+    for name in os.getenv(
+        "LOCAL_INTENTS", "recall,progress,dialog,greeting,help"
+    ).split(",")
+    if name.strip()
+)
+
+
 def _parse_food_security_reply(
     text: str, handler: FoodSecurityHandler
 ) -> Dict[str, Any]:
@@ -65,7 +389,7 @@ def _parse_food_security_reply(
     if not pending:
         return {}
     if pending in {"price_last_month", "price_two_months_ago"}:
-        match = re.search(r"[-+]?\d*\.?\d+", text)
+        match = _NUMBER_RE.search(text)
         if match:
             return {pending: float(match.group())}
     elif pending == "availability_level":
@@ -79,118 +403,355 @@ def _parse_food_security_reply(
     return {}
 
 
-class Runner:
-    @staticmethod
-    async def run(
-        agent: Agent,
-        input: Union[str, List[dict]],
-        history_size: int = 20,
-    ) -> Result:
-        """Chat runner using OpenAI if configured with basic fallback."""
-
-        def _simple_reply(msg: str, hist: List[dict]) -> str:
-            prev_user = ""
-            for m in reversed(hist[:-1]):
-                if m.get("role") == "user":
-                    prev_user = m.get("content", "")
-                    break
-
-            lowered = msg.lower().strip()
-
-            if (
-                any(
-                    phrase in lowered
-                    for phrase in [
-                        "what did i just say",
-                        "what was my last message",
-                        "what was my last question",
-                        "what did i just ask",
-                    ]
+def _simple_reply(agent: Agent, msg: str, hist: List[dict]) -> str:
+    """Deterministic local reply used without OpenAI or for local intents."""
+    prev_user = ""
+    for m in reversed(hist[:-1]):
+        if m.get("role") == "user":
+            prev_user = m.get("content", "")
+            break
+
+    lowered = msg.lower().strip()
+
+    if any(phrase in lowered for phrase in _RECALL_PHRASES) and prev_user:
+        return prev_user
+
+    fs_key = "food_security_handler"
+    if fs_key in agent.state:
+        from food_security import FoodSecurityHandler
+
+        handler: FoodSecurityHandler = agent.state[fs_key]
+        if "summary" in lowered or "progress" in lowered:
+            return handler.summary()
+
+        prompt = handler.collect(**_parse_food_security_reply(lowered, handler))
+        if "analysis:" in prompt.lower():
+            agent.state.pop(fs_key, None)
+        return prompt
+
+    match = _ANALYZE_RE.search(lowered)
+    if match:
+        from food_security import FoodSecurityHandler
+
+        commodity = match.group(1)
+        agent.state[fs_key] = FoodSecurityHandler({"commodity_name": commodity})
+        agent.state["goal"] = f"Analyze food security for {commodity}"
+        return (
+            f"Sure, I can help with a food security analysis. Let's start. "
+            f"What was the price of {commodity} last month?"
+        )
+
+    if "what" in lowered and "goal" in lowered:
+        return agent.state.get("goal", "No specific goal has been set.")
+
+    info_match = _INFO_RE.search(lowered)
+    if info_match:
+        from info_tools import get_information
+
+        topic = info_match.group(1)
+        agent.state["goal"] = f"Get information about {topic}"
+        if "analy" in lowered:
+            info = call_tool(get_information, topic, "kb")
+            return (
+                info
+                + f"\nNow let's analyze {topic}. What was the price last month?"
+            )
+        return call_tool(get_information, topic, "kb")
+
+    for tool in agent.tools:
+        if lowered.startswith(tool.__name__.lower()):
+            remainder = msg[len(tool.__name__) :].strip()
+            parts = remainder.split()
+            sig = inspect.signature(tool)
+            if len(parts) == len(sig.parameters):
+                try:
+                    return str(call_tool(tool, *parts))
+                except Exception as exc:
+                    return f"Error running tool {tool.__name__}: {exc}"
+            if tool.__name__ == "food_security_analyst":
+                from food_security import FoodSecurityHandler
+
+                commodity = parts[0] if parts else ""
+                agent.state[fs_key] = FoodSecurityHandler(
+                    {"commodity_name": commodity} if commodity else {}
+                )
+                first_prompt = agent.state[fs_key].collect(
+                    commodity_name=commodity or None
                 )
-                and prev_user
-            ):
-                return prev_user
+                return (
+                    f"Sure, to analyze {commodity}, could you tell me the price last month?"
+                    if commodity
+                    else first_prompt
+                )
+            return f"Error running tool {tool.__name__}: incorrect arguments"
+
+    if lowered in _GREETINGS:
+        return "Hello! How can I assist you today?"
+    if lowered == "help":
+        return (
+            "Start a food security analysis with 'analyze <commodity>' "
+            "or clear history with 'clear history'."
+        )
+
+    return "I'm not sure how to help with that."
+
+
+def _local_intent(agent: Agent, msg: str, hist: List[dict]) -> Optional[str]:
+    """Name the deterministic intent ``_simple_reply`` would answer, if any.
+
+    Checks follow ``_simple_reply``'s precedence so that, e.g., "hi" during a
+    food security dialog counts as a dialog step rather than a greeting.
+    """
+    lowered = msg.lower().strip()
+    if any(phrase in lowered for phrase in _RECALL_PHRASES) and any(
+        m.get("role") == "user" for m in hist[:-1]
+    ):
+        return "recall"
+    if "food_security_handler" in agent.state:
+        return "progress" if "summary" in lowered or "progress" in lowered else "dialog"
+    if lowered in _GREETINGS:
+        return "greeting"
+    if lowered == "help":
+        return "help"
+    return None
+
+
+def _finishing_inputs(agent: Agent, msg: str) -> Optional[Dict[str, Any]]:
+    """Analyst arguments if ``msg`` answers the dialog's last question.
+
+    That step runs the analysis, which may call OpenAI, so the Runner hands
+    it to the ``food_security_analyst`` tool instead of ``_simple_reply``.
+    """
+    if _local_intent(agent, msg, agent.history) != "dialog":
+        return None
+    handler = agent.state["food_security_handler"]
+    data = {**handler.data, **_parse_food_security_reply(msg.lower().strip(), handler)}
+    if any(key not in data for key in handler.order):
+        return None
+    return {key: data[key] for key in handler.order}
+
+
+async def _finish_dialog(agent: Agent, inputs: Dict[str, Any]) -> str:
+    """Run the analyst with its tool options; keep the dialog if it fails."""
+    from food_security import food_security_analyst
+
+    handler = agent.state["food_security_handler"]
+    handler.data.update(inputs)
+    try:
+        reply = str(await invoke_tool(food_security_analyst, **inputs))
+    except Exception as exc:
+        return f"Error running tool food_security_analyst: {exc}"
+    agent.state.pop("food_security_handler", None)
+    return reply
+
+
+def dump_dialog(agent: Agent) -> Dict[str, Any]:
+    """Compact JSON form of the dialog kept in ``agent.state``; {} if none."""
+    out: Dict[str, Any] = {}
+    if "goal" in agent.state:
+        out["goal"] = agent.state["goal"]
+    handler = agent.state.get("food_security_handler")
+    if handler is not None:
+        out["fs"] = dict(handler.data)
+    return out
+
+
+def restore_dialog(agent: Agent, data: Dict[str, Any]) -> None:
+    """Rebuild ``agent.state`` from :func:`dump_dialog` output."""
+    if "goal" in data:
+        agent.state["goal"] = data["goal"]
+    if "fs" in data:
+        from food_security import FoodSecurityHandler
+
+        agent.state["food_security_handler"] = FoodSecurityHandler(dict(data["fs"]))
+
+
+def _cache_context(agent: Agent, message: str) -> str:
+    """Everything besides the message that shapes an upstream answer.
+
+    A standalone question is keyed on the agent alone, so any user's
+    paraphrase can hit. A follow-up ("why is that so?") also carries a digest
+    of the last exchange it refers to.
+    """
+    tools = ",".join(sorted(t.__name__ for t in agent.tools))
+    context = f"{agent.instructions}|{tools}"
+    if _FOLLOW_UP_RE.search(message):
+        window = json.dumps(
+            [(m.get("role"), m.get("content")) for m in agent.history[-3:-1]],
+            ensure_ascii=False,
+        )
+        context += f"|{zlib.crc32(window.encode())}"
+    return context
+
+
+async def _timed_completion(client: Any, route: Route, **payload: Any) -> Any:
+    """Call the chat completions API for ``route`` and record its latency."""
+    start = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(model=route.model, **payload)
+    except Exception:
+        Runner.router.record(route, (time.perf_counter() - start) * 1000, error=True)
+        raise
+    Runner.router.record(
+        route, (time.perf_counter() - start) * 1000, getattr(response, "usage", None)
+    )
+    return response
 
-            fs_key = "food_security_handler"
-            if fs_key in agent.state:
-                from food_security import FoodSecurityHandler
 
-                handler: FoodSecurityHandler = agent.state[fs_key]
-                if "summary" in lowered or "progress" in lowered:
-                    return handler.summary()
+# tool name → OpenAI schema, built once per tool
+_TOOL_SPECS: Dict[str, Dict[str, Any]] = {}
 
-                prompt = handler.collect(**_parse_food_security_reply(lowered, handler))
-                if "analysis:" in prompt.lower():
-                    agent.state.pop(fs_key, None)
-                return prompt
 
-            match = re.search(r"(?:analy[sz]e|analysis(?: of)?)\s+(\w+)", lowered)
-            if match:
-                from food_security import FoodSecurityHandler
+def _tool_spec(func: Callable) -> Dict[str, Any]:
+    if hasattr(func, "openai_schema"):
+        return func.openai_schema  # type: ignore[return-value]
+    sig = inspect.signature(func)
+    params = {name: {"type": "string"} for name in sig.parameters}
+    return {
+        "type": "function",
+        "function": {
+            "name": func.__name__,
+            "description": func.__doc__ or "",
+            "parameters": {
+                "type": "object",
+                "properties": params,
+                "required": list(params.keys()),
+            },
+        },
+    }
 
-                commodity = match.group(1)
-                agent.state[fs_key] = FoodSecurityHandler({"commodity_name": commodity})
-                agent.state["goal"] = f"Analyze food security for {commodity}"
-                return (
-                    f"Sure, I can help with a food security analysis. Let's start. "
-                    f"What was the price of {commodity} last month?"
-                )
 
-            if "what" in lowered and "goal" in lowered:
-                return agent.state.get("goal", "No specific goal has been set.")
+def tool_specs(tools: List[Callable]) -> List[Dict[str, Any]]:
+    """Return the schemas for ``tools``, registering any not seen before."""
+    for func in tools:
+        if func.__name__ not in _TOOL_SPECS:
+            _TOOL_SPECS[func.__name__] = _tool_spec(func)
+    return [_TOOL_SPECS[func.__name__] for func in tools]
 
-            info_match = re.search(
-                r"(?:info(?:rmation)?(?: about)?|tell me about)\s+(\w+)", lowered
-            )
-            if info_match:
-                from info_tools import get_information
-
-                topic = info_match.group(1)
-                agent.state["goal"] = f"Get information about {topic}"
-                if "analy" in lowered:
-                    info = get_information(topic, "kb")
-                    return (
-                        info
-                        + f"\nNow let's analyze {topic}. What was the price last month?"
+
+class Runner:
+    # opt-in paraphrase cache consulted before calling OpenAI
+    semantic_cache: Optional[SemanticCache] = None
+    # picks the upstream model per request
+    router: ModelRouter = ModelRouter.from_env()
+    # local intents answered without an upstream call, and how often
+    local_intents: frozenset = LOCAL_INTENTS
+    local_hits: Counter = Counter()
+
+    @staticmethod
+    def local_stats() -> Dict[str, Any]:
+        return {
+            "intents": sorted(Runner.local_intents),
+            "upstream_calls_saved": sum(Runner.local_hits.values()),
+            "by_intent": dict(Runner.local_hits),
+        }
+
+    @staticmethod
+    def tool_stats() -> Dict[str, Dict[str, Any]]:
+        """Per-tool call counts, cache hit rates and latencies."""
+        return {name: state.stats() for name, state in _TOOL_STATE.items()}
+
+    @staticmethod
+    def warm_up(agent: Agent, messages: List[str]) -> int:
+        """Replay ``messages`` through the local path on a scratch agent.
+
+        Exercises the same regexes, tool functions and docs reads as local
+        replies without touching ``agent``'s history. Tools are called
+        directly, so ``/admin/tools`` stats and the tool result caches are
+        left alone. Only ``_simple_reply`` is warmed: the semantic cache,
+        routing and request logging in ``Runner.run`` stay cold. Returns the
+        number of replies produced.
+        """
+        scratch = Agent(agent.name, agent.instructions, list(agent.tools))
+        token = _tool_accounting.set(False)
+        try:
+            for message in messages:
+                scratch.history.append({"role": "user", "content": message})
+                _local_intent(scratch, message, scratch.history)
+                reply = _simple_reply(scratch, message, scratch.history)
+                scratch.history.append({"role": "assistant", "content": reply})
+        finally:
+            _tool_accounting.reset(token)
+        return len(messages)
+
+    @staticmethod
+    async def run_many(
+        agent: Agent,
+        conversations: Iterable[Union[str, List[dict]]],
+        concurrency: int = 8,
+        history_size: int = 20,
+        tier: str = "standard",
+    ) -> AsyncIterator[BatchResult]:
+        """Run many independent conversations, yielding results as they finish.
+
+        Each conversation gets a fresh copy of ``agent`` (same instructions and
+        tools, empty history and state), so nothing leaks between them or into
+        ``agent``. At most ``concurrency`` run at once; ``conversations`` is
+        consumed lazily, so it can be a generator over a large saved corpus.
+        Upstream calls share the pooled client but bypass the semantic cache,
+        so conversations ending in the same question get their own answers.
+        ``BatchResult.index`` is the conversation's position in the input.
+        """
+        items = enumerate(conversations)
+        done: "asyncio.Queue[Optional[BatchResult]]" = asyncio.Queue()
+        batch_start = time.perf_counter()
+
+        async def worker() -> None:
+            try:
+                # the iterator is shared; each item is taken by exactly one worker
+                for index, conversation in items:
+                    copy = Agent(
+                        agent.name,
+                        agent.instructions,
+                        list(agent.tools),
+                        logger=agent.logger,
                     )
-                return get_information(topic, "kb")
-
-            for tool in agent.tools:
-                if lowered.startswith(tool.__name__.lower()):
-                    remainder = msg[len(tool.__name__) :].strip()
-                    parts = remainder.split()
-                    sig = inspect.signature(tool)
-                    if len(parts) == len(sig.parameters):
-                        try:
-                            return str(tool(*parts))
-                        except Exception as exc:
-                            return f"Error running tool {tool.__name__}: {exc}"
-                    if tool.__name__ == "food_security_analyst":
-                        from food_security import FoodSecurityHandler
-
-                        commodity = parts[0] if parts else ""
-                        agent.state[fs_key] = FoodSecurityHandler(
-                            {"commodity_name": commodity} if commodity else {}
-                        )
-                        first_prompt = agent.state[fs_key].collect(
-                            commodity_name=commodity or None
-                        )
-                        return (
-                            f"Sure, to analyze {commodity}, could you tell me the price last month?"
-                            if commodity
-                            else first_prompt
+                    start = time.perf_counter()
+                    try:
+                        result = await Runner.run(
+                            copy,
+                            input=conversation,
+                            history_size=history_size,
+                            tier=tier,
+                            semantic_cache=False,
                         )
-                    return f"Error running tool {tool.__name__}: incorrect arguments"
+                        item = BatchResult(index, result.final_output)
+                    except Exception as exc:
+                        item = BatchResult(index, None, str(exc) or type(exc).__name__)
+                    item.started_ms = (start - batch_start) * 1000
+                    item.elapsed_ms = (time.perf_counter() - start) * 1000
+                    done.put_nowait(item)
+            finally:
+                done.put_nowait(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(concurrency, 1))]
+        running = len(workers)
+        try:
+            while running:
+                item = await done.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+            # surface errors raised by ``conversations`` itself
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
-            if lowered in {"hi", "hello"}:
-                return "Hello! How can I assist you today?"
-            if lowered == "help":
-                return (
-                    "Start a food security analysis with 'analyze <commodity>' "
-                    "or clear history with 'clear history'."
-                )
+    @staticmethod
+    async def run(
+        agent: Agent,
+        input: Union[str, List[dict]],
+        history_size: int = 20,
+        tier: str = "standard",
+        semantic_cache: bool = True,
+    ) -> Result:
+        """Chat runner using OpenAI if configured with basic fallback.
 
-            return "I'm not sure how to help with that."
+        ``semantic_cache=False`` neither serves nor stores cached answers.
+        """
 
         if isinstance(input, list):
             incoming = [
@@ -211,54 +772,73 @@ class Runner:
             agent.history.append({"role": "user", "content": message})
             agent.history = agent.history[-history_size:]
 
-        load_api_key()
-        if not openai or not getattr(openai, "api_key", None):
-            reply = _simple_reply(message, agent.history)
+        local = not load_api_key()
+        if not local:
+            intent = _local_intent(agent, message, agent.history)
+            if intent in Runner.local_intents:
+                Runner.local_hits[intent] += 1
+                local = True
+        if local:
+            inputs = _finishing_inputs(agent, message)
+            if inputs is not None:
+                reply = await _finish_dialog(agent, inputs)
+            else:
+                # may call tools synchronously; keep them off the event loop
+                reply = await asyncio.to_thread(
+                    _simple_reply, agent, message, agent.history
+                )
             agent.history.append({"role": "assistant", "content": reply})
             agent.history = agent.history[-history_size:]
             agent.logger.debug("[local] user=%s reply=%s", message, reply)
             return Result(reply)
 
-        messages = [{"role": "system", "content": agent.instructions}] + agent.history
+        cache = Runner.semantic_cache if semantic_cache else None
+        cache_context = None
+        # figures change the answer but barely change the embedding
+        if (
+            cache is not None
+            and "food_security_handler" not in agent.state
+            and not _DIGIT_RE.search(message)
+        ):
+            cache_context = _cache_context(agent, message)
+            cached = cache.lookup(message, cache_context)
+            if cached is not None:
+                agent.history.append({"role": "assistant", "content": cached})
+                agent.history = agent.history[-history_size:]
+                agent.logger.debug("[cache] user=%s reply=%s", message, cached)
+                return Result(cached)
 
-        print("Sending messages to OpenAI:", messages)
-
-        def _tool_spec(func: Callable) -> Dict[str, Any]:
-            if hasattr(func, "openai_schema"):
-                return func.openai_schema  # type: ignore[return-value]
-            sig = inspect.signature(func)
-            params = {name: {"type": "string"} for name in sig.parameters}
-            return {
-                "type": "function",
-                "function": {
-                    "name": func.__name__,
-                    "description": func.__doc__ or "",
-                    "parameters": {
-                        "type": "object",
-                        "properties": params,
-                        "required": list(params.keys()),
-                    },
-                },
-            }
+        messages = [{"role": "system", "content": agent.instructions}] + agent.history
 
         try:
             client = get_async_client()
             if not client:
                 raise RuntimeError("OpenAI client not configured")
 
-            tools_param = [_tool_spec(t) for t in agent.tools] if agent.tools else None
+            # small talk goes out without tools so it can take a cheaper route
+            intent = detect_intent(message)
+            use_tools = bool(agent.tools) and needs_tools(message, intent)
+            tools_param = tool_specs(agent.tools) if use_tools else None
+            route = Runner.router.route(
+                message, intent=intent, needs_tools=use_tools, tier=tier
+            )
 
             payload = {
-                "model": "gpt-3.5-turbo",
                 "messages": messages,
             }
 
             if tools_param:
                 payload["tools"] = tools_param
                 payload["tool_choice"] = "auto"
-            response = await client.chat.completions.create(**payload)
-            await client.close()
-            agent.logger.debug("OpenAI response: %s", response)
+            # the history was sent before; log its size and the new message only
+            log_event(
+                "openai.request",
+                agent=agent.name,
+                model=route.model,
+                messages=len(messages),
+                message=message,
+            )
+            response = await _timed_completion(client, route, **payload)
             try:
                 choice = response.choices[0]
                 msg = _msg_attr(choice, "message")
@@ -266,6 +846,14 @@ class Runner:
                 agent.logger.error("Invalid OpenAI response structure: %s", response)
                 msg = None
             func_call = _msg_attr(msg, "function_call")
+            log_event(
+                "openai.response",
+                agent=agent.name,
+                model=route.model,
+                content=_msg_attr(msg, "content"),
+                function_call=_msg_attr(func_call, "name"),
+                usage=getattr(response, "usage", None),
+            )
             if func_call is not None:
                 name = _msg_attr(func_call, "name")
                 args = json.loads(_msg_attr(func_call, "arguments", "{}"))
@@ -276,7 +864,7 @@ class Runner:
                 result = ""
                 if tool:
                     try:
-                        result = tool(**args)
+                        result = await invoke_tool(tool, **args)
                     except Exception as exc:
                         result = f"Error running tool {name}: {exc}"
                 agent.history.append(
@@ -296,12 +884,12 @@ class Runner:
                 client = get_async_client()
                 if not client:
                     raise RuntimeError("OpenAI client not configured")
-                follow = await client.chat.completions.create(
-                    model="gpt-3.5-turbo",
+                follow = await _timed_completion(
+                    client,
+                    route,
                     messages=[{"role": "system", "content": agent.instructions}]
                     + agent.history,
                 )
-                await client.close()
                 try:
                     follow_choice = follow.choices[0]
                     follow_msg = _msg_attr(follow_choice, "message")
@@ -315,6 +903,9 @@ class Runner:
                 final = _msg_attr(msg, "content", "")
             if final is None or not str(final).strip():
                 final = "I wasn't able to generate a valid response."
+            elif cache_context is not None and func_call is None:
+                # tool output depends on live data, so only plain replies are kept
+                cache.store(message, cache_context, str(final))
             agent.history.append({"role": "assistant", "content": final})
             agent.history = agent.history[-history_size:]
             agent.logger.debug("[openai] user=%s reply=%s", message, final)
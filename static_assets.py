@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import time
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - brotli optional
+    brotli = None
+
+
+_ETAG_SUFFIX = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+class StaticAsset:
+    """A file served from memory with prebuilt gzip/brotli variants.
+
+    The file is read once and only re-read when its mtime changes. The mtime
+    is checked at most every ``check_interval`` seconds so most requests do no
+    disk I/O at all. Each encoding gets its own strong ETag, since the bodies
+    differ byte for byte.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        media_type: str = "text/html; charset=utf-8",
+        max_age: int = 60,
+        check_interval: float = 2.0,
+    ):
+        self.path = Path(path)
+        self.media_type = media_type
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.mtime: Optional[float] = None
+        self.etags: Dict[str, str] = {}
+        self.last_modified = ""
+        self.variants: Dict[str, bytes] = {}
+        self._checked = 0.0
+
+    def _load(self, mtime: float) -> None:
+        raw = self.path.read_bytes()
+        variants = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9)}
+        if brotli:
+            variants["br"] = brotli.compress(raw, quality=11)
+        self.variants = variants
+        digest = hashlib.sha1(raw).hexdigest()
+        self.etags = {enc: f'"{digest}{_ETAG_SUFFIX[enc]}"' for enc in variants}
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.mtime = mtime
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        fresh = now - self._checked < self.check_interval
+        if not force and self.mtime is not None and fresh:
+            return
+        self._checked = now
+        mtime = os.stat(self.path).st_mtime
+        if mtime != self.mtime:
+            self._load(mtime)
+
+    def _encoding(self, accept_encoding: str) -> str:
+        accepted = set()
+        for part in accept_encoding.split(","):
+            name, _, params = part.partition(";")
+            params = params.strip().replace(" ", "")
+            try:
+                q = float(params[2:]) if params.startswith("q=") else 1.0
+            except ValueError:
+                q = 0.0
+            if q > 0:
+                accepted.add(name.strip().lower())
+        for enc in ("br", "gzip"):
+            if enc in self.variants and (enc in accepted or "*" in accepted):
+                return enc
+        return "identity"
+
+    def response(self, headers: Mapping[str, str]) -> Response:
+        """Return the asset, a compressed variant, or ``304 Not Modified``."""
+        self.refresh()
+        enc = self._encoding(headers.get("accept-encoding", ""))
+        common = {
+            "ETag": self.etags[enc],
+            "Last-Modified": self.last_modified,
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            # a tag for any encoding of the current file is still valid
+            if "*" in tags or not tags.isdisjoint(self.etags.values()):
+                return Response(status_code=304, headers=common)
+        elif headers.get("if-modified-since") == self.last_modified:
+            return Response(status_code=304, headers=common)
+
+        if enc != "identity":
+            common["Content-Encoding"] = enc
+        return Response(self.variants[enc], media_type=self.media_type, headers=common)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+# field names whose values are never written
+SENSITIVE_KEYS = frozenset(
+    {"api_key", "authorization", "password", "secret", "token", "access_token"}
+)
+_SECRETS = re.compile(
+    r"(?P<key>sk-[A-Za-z0-9_-]{16,})"
+    r"|(?P<bearer>(?i:bearer)\s+[A-Za-z0-9._~+/=-]+)"
+    r"|(?P<email>[\w.+-]+@[\w-]+\.[\w.-]+)"
+)
+_REPLACEMENTS = {
+    "key": "sk-[redacted]",
+    "bearer": "Bearer [redacted]",
+    "email": "[email]",
+}
+# a secret straddling the cut is still redacted if it is shorter than this
+_REDACT_MARGIN = 256
+_STOP = object()
+
+
+def _redact(match: "re.Match[str]") -> str:
+    return _REPLACEMENTS[match.lastgroup or ""]
+
+
+def parse_rates(spec: str) -> Dict[str, float]:
+    """``"openai.request=0.1,openai.response=0.5"`` → per-event sample rates."""
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class StructuredLogger:
+    """JSON-lines event log written by a background thread.
+
+    ``log`` only decides sampling and enqueues the event with a timestamp, so
+    the caller pays for a dict and a queue put. The writer thread redacts
+    secrets, truncates long strings to ``max_chars``, serializes and writes
+    up to ``batch_size`` events per write. After the first event of a batch
+    it sleeps ``flush_interval`` seconds and then drains the queue, so it
+    wakes up once per batch rather than once per event. When the queue is
+    full, events are dropped and counted rather than blocking the request.
+
+    Values handed to ``log`` are serialized later, so they must not be
+    mutated afterwards.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        sample: Optional[Dict[str, float]] = None,
+        default_rate: float = 1.0,
+        max_chars: int = 200,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+        queue_size: int = 10_000,
+        rng: Optional[random.Random] = None,
+    ):
+        self.stream = stream if stream is not None else sys.stdout
+        self.sample = dict(sample or {})
+        self.default_rate = default_rate
+        self.max_chars = max_chars
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.logged = 0
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.batches = 0
+        self._random = (rng or random.Random()).random
+        self._queue: "queue.Queue[Any]" = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "StructuredLogger":
+        path = os.getenv("LOG_PATH", "-")
+        stream = sys.stdout if path == "-" else open(path, "a", encoding="utf-8")
+        return cls(
+            stream,
+            sample=parse_rates(os.getenv("LOG_SAMPLE", "")),
+            default_rate=float(os.getenv("LOG_SAMPLE_DEFAULT", "1")),
+            max_chars=int(os.getenv("LOG_MAX_CHARS", "200")),
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", "256")),
+            flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "0.2")),
+        )
+
+    # ── producer side ──────────────────────────────────────────
+    def sampled(self, event: str) -> bool:
+        """Whether this occurrence of ``event`` should be logged."""
+        rate = self.sample.get(event, self.default_rate)
+        if rate >= 1.0 or self._random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+    def log(self, event: str, **fields: Any) -> bool:
+        """Queue ``event`` unless it is sampled out or the queue is full."""
+        if not self.sampled(event):
+            return False
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), event, fields))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.logged += 1
+        return True
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="structured-log", daemon=True
+                )
+                self._thread.start()
+
+    # ── writer thread ──────────────────────────────────────────
+    def scrub(self, value: Any, depth: int = 0) -> Any:
+        """JSON-safe copy of ``value`` with secrets redacted and strings cut."""
+        if isinstance(value, str):
+            size = len(value)
+            if self.max_chars and size > self.max_chars:
+                value = _SECRETS.sub(_redact, value[: self.max_chars + _REDACT_MARGIN])
+                return f"{value[: self.max_chars]}…(+{size - self.max_chars} chars)"
+            return _SECRETS.sub(_redact, value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if depth > 6:
+            return "…"
+        if isinstance(value, dict):
+            return {
+                str(k): "[redacted]"
+                if str(k).lower() in SENSITIVE_KEYS
+                else self.scrub(v, depth + 1)
+                for k, v in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [self.scrub(v, depth + 1) for v in value]
+        if hasattr(value, "model_dump"):  # OpenAI / pydantic objects
+            return self.scrub(value.model_dump(), depth + 1)
+        return self.scrub(str(value), depth + 1)
+
+    def _line(self, item: Tuple[float, str, Dict[str, Any]]) -> str:
+        ts, event, fields = item
+        try:
+            record = {"ts": round(ts, 6), "event": event, **self.scrub(fields)}
+            return json.dumps(record, ensure_ascii=False)
+        except Exception as exc:  # never let one bad event stop the writer
+            return json.dumps({"ts": ts, "event": event, "log_error": str(exc)})
+
+    def _write(self, batch: List[Any]) -> None:
+        items = [item for item in batch if item is not _STOP]
+        if items:
+            try:
+                self.stream.write("".join(self._line(i) + "\n" for i in items))
+                self.stream.flush()
+            except Exception:  # pragma: no cover - closed or full stream
+                pass
+            self.written += len(items)
+            self.batches += 1
+        for _ in batch:
+            self._queue.task_done()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is not _STOP and self.flush_interval > 0:
+                time.sleep(self.flush_interval)
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            if batch[-1] is _STOP:
+                return
+
+    def flush(self) -> None:
+        """Block until every queued event has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "logged": self.logged,
+            "written": self.written,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "queued": self._queue.qsize(),
+        }
+
+
+_logger: Optional[StructuredLogger] = None
+LOG_ENABLED = os.getenv("LOG_ENABLED", "1").lower() in {"1", "true", "yes"}
+
+
+def get_logger() -> Optional[StructuredLogger]:
+    """Shared logger configured from ``LOG_*``; None when disabled."""
+    global _logger
+    if _logger is None and LOG_ENABLED:
+        _logger = StructuredLogger.from_env()
+        atexit.register(_logger.close)
+    return _logger
+
+
+def set_logger(logger: Optional[StructuredLogger]) -> None:
+    """Replace the shared logger, e.g. in tests or benchmarks."""
+    global _logger, LOG_ENABLED
+    _logger = logger
+    LOG_ENABLED = logger is not None
+
+
+def log_event(event: str, **fields: Any) -> None:
+    logger = get_logger()
+    if logger is not None:
+        logger.log(event, **fields)
@@ -30,3 +30,167 @@ def test_admin_clear_history():
     resp = client.delete("/admin/history/user1", params=ADMIN_TOKEN)
     assert resp.status_code == 200
     assert conversations["user1"] == []
+    resp = client.delete("/admin/history/.evil", params=ADMIN_TOKEN)
+    assert resp.status_code == 404
+
+
+def test_admin_memory_stats():
+    resp = client.get("/admin/memory", params=ADMIN_TOKEN)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert {"resident", "spilled", "bytes", "cap_bytes"} <= data.keys()
+
+
+def test_frontend_pages_are_cached():
+    resp = client.get("/")
+    assert resp.status_code == 200
+    assert "Cache-Control" in resp.headers
+    resp = client.get("/", headers={"If-None-Match": resp.headers["etag"]})
+    assert resp.status_code == 304
+    assert client.get("/admin").status_code == 200
+
+
+def test_admin_upload_streams_with_checksum(monkeypatch):
+    import hashlib
+
+    body = b"maize prices are rising"
+    resp = client.post(
+        "/admin/docs",
+        params=ADMIN_TOKEN,
+        files={"file": ("upload.txt", body)},
+        data={"sha256": hashlib.sha256(body).hexdigest()},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["size"] == len(body)
+    assert (DOCS_DIR / "upload.txt").read_bytes() == body
+    client.delete("/admin/docs/upload.txt", params=ADMIN_TOKEN)
+
+    monkeypatch.setattr("chatbot_server.UPLOAD_MAX_BYTES", 4)
+    resp = client.post(
+        "/admin/docs/batch",
+        params=ADMIN_TOKEN,
+        files=[("files", ("a.txt", b"ok")), ("files", ("b.txt", body))],
+    )
+    results = resp.json()["files"]
+    assert results[0]["filename"] == "a.txt" and "error" not in results[0]
+    assert "error" in results[1]
+    assert not (DOCS_DIR / "b.txt").exists()
+    client.delete("/admin/docs/a.txt", params=ADMIN_TOKEN)
+
+
+def test_batch_upload_verifies_and_reports_checksums():
+    import hashlib
+
+    good, bad = b"teff", b"sorghum"
+    resp = client.post(
+        "/admin/docs/batch",
+        params=ADMIN_TOKEN,
+        files=[("files", ("c.txt", good)), ("files", ("d.txt", bad))],
+        data={"sha256": [hashlib.sha256(good).hexdigest(), "0" * 64]},
+    )
+    results = resp.json()["files"]
+    assert results[0]["sha256"] == hashlib.sha256(good).hexdigest()
+    assert "checksum" in results[1]["error"]
+    assert not (DOCS_DIR / "d.txt").exists()
+    client.delete("/admin/docs/c.txt", params=ADMIN_TOKEN)
+
+
+def test_oversized_upload_is_refused_before_the_body_is_parsed(monkeypatch):
+    import chatbot_server
+
+    parsed = []
+    monkeypatch.setattr("chatbot_server.UPLOAD_MAX_BYTES", 4)
+    monkeypatch.setattr(
+        chatbot_server, "_store_document", lambda *a: parsed.append(a)
+    )
+    body = b"x" * (chatbot_server.UPLOAD_FORM_OVERHEAD + 1)
+    resp = client.post(
+        "/admin/docs", params=ADMIN_TOKEN, files={"file": ("big.txt", body)}
+    )
+    assert resp.status_code == 413
+
+    # without Content-Length the body is counted while it streams
+    monkeypatch.setattr("chatbot_server.UPLOAD_MAX_REQUEST_BYTES", 1024)
+    resp = client.post(
+        "/admin/docs/batch",
+        params=ADMIN_TOKEN,
+        headers={"content-type": "multipart/form-data; boundary=b"},
+        content=iter([b"x" * 512] * 4),
+    )
+    assert resp.status_code == 413
+    assert parsed == []
+
+
+def test_history_pagination_and_etag():
+    conversations["user2"] = [
+        {"role": "user" if i % 2 else "assistant", "content": f"m{i}", "ts": i}
+        for i in range(1, 8)
+    ]
+    user = {"access_token": "user2-token"}
+
+    resp = client.get("/history", params={**user, "limit": 3})
+    data = resp.json()
+    assert [m["ts"] for m in data["history"]] == [5, 6, 7]
+    assert data["has_more"] is True
+
+    resp = client.get("/history", params={**user, "limit": 3, "before": data["before"]})
+    assert [m["ts"] for m in resp.json()["history"]] == [2, 3, 4]
+
+    resp = client.get("/history", params={**user, "after": 6})
+    assert [m["ts"] for m in resp.json()["history"]] == [7]
+    assert resp.json()["first"] == 1 and resp.json()["after_found"] is True
+
+    etag = resp.headers["etag"]
+    # a cursor the server no longer has (e.g. trimmed) is reported
+    gone = client.get("/history", params={**user, "after": 0}).json()
+    assert gone["after_found"] is False
+    resp = client.get("/history", params={**user, "after": 6}, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    # a different page is never answered from another page's validator
+    resp = client.get("/history", params=user, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert [m["ts"] for m in resp.json()["history"]] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_admin_history_export_ndjson():
+    import json
+
+    conversations["user2"] = [{"role": "user", "content": "hello", "ts": 1}]
+    resp = client.get("/admin/history/export", params=ADMIN_TOKEN)
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert {"username": "user2", "who": "user", "text": "hello", "ts": 1} in rows
+
+
+def test_admin_feed_pushes_usage_and_messages():
+    with client.websocket_connect("/ws/admin?access_token=admin-token") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert "user1" in snapshot["users"]
+
+        client.post("/chat", params={"access_token": "user1-token"}, json={"message": "hi"})
+        events = [ws.receive_json() for _ in range(4)]
+
+    assert events[0]["type"] == "message"
+    assert events[0]["message"]["text"] == "hi"
+    assert events[1]["type"] == "usage"
+    assert events[1]["username"] == "user1"
+    assert events[1]["usage"]["messages"] == snapshot["users"]["user1"]["messages"] + 1
+    assert events[3]["message"]["who"] == "bot"
+
+
+def test_admin_routing_override():
+    resp = client.put("/admin/routing", params=ADMIN_TOKEN, json={"override": "gpt-4o"})
+    assert resp.json()["override"] == "gpt-4o"
+    resp = client.put("/admin/routing", params=ADMIN_TOKEN, json={"override": ""})
+    assert resp.json()["override"] is None
+    resp = client.put("/admin/routing", params=ADMIN_TOKEN, json={"rules": [{"bad": 1}]})
+    assert resp.status_code == 422
+    bad = {"name": "r", "model": "m", "intents": "analysis", "max_latency_ms": -1}
+    resp = client.put("/admin/routing", params=ADMIN_TOKEN, json={"rules": [bad]})
+    assert resp.status_code == 422
+    assert client.get("/admin/routing", params=ADMIN_TOKEN).json()["rules"] == []
+    rule = {"name": "r", "model": "m", "intents": ["analysis"]}
+    resp = client.put("/admin/routing", params=ADMIN_TOKEN, json={"rules": [rule]})
+    assert resp.json()["rules"][0]["intents"] == ["analysis"]
+    client.put("/admin/routing", params=ADMIN_TOKEN, json={"rules": []})
@@ -0,0 +1,90 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import info_tools  # noqa: E402
+from dense_index import DenseIndex, get_dense_index, retrieve  # noqa: E402
+from passage_store import PassageStore  # noqa: E402
+
+DOCS = {
+    "millet": ["Millet tolerates drought and grows on poor soils."],
+    "rice": ["Rice paddies need standing water for most of the season."],
+    "teff": ["Teff flour is used for injera in Ethiopia."],
+}
+
+
+def _kb(kb_dir, docs=DOCS):
+    kb_dir.mkdir(parents=True, exist_ok=True)
+    for topic, chunks in docs.items():
+        (kb_dir / f"{topic}.txt").write_text("\n\n".join(chunks))
+        (kb_dir / f"{topic}.json").write_text(
+            json.dumps({"source": f"{topic}.pdf", "chunks": chunks})
+        )
+    PassageStore.build(kb_dir)
+    DenseIndex.build(kb_dir)
+    return kb_dir
+
+
+def test_dense_search_matches_different_wording(tmp_path):
+    kb = _kb(tmp_path)
+    hits = retrieve(kb, "crops tolerating droughts", k=1)
+    assert hits[0][1] == "millet.pdf"
+    assert retrieve(kb, "flour for injera", k=1)[0][1] == "teff.pdf"
+
+
+def test_batched_search_and_persisted_matrix(tmp_path):
+    kb = _kb(tmp_path)
+    index = get_dense_index(kb)
+    assert index.vectors.dtype == "float32" and index.vectors.shape == (3, 512)
+    results = index.search(["paddies of rice", "injera"], k=2)
+    assert [len(r) for r in results] == [2, 2]
+    assert results[0][0][0] >= results[0][1][0]
+    # reloading maps the saved matrix instead of re-embedding
+    assert (kb / "_dense-1.npy").is_file()
+    assert DenseIndex.load(kb, PassageStore.open(kb)).vectors.shape == (3, 512)
+
+
+def test_ivf_finds_exact_passages(tmp_path):
+    docs = {
+        f"doc{i}": [f"Report {i} on commodity {i * 7919 % 1000} in region {i % 37}."]
+        for i in range(300)
+    }
+    kb = _kb(tmp_path, docs)
+    index = DenseIndex.build(kb, ivf_min_rows=100)
+    assert index.centroids is not None
+    store = PassageStore.open(kb)
+    for i in (0, 17, 256):
+        (score, row), *_ = index.search([docs[f"doc{i}"][0]], k=1)[0]
+        assert store.entry(int(index.entries[row])) == docs[f"doc{i}"][0]
+        assert score > 0.99
+
+
+def test_get_information_dense_and_hybrid(tmp_path, monkeypatch):
+    monkeypatch.setattr(info_tools, "DOCS_DIR", tmp_path)
+    _kb(tmp_path / "kb")
+    assert info_tools.get_information("drought tolerant crops", "dense").startswith(
+        "[millet.pdf] Millet tolerates drought"
+    )
+    assert "[rice.pdf]" in info_tools.get_information("standing water", "hybrid")
+
+
+def test_queries_fall_back_to_keywords_until_index_is_built(tmp_path):
+    kb = _kb(tmp_path)
+    (kb / "rice.json").write_text(
+        json.dumps({"source": "rice.pdf", "chunks": ["Rice needs water."]})
+    )
+    PassageStore.build(kb)
+    assert get_dense_index(kb) is None
+    assert retrieve(kb, "rice water", k=1) == [(1.0, "rice.pdf", "Rice needs water.")]
+    assert not (kb / "_dense-2.npy").exists()
+
+    DenseIndex.build(kb)
+    assert get_dense_index(kb) is not None
+    assert sorted(p.name for p in kb.glob("_*")) == [
+        "_dense-2.npy",
+        "_passages-2.bin",
+        "_passages-2.idx",
+        "_passages.json",
+    ]
@@ -0,0 +1,53 @@
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import chatbot_server  # noqa: E402
+from session_store import DialogStore, SessionStore  # noqa: E402
+from simple_agents import Agent, dump_dialog, restore_dialog  # noqa: E402
+
+client = TestClient(chatbot_server.app)
+
+
+def _say(token, message):
+    resp = client.post("/chat", params={"access_token": token}, json={"message": message})
+    assert resp.status_code == 200
+    return resp.json()["reply"]
+
+
+def test_dialog_survives_other_users_and_restart(tmp_path, monkeypatch):
+    store = SessionStore(tmp_path)
+    monkeypatch.setattr(chatbot_server, "dialogs", DialogStore(store))
+
+    _say("user1-token", "clear history")
+    _say("user2-token", "clear history")
+    assert "price of maize" in _say("user1-token", "analyze maize")
+    assert _say("user2-token", "hello") == "Hello! How can I assist you today?"
+    assert _say("user1-token", "120") == "And what was the price two months ago?"
+
+    # simulate a restart: flush, then serve from a fresh store
+    chatbot_server.dialogs.flush()
+    monkeypatch.setattr(chatbot_server, "dialogs", DialogStore(SessionStore(tmp_path)))
+    assert "availability" in _say("user1-token", "100")
+    assert "Price last month: 120.0" in _say("user1-token", "progress")
+
+    _say("user1-token", "clear history")
+    chatbot_server.dialogs.flush()
+    assert not (tmp_path / "dialog" / "user1.json").exists()
+
+
+def test_dialog_bookkeeping_is_cheap(tmp_path):
+    dialogs = DialogStore(SessionStore(tmp_path))
+    dialogs.save("u", {"fs": {"commodity_name": "maize", "price_last_month": 120.0}})
+    turns = 1000
+    start = time.perf_counter()
+    for _ in range(turns):
+        turn_agent = Agent("bot", "", [])
+        restore_dialog(turn_agent, dialogs.load("u"))
+        dialogs.save("u", dump_dialog(turn_agent))
+    per_turn_ms = (time.perf_counter() - start) * 1000 / turns
+    assert per_turn_ms < 0.5
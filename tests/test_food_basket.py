@@ -0,0 +1,154 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+import food_basket  # noqa: E402
+from food_basket import FoodBasket  # noqa: E402
+from price_history import PriceHistory  # noqa: E402
+
+RECORDS = [
+    ("rice", "Kenya", "2024-01", 100),
+    ("rice", "Kenya", "2024-02", 110),
+    ("maize", "Kenya", "2024-01", 50),
+    ("maize", "Kenya", "2024-02", 40),
+    ("rice", "Chad", "2024-02", 80),
+]
+
+
+@pytest.fixture
+def shared_basket(tmp_path, monkeypatch):
+    history = PriceHistory.from_records(RECORDS)
+    monkeypatch.setattr("food_basket.get_price_history", lambda: history)
+    monkeypatch.setattr("food_basket.BASKET_WEIGHTS_PATH", tmp_path / "weights.json")
+    monkeypatch.setattr("food_basket._basket", None)
+    monkeypatch.setattr("food_basket._overrides", {})
+    monkeypatch.setattr("food_basket._weight_overrides", {})
+    return history
+
+
+def test_weighted_cost_and_change():
+    history = PriceHistory.from_records(RECORDS)
+    basket = FoodBasket.from_history(history, {"kenya": {"rice": 2, "maize": 1}})
+
+    kenya = basket.result("Kenya")
+    assert kenya["month"] == "2024-02"
+    assert kenya["cost"] == 2 * 110 + 40
+    # (2·110 + 40) / (2·100 + 50) − 1
+    assert kenya["change_pct"] == 4.0
+    assert kenya["coverage"] == 1.0
+
+    # no configured basket: equal weights, no previous month to compare
+    chad = basket.result("chad")
+    assert chad["cost"] == 80
+    assert chad["change_pct"] is None
+    assert basket.result("peru") is None
+
+
+def test_stale_prices_are_not_current():
+    history = PriceHistory.from_records(
+        [
+            ("rice", "Kenya", "2020-01", 100),
+            ("maize", "Kenya", "2023-12", 50),
+            ("maize", "Kenya", "2024-01", 60),
+        ]
+    )
+    kenya = FoodBasket.from_history(history, {}).result("kenya")
+    assert kenya["cost"] == 60
+    assert kenya["change_pct"] == 20.0
+    assert kenya["coverage"] == 1.0
+
+    basket = FoodBasket.from_history(history, {"kenya": {"rice": 1, "maize": 1}})
+    assert basket.result("kenya")["coverage"] == 0.5
+
+
+def test_update_price_touches_one_country():
+    history = PriceHistory.from_records(RECORDS)
+    basket = FoodBasket.from_history(history, {"default": {"rice": 1, "beans": 1}})
+    chad_before = basket.result("chad")
+    assert basket.result("kenya")["coverage"] == 0.5
+
+    kenya = basket.update_price("beans", "Kenya", 30)
+    assert kenya["cost"] == 110 + 30
+    assert kenya["coverage"] == 1.0
+    # beans had no price last month, so the change still compares rice only
+    assert kenya["change_pct"] == 10.0
+    assert basket.result("chad") == chad_before
+
+    assert basket.update_price("rice", "Niger", 90)["cost"] == 90
+
+
+def test_10k_countries_vectorized():
+    rng = np.random.default_rng(0)
+    n, k = 10_000, 40
+    last = 100 + rng.random((n, k))
+    prev = 100 + rng.random((n, k))
+    countries = [f"c{i}" for i in range(n)]
+    commodities = [f"k{j}" for j in range(k)]
+
+    start = time.perf_counter()
+    basket = FoodBasket(countries, commodities, last, prev, {})
+    assert time.perf_counter() - start < 1.0
+    assert np.allclose(basket.cost, last.sum(axis=1))
+
+    start = time.perf_counter()
+    for i in range(1000):
+        basket.update_price("k0", f"c{i}", 200)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_shared_basket_reloads_weights_and_keeps_overrides(shared_basket, tmp_path):
+    food_basket.update_price("maize", "kenya", 60)
+    assert food_basket.get_food_basket().result("kenya")["cost"] == 170
+
+    (tmp_path / "weights.json").write_text(json.dumps({"Kenya": {"Rice": 1}}))
+    basket = food_basket.get_food_basket()
+    assert basket.result("kenya")["weights"] == {"rice": 1.0}
+    assert basket.result("kenya")["cost"] == 110
+
+    food_basket.set_weights("kenya", {"maize": 1})
+    assert food_basket.get_food_basket().result("kenya")["cost"] == 60
+
+
+def test_basket_tool_and_admin_api(shared_basket):
+    from fastapi.testclient import TestClient
+
+    from chatbot_server import app
+    from food_security import food_basket_index
+
+    text = food_basket_index("all")
+    assert "Kenya: basket cost 150.00" in text and "Chad" in text
+    assert "No basket prices" in food_basket_index("peru")
+
+    client = TestClient(app)
+    token = {"access_token": "admin-token"}
+    resp = client.get("/admin/basket", params=token)
+    assert [c["country"] for c in resp.json()["countries"]] == ["chad", "kenya"]
+
+    resp = client.put(
+        "/admin/basket/weights/kenya", params=token, json={"rice": 1, "maize": 0}
+    )
+    assert resp.json()["cost"] == 110
+    assert client.put(
+        "/admin/basket/weights/peru", params=token, json={"rice": 1}
+    ).status_code == 404
+
+    resp = client.post(
+        "/admin/basket/prices",
+        params=token,
+        json=[{"commodity": "rice", "country": "chad", "price": 88}],
+    )
+    assert resp.json()["countries"][0]["cost"] == 88
+    for price in ("-1", "NaN", "Infinity"):
+        resp = client.post(
+            "/admin/basket/prices",
+            params=token,
+            content=f'[{{"commodity": "rice", "country": "chad", "price": {price}}}]',
+            headers={"Content-Type": "application/json"},
+        )
+        assert resp.status_code == 422
@@ -30,4 +30,16 @@ def test_handler_collects_and_analyzes():
     assert "country" in step5.lower()
 
     final = handler.collect(country="Kenya")
-    assert "analysis failed:" in final.lower()
+    assert final.startswith("Analysis:")
+    assert "increase of 10.0%" in final
+    assert "risk score" in final
+
+
+def test_local_engine_scores_risk():
+    from analysis_engine import assess, render
+
+    calm = assess("rice", "Kenya", 100, 100, "high")
+    tight = assess("rice", "Kenya", 140, 100, "low")
+    assert calm.band == "stable" and calm.risk_level == "low"
+    assert tight.band == "high" and tight.risk_level == "severe"
+    assert render(tight).count(". ") >= 7
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# cumulative import time allowed for chatbot_server, in milliseconds
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "750"))
+
+# only needed once a request actually uses them
+LAZY_MODULES = ("openai", "httpx", "requests", "numpy")
+
+
+def _import_server() -> subprocess.CompletedProcess:
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    code = (
+        "import sys, chatbot_server; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _cumulative_us(stderr: str, module: str) -> int:
+    for line in stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise AssertionError(f"{module} missing from -X importtime output")
+
+
+def test_heavy_dependencies_are_not_imported_eagerly():
+    proc = _import_server()
+    assert proc.stdout.strip() == ""
+
+
+def test_import_time_within_budget():
+    # best of three to keep scheduler noise out of the measurement
+    best_ms = min(
+        _cumulative_us(_import_server().stderr, "chatbot_server") / 1000
+        for _ in range(3)
+    )
+    assert best_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"importing chatbot_server took {best_ms:.0f} ms "
+        f"(budget {IMPORT_TIME_BUDGET_MS:.0f} ms)"
+    )
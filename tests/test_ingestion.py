@@ -0,0 +1,129 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+from chatbot_server import DOCS_DIR, KB_DIR, app  # noqa: E402
+from info_tools import get_information  # noqa: E402
+from ingestion import (  # noqa: E402
+    IngestError,
+    IngestionPipeline,
+    chunk_text,
+    extract_text,
+    ingest_file,
+    normalize_text,
+    remove_outputs,
+)
+
+client = TestClient(app)
+ADMIN_TOKEN = {"access_token": "admin-token"}
+
+
+def test_extracts_markdown_html_and_csv(tmp_path):
+    md = tmp_path / "notes.md"
+    md.write_text("# Sorghum\n\nGrows in **dry** areas. See [FAO](http://fao.org).")
+    assert normalize_text(extract_text(md)) == (
+        "Sorghum\n\nGrows in dry areas. See FAO."
+    )
+
+    page = tmp_path / "page.html"
+    page.write_text(
+        "<html><head><title>t</title><style>p{}</style></head>"
+        "<body><h1>Teff</h1><p>Staple in Ethiopia &amp; Eritrea.</p>"
+        "<script>var x;</script></body></html>"
+    )
+    assert normalize_text(extract_text(page)) == "Teff\n\nStaple in Ethiopia & Eritrea."
+
+    table = tmp_path / "prices.csv"
+    table.write_text("commodity,price\nmaize,120\nrice,\n")
+    assert extract_text(table) == "commodity: maize; price: 120\ncommodity: rice"
+
+
+def test_pdf_without_pypdf_fails_with_a_clear_error(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pypdf", None)
+    (tmp_path / "report.pdf").write_bytes(b"%PDF-1.4")
+    pipeline = IngestionPipeline(tmp_path / "kb", workers=0)
+    job = pipeline.create_job([tmp_path / "report.pdf"])
+    asyncio.run(pipeline.run(job))
+    assert job.failed == 1
+    assert "requires the 'pypdf' package" in job.errors["report.pdf"]
+
+
+def test_chunks_respect_size_and_overlap():
+    text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(20))
+    chunks = chunk_text(text, max_chars=400, overlap=80)
+    assert len(chunks) > 1
+    assert all(len(c) <= 400 for c in chunks)
+    # every chunk after the first starts with the tail of its predecessor
+    assert chunks[1][:20] in chunks[0]
+
+
+def test_pipeline_uses_worker_processes(tmp_path):
+    for i in range(6):
+        (tmp_path / f"doc{i}.md").write_text(f"# Doc {i}\n\nAbout crop {i}.")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG")
+    seen = []
+    pipeline = IngestionPipeline(
+        tmp_path / "kb", workers=2, on_progress=lambda job: seen.append(job.done)
+    )
+    try:
+        job = pipeline.create_job(sorted(tmp_path.glob("*.*")))
+        asyncio.run(pipeline.run(job))
+    finally:
+        pipeline.shutdown()
+
+    assert job.status == "done"
+    assert (job.done, job.failed) == (6, 1)
+    assert "Unsupported" in job.errors["image.png"]
+    assert len(seen) == 7
+    stored = json.loads((tmp_path / "kb" / "doc3.json").read_text())
+    assert stored == {"source": "doc3.md", "chunks": ["Doc 3\n\nAbout crop 3."]}
+
+
+def test_uploaded_documents_become_searchable():
+    body = b"<h1>Millet</h1><p>Millet tolerates drought.</p>"
+    resp = client.post(
+        "/admin/docs", params=ADMIN_TOKEN, files={"file": ("millet.html", body)}
+    )
+    assert resp.status_code == 200
+    job = client.get(f"/admin/ingest/{resp.json()['job']}", params=ADMIN_TOKEN).json()
+    assert job["status"] == "done" and job["done"] == 1
+    assert get_information("millet", "kb") == "Millet\n\nMillet tolerates drought."
+
+    client.delete("/admin/docs/millet.html", params=ADMIN_TOKEN)
+    assert not (DOCS_DIR / "millet.html").exists()
+    assert not (KB_DIR / "millet.txt").exists()
+    assert "No information" in get_information("millet", "kb")
+
+
+def test_same_topic_from_another_file_is_rejected(tmp_path):
+    body = b"<p>Sorghum grows in dry areas.</p>"
+    resp = client.post(
+        "/admin/docs", params=ADMIN_TOKEN, files={"file": ("sorghum.html", body)}
+    )
+    assert resp.status_code == 200
+    try:
+        resp = client.post(
+            "/admin/docs",
+            params=ADMIN_TOKEN,
+            files={"file": ("sorghum.txt", b"other text")},
+        )
+        assert resp.status_code == 409
+        assert not (DOCS_DIR / "sorghum.txt").exists()
+        # outputs belong to sorghum.html, not to a same-topic name
+        assert not remove_outputs(KB_DIR, "sorghum.txt")
+        assert (KB_DIR / "sorghum.txt").exists()
+
+        (tmp_path / "sorghum.html").write_text("<p>a</p>")
+        (tmp_path / "sorghum.txt").write_text("b")
+        ingest_file(str(tmp_path / "sorghum.html"), str(tmp_path / "kb"))
+        with pytest.raises(IngestError, match="belongs to sorghum.html"):
+            ingest_file(str(tmp_path / "sorghum.txt"), str(tmp_path / "kb"))
+    finally:
+        client.delete("/admin/docs/sorghum.html", params=ADMIN_TOKEN)
+    assert not (KB_DIR / "sorghum.txt").exists()
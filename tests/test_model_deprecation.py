@@ -21,7 +21,7 @@ async def test_runner_uses_updated_model():
     with patch.object(openai, "api_key", "test"):
         with patch("simple_agents.get_async_client", return_value=mock_client):
             agent = Agent(name="T", instructions="test", tools=[])
-            await Runner.run(agent, "hello")
+            await Runner.run(agent, "what is the weather like?")
             assert (
                 mock_client.chat.completions.create.call_args.kwargs["model"]
                 == "gpt-3.5-turbo"
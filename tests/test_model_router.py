@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+from model_router import ModelRouter, RouteRule, detect_intent  # noqa: E402
+
+
+def test_rules_pick_model_by_intent_length_and_tier():
+    router = ModelRouter(
+        [
+            RouteRule("premium", "big-model", tiers=["premium"]),
+            RouteRule("analysis", "mid-model", intents=["analysis"]),
+            RouteRule("short", "small-model", max_chars=20, needs_tools=False),
+        ],
+        default_model="default-model",
+    )
+    assert detect_intent("Please analyze maize") == "analysis"
+    assert router.route("hi", tier="premium").model == "big-model"
+    assert router.route("analyze maize").model == "mid-model"
+    assert router.route("thanks").model == "small-model"
+    assert router.route("thanks", needs_tools=True).model == "default-model"
+
+    router.override = "forced"
+    assert router.route("analyze maize").model == "forced"
+
+
+def test_slow_models_are_skipped_and_stats_recorded():
+    router = ModelRouter(
+        [RouteRule("fast", "model-a", max_latency_ms=500)], default_model="model-b"
+    )
+    route = router.route("hello")
+    assert route.model == "model-a"
+    router.record(route, 2000, {"prompt_tokens": 10, "completion_tokens": 5})
+
+    assert router.route("hello").model == "model-b"
+    stats = router.snapshot()["routes"]["fast"]
+    assert stats["calls"] == 1 and stats["prompt_tokens"] == 10
+
+
+def test_slow_model_latency_expires():
+    now = [0.0]
+    router = ModelRouter(
+        [RouteRule("fast", "model-a", max_latency_ms=500)],
+        default_model="model-b",
+        latency_ttl=30,
+        clock=lambda: now[0],
+    )
+    router.record(router.route("hello"), 2000)
+    assert router.route("hello").model == "model-b"
+
+    now[0] = 31.0
+    route = router.route("hello")
+    assert route.model == "model-a"
+    router.record(route, 100)
+    assert router.latency_ms["model-a"] == 100
+    assert router.route("hello").model == "model-a"
+
+
+def test_chat_turn_routes_small_talk_to_the_cheap_model(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from fastapi.testclient import TestClient
+
+    import chatbot_server
+    from session_store import DialogStore, SessionStore
+    from simple_agents import Runner
+
+    sent = []
+
+    class Completions:
+        async def create(self, model, messages, **kwargs):
+            sent.append((model, "tools" in kwargs))
+            message = SimpleNamespace(content="ok", function_call=None)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    router = ModelRouter(
+        [RouteRule("small-talk", "cheap-model", needs_tools=False)],
+        default_model="tool-model",
+    )
+    monkeypatch.setattr(Runner, "router", router)
+    monkeypatch.setattr(chatbot_server, "dialogs", DialogStore(SessionStore(tmp_path)))
+    monkeypatch.setattr("simple_agents.load_api_key", lambda: "test")
+    monkeypatch.setattr("simple_agents.get_async_client", lambda: client)
+    api = TestClient(chatbot_server.app)
+    for message in ["thanks, that was useful", "what is the price of maize in kenya"]:
+        api.post("/chat", params={"access_token": "user1-token"}, json={"message": message})
+
+    # the server agent always has tools; only the second message needs them
+    assert chatbot_server.agent.tools
+    assert sent == [("cheap-model", False), ("tool-model", True)]
@@ -0,0 +1,73 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import info_tools  # noqa: E402
+from passage_store import PassageStore, get_passage_store  # noqa: E402
+
+
+def _ingested(kb_dir, topic, text, chunks):
+    kb_dir.mkdir(parents=True, exist_ok=True)
+    (kb_dir / f"{topic}.txt").write_text(text, encoding="utf-8")
+    (kb_dir / f"{topic}.json").write_text(
+        json.dumps({"source": f"{topic}.md", "chunks": chunks}), encoding="utf-8"
+    )
+
+
+def test_build_and_slice(tmp_path):
+    _ingested(tmp_path, "teff", "Teff — Ethiopia's staple.", ["Teff", "staple"])
+    _ingested(tmp_path, "millet", "Millet tolerates drought.", ["Millet"])
+    stats = PassageStore.build(tmp_path)
+    assert stats == {"generation": 1, "documents": 2, "entries": 5}
+
+    store = get_passage_store(tmp_path)
+    assert len(store) == 5
+    assert store.document("teff") == "Teff — Ethiopia's staple."
+    assert store.passages("teff") == ["Teff", "staple"]
+    assert store.document("rice") is None
+
+
+def test_rebuild_publishes_new_generation(tmp_path):
+    _ingested(tmp_path, "teff", "old", ["old"])
+    PassageStore.build(tmp_path)
+    first = get_passage_store(tmp_path)
+
+    _ingested(tmp_path, "teff", "new", ["new"])
+    assert PassageStore.build(tmp_path)["generation"] == 2
+    second = get_passage_store(tmp_path)
+    assert second is not first and second.document("teff") == "new"
+    # the earlier map stays readable after its files are replaced
+    assert first.document("teff") == "old"
+    assert sorted(p.name for p in tmp_path.glob("_passages-*")) == [
+        "_passages-2.bin",
+        "_passages-2.idx",
+    ]
+
+
+def test_get_information_reads_from_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(info_tools, "DOCS_DIR", tmp_path)
+    _ingested(tmp_path / "kb", "food_security", "Full text.", ["Full text."])
+    PassageStore.build(tmp_path / "kb")
+    # the per-document file is no longer needed once packed
+    (tmp_path / "kb" / "food_security.txt").unlink()
+    assert info_tools.get_information("Food Security", "kb") == "Full text."
+
+
+def test_concurrent_rebuilds_are_serialized(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    import chatbot_server
+
+    _ingested(tmp_path, "teff", "Teff is a staple.", ["Teff is a staple."])
+    monkeypatch.setattr(chatbot_server, "KB_DIR", tmp_path)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: chatbot_server.rebuild_passages(), range(4)))
+
+    assert sorted(r["generation"] for r in results) == [1, 2, 3, 4]
+    assert PassageStore.open(tmp_path).document("teff") == "Teff is a staple."
+    assert sorted(p.name for p in tmp_path.glob("_passages-*")) == [
+        "_passages-4.bin",
+        "_passages-4.idx",
+    ]
@@ -0,0 +1,61 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+from price_history import PriceHistory  # noqa: E402
+
+
+def test_load_csv_and_metrics(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    csv_path.write_text(
+        "commodity,country,month,price\n"
+        "rice,Kenya,2024-01,100\n"
+        "rice,Kenya,2024-02,100\n"
+        "rice,Kenya,2024-03,110\n"
+        "maize,Kenya,2024-01,50\n"
+        "maize,Kenya,2024-03,40\n"
+    )
+    history = PriceHistory.load(csv_path)
+
+    rice = history.metrics_for("Rice", "kenya")
+    assert rice["month"] == "2024-03"
+    assert rice["pct_change"] == 10.0
+    assert rice["zscore"] > 0
+    assert rice["volatility"] > 0
+
+    maize = history.metrics_for("maize", "Kenya")
+    # the missing February price is carried forward from January
+    assert maize["pct_change"] == -20.0
+    assert history.metrics_for("wheat", "Kenya") is None
+
+
+def test_refresh_10k_series_is_fast():
+    rng = np.random.default_rng(0)
+    prices = 100 + rng.random((10_000, 36)).cumsum(axis=1)
+    prices[rng.random(prices.shape) < 0.05] = np.nan
+    months = [f"{2021 + i // 12}-{i % 12 + 1:02d}" for i in range(36)]
+    series = [(f"c{i}", "x") for i in range(10_000)]
+
+    start = time.perf_counter()
+    history = PriceHistory(series, months, prices)
+    assert time.perf_counter() - start < 1.0
+    assert history.metrics["pct_change"].shape == (10_000,)
+
+
+def test_handler_reads_precomputed_metrics(tmp_path, monkeypatch):
+    from food_security import FoodSecurityHandler
+
+    csv_path = tmp_path / "prices.csv"
+    csv_path.write_text(
+        "commodity,country,month,price\n"
+        "rice,Kenya,2024-01,100\n"
+        "rice,Kenya,2024-02,120\n"
+    )
+    history = PriceHistory.load(csv_path)
+    monkeypatch.setattr("food_security.get_price_history", lambda: history)
+    handler = FoodSecurityHandler({"commodity_name": "rice", "country": "Kenya"})
+    assert handler.history_metrics()["pct_change"] == 20.0
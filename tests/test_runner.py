@@ -53,3 +53,222 @@ async def test_food_security_progress_summary():
     await Runner.run(local_agent, input="analyze wheat")
     summary = await Runner.run(local_agent, input="summary")
     assert "commodity name: wheat" in summary.final_output.lower()
+
+
+@pytest.mark.asyncio
+async def test_dialog_analysis_runs_through_the_analyst_tool(monkeypatch):
+    import threading
+
+    from food_security import FoodSecurityHandler
+
+    threads = []
+
+    def analysis(self, cached=True):
+        threads.append(threading.current_thread())
+        return "Analysis: ok"
+
+    monkeypatch.setattr(FoodSecurityHandler, "_analysis", analysis)
+    monkeypatch.setattr("simple_agents.load_api_key", lambda: "test")
+    dialog_agent = Agent(name="T", instructions="Test agent", tools=[food_security_analyst])
+    before = Runner.tool_stats().get("food_security_analyst", {}).get("calls", 0)
+    dialog_agent.state["food_security_handler"] = FoodSecurityHandler(
+        {"commodity_name": "teff"}
+    )
+    for step in ["120", "100", "low"]:
+        result = await Runner.run(dialog_agent, input=step)
+        assert threads == []
+    result = await Runner.run(dialog_agent, input="kenya")
+
+    assert result.final_output == "Analysis: ok"
+    # off the event loop, with the tool's timeout and concurrency limit
+    assert threads and threads[0] is not threading.main_thread()
+    assert Runner.tool_stats()["food_security_analyst"]["calls"] == before + 1
+    assert "food_security_handler" not in dialog_agent.state
+
+
+@pytest.mark.asyncio
+async def test_local_intents_skip_upstream_when_key_set():
+    from unittest.mock import patch
+
+    import openai as openai_mod
+
+    from simple_agents import Runner as R
+
+    local_agent = Agent(name="T", instructions="Test agent", tools=[])
+    saved = R.local_hits["greeting"]
+    with patch.object(openai_mod, "api_key", "test"), patch(
+        "simple_agents.get_async_client", side_effect=AssertionError("upstream")
+    ):
+        result = await R.run(local_agent, input="hi")
+    assert result.final_output == "Hello! How can I assist you today?"
+    assert R.local_hits["greeting"] == saved + 1
+
+
+@pytest.mark.asyncio
+async def test_function_call_goes_through_tool_options():
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    import openai as openai_mod
+
+    from simple_agents import function_tool
+
+    seen = []
+
+    @function_tool(cache_ttl=60)
+    def echo_tool(text: str) -> str:
+        seen.append(text)
+        return text.upper()
+
+    def reply(**message):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(**message))], usage=None
+        )
+
+    class Completions:
+        async def create(self, model, messages, **kwargs):
+            if messages[-1]["role"] == "function":
+                return reply(content=messages[-1]["content"], function_call=None)
+            call = SimpleNamespace(name="echo_tool", arguments='{"text": "hi"}')
+            return reply(content=None, function_call=call)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    tool_agent = Agent(name="T", instructions="Test agent", tools=[echo_tool])
+    with patch.object(openai_mod, "api_key", "test"), patch(
+        "simple_agents.get_async_client", return_value=client
+    ):
+        first = await Runner.run(tool_agent, input="please shout hi")
+        second = await Runner.run(tool_agent, input="please shout hi again")
+    assert first.final_output == second.final_output == "HI"
+    assert seen == ["hi"]
+    assert Runner.tool_stats()["echo_tool"]["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_local_tool_call_does_not_block_the_event_loop():
+    import asyncio
+    import threading
+
+    from simple_agents import function_tool
+
+    released = threading.Event()
+
+    @function_tool(timeout=5)
+    def wait_tool(text: str) -> str:
+        # only set if the loop keeps running while the tool waits
+        return "released" if released.wait(2) else "blocked"
+
+    async def release():
+        await asyncio.sleep(0.05)
+        released.set()
+
+    tool_agent = Agent(name="T", instructions="Test agent", tools=[wait_tool])
+    result, _ = await asyncio.gather(
+        Runner.run(tool_agent, input="wait_tool now"), release()
+    )
+    assert result.final_output == "released"
+
+
+@pytest.mark.asyncio
+async def test_run_many_local_isolated():
+    template = Agent(name="T", instructions="Test agent", tools=[food_security_analyst])
+    conversations = [f"analyze crop{i}" for i in range(10)] + [
+        [{"role": "user", "content": "hello"}, {"role": "user", "content": "summary"}]
+    ]
+    results = [r async for r in Runner.run_many(template, conversations, concurrency=3)]
+
+    assert sorted(r.index for r in results) == list(range(11))
+    by_index = {r.index: r for r in results}
+    assert "price of crop7 last month" in by_index[7].final_output
+    # the "summary" conversation never saw another conversation's dialog
+    assert "commodity name" not in by_index[10].final_output.lower()
+    assert template.history == [] and template.state == {}
+    assert all(r.error is None and r.elapsed_ms >= 0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_many_bounded_and_in_completion_order():
+    import asyncio
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    import openai as openai_mod
+
+    active, peak = [0], [0]
+
+    class Completions:
+        async def create(self, model, messages, **kwargs):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            delay = float(messages[-1]["content"].split()[-1])
+            await asyncio.sleep(delay)
+            active[0] -= 1
+            message = SimpleNamespace(content=f"done {delay}", function_call=None)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    template = Agent(name="T", instructions="Test agent", tools=[])
+    delays = [0.08, 0.01, 0.05, 0.02, 0.03, 0.01]
+    conversations = (f"please wait for {d}" for d in delays)
+    with patch.object(openai_mod, "api_key", "test"), patch(
+        "simple_agents.get_async_client", return_value=client
+    ):
+        results = [
+            r async for r in Runner.run_many(template, conversations, concurrency=3)
+        ]
+
+    assert peak[0] == 3
+    order = [r.index for r in results]
+    # yielded as they finish: the 0.01s call first, the 0.08s one last
+    assert order[0] == 1 and order[-1] == 0
+    assert results[0].final_output == f"done {delays[results[0].index]}"
+    slow = next(r for r in results if r.index == 0)
+    assert slow.elapsed_ms >= 70
+    # the sixth conversation had to wait for a free slot
+    assert next(r for r in results if r.index == 5).started_ms > 0
+
+
+@pytest.mark.asyncio
+async def test_run_many_bypasses_semantic_cache():
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    import openai as openai_mod
+
+    from semantic_cache import SemanticCache
+
+    calls = []
+
+    class Completions:
+        async def create(self, model, messages, **kwargs):
+            calls.append(len(messages))
+            message = SimpleNamespace(content=f"answer {len(calls)}", function_call=None)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    cache = SemanticCache()
+    template = Agent(name="T", instructions="Test agent", tools=[])
+    with patch.object(openai_mod, "api_key", "test"), patch(
+        "simple_agents.get_async_client", return_value=client
+    ), patch.object(Runner, "semantic_cache", cache):
+        await Runner.run(Agent("T", "Test agent", []), "tell me about rice")
+        conversations = ["tell me about rice", "tell me about rice"]
+        results = [r async for r in Runner.run_many(template, conversations)]
+
+    assert len(calls) == 3
+    assert sorted(r.final_output for r in results) == ["answer 2", "answer 3"]
+    assert cache.stats()["hits"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_many_reports_input_errors():
+    def broken():
+        yield "hello"
+        raise ValueError("bad corpus")
+
+    template = Agent(name="T", instructions="Test agent", tools=[])
+    seen = []
+    with pytest.raises(ValueError, match="bad corpus"):
+        async for result in Runner.run_many(template, broken(), concurrency=2):
+            seen.append(result.final_output)
+    assert seen == ["Hello! How can I assist you today?"]
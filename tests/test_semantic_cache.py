@@ -0,0 +1,131 @@
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import openai
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import pytest  # noqa: E402
+
+from semantic_cache import SemanticCache  # noqa: E402
+from simple_agents import Agent, Runner  # noqa: E402
+
+
+def test_paraphrase_hits_and_other_topic_misses():
+    cache = SemanticCache()
+    cache.store("Tell me about rice", "ctx", "Rice is a staple.")
+    assert cache.lookup("info about rice?", "ctx") == "Rice is a staple."
+    assert cache.lookup("tell me about maize", "ctx") is None
+    assert cache.lookup("info about rice", "other context") is None
+
+
+def test_numbers_entities_and_short_messages_must_match():
+    cache = SemanticCache(entities=["kenya", "uganda"])
+    cache.store("maize prices in kenya in 2023", "ctx", "2023 answer")
+    assert cache.lookup("maize prices in kenya in 2024", "ctx") is None
+    assert cache.lookup("maize prices in uganda in 2023", "ctx") is None
+    assert cache.lookup("Maize prices in kenya in 2023?", "ctx") == "2023 answer"
+
+    cache.store("analyze maize 100 120 low kenya", "ctx", "100/120")
+    assert cache.lookup("analyze maize 150 120 low kenya", "ctx") is None
+
+    cache.store("why?", "ctx", "because")
+    assert cache.lookup("why?", "ctx") is None
+
+
+def test_ttl_and_docs_invalidation(tmp_path):
+    cache = SemanticCache(ttl=0.01, docs_dir=tmp_path, check_interval=0)
+    cache.store("rice", "ctx", "old")
+    time.sleep(0.02)
+    assert cache.lookup("rice", "ctx") is None
+
+    cache = SemanticCache(docs_dir=tmp_path, check_interval=0)
+    cache.lookup("warm up", "ctx")
+    cache.store("rice", "ctx", "old")
+    (tmp_path / "rice.txt").write_text("new facts")
+    assert cache.lookup("rice", "ctx") is None
+
+
+@pytest.mark.asyncio
+async def test_runner_serves_paraphrase_from_cache():
+    mock_client = Mock()
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=Mock(choices=[Mock(message={"content": "Rice is a staple."})])
+    )
+    mock_client.close = AsyncMock()
+    with patch.object(openai, "api_key", "test"), patch.object(
+        Runner, "semantic_cache", SemanticCache()
+    ), patch("simple_agents.get_async_client", return_value=mock_client):
+        first = await Runner.run(Agent("T", "test", []), "tell me about rice")
+        second = await Runner.run(Agent("T", "test", []), "info about rice")
+
+    assert first.final_output == second.final_output == "Rice is a staple."
+    assert mock_client.chat.completions.create.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_runner_keys_follow_ups_on_last_exchange_and_skips_figures():
+    mock_client = Mock()
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=Mock(choices=[Mock(message={"content": "Because."})])
+    )
+    mock_client.close = AsyncMock()
+    rice = [
+        {"role": "user", "content": "tell me about rice"},
+        {"role": "assistant", "content": "Rice is a staple."},
+    ]
+    maize = [
+        {"role": "user", "content": "tell me about maize"},
+        {"role": "assistant", "content": "Maize is a cereal."},
+    ]
+    follow_up = {"role": "user", "content": "why is that so"}
+    with patch.object(openai, "api_key", "test"), patch.object(
+        Runner, "semantic_cache", SemanticCache()
+    ), patch("simple_agents.get_async_client", return_value=mock_client):
+        calls = mock_client.chat.completions.create
+        await Runner.run(Agent("T", "test", []), [*rice, follow_up])
+        await Runner.run(Agent("T", "test", []), [*maize, follow_up])
+        assert calls.call_count == 2
+        # same last exchange, older turns differ: still a hit
+        await Runner.run(Agent("T", "test", []), [*maize, *rice, follow_up])
+        assert calls.call_count == 2
+
+        # a standalone question hits whatever came before it
+        sorghum = {"role": "user", "content": "tell me about sorghum"}
+        await Runner.run(Agent("T", "test", []), [*rice, *maize, sorghum])
+        await Runner.run(Agent("T", "test", []), "info about sorghum")
+        assert calls.call_count == 3
+
+        for _ in range(2):
+            await Runner.run(Agent("T", "test", []), "maize in 2024")
+        assert calls.call_count == 5
+
+
+def test_server_serves_another_users_paraphrase(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import chatbot_server
+    from session_store import DialogStore, SessionStore
+
+    mock_client = Mock()
+    mock_client.chat.completions.create = AsyncMock(
+        return_value=Mock(choices=[Mock(message={"content": "Teff is a grain."})])
+    )
+    mock_client.close = AsyncMock()
+    monkeypatch.setattr(chatbot_server, "dialogs", DialogStore(SessionStore(tmp_path)))
+    monkeypatch.setattr(Runner, "semantic_cache", SemanticCache())
+    monkeypatch.setattr("simple_agents.load_api_key", lambda: "test")
+    monkeypatch.setattr("simple_agents.get_async_client", lambda: mock_client)
+    client = TestClient(chatbot_server.app)
+
+    def say(token, message):
+        params = {"access_token": token}
+        return client.post("/chat", params=params, json={"message": message}).json()["reply"]
+
+    say("user1-token", "tell me about millet")
+    assert say("user1-token", "tell me about teff") == "Teff is a grain."
+    assert say("user2-token", "info about teff?") == "Teff is a grain."
+    assert mock_client.chat.completions.create.call_count == 2
+    assert Runner.semantic_cache.stats()["hits"] == 1
@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+from session_store import ConversationStore, DialogStore, SessionStore  # noqa: E402
+
+
+def _msgs(text):
+    return [{"role": "user", "content": text, "ts": 0}]
+
+
+def test_idle_users_spill_and_reload(tmp_path):
+    store = SessionStore(tmp_path)
+    convs = ConversationStore(store, cap_bytes=1000)
+    convs["a"] = _msgs("x" * 600)
+    convs["b"] = _msgs("y" * 600)
+
+    assert convs.stats()["resident"] == 1
+    assert convs.stats()["spilled"] == 1
+    assert (tmp_path / "history" / "a.json").is_file()
+    assert "a" in convs
+
+    assert convs["a"][0]["content"] == "x" * 600
+    assert convs.stats()["spilled"] == 1
+    # kept until the next spill overwrites it, in case the process dies first
+    assert (tmp_path / "history" / "a.json").is_file()
+    crashed = ConversationStore(SessionStore(tmp_path), cap_bytes=1000)
+    assert crashed.get("a")[0]["content"] == "x" * 600
+
+    del convs["a"]
+    assert not (tmp_path / "history" / "a.json").exists()
+
+
+def test_spilled_users_survive_restart(tmp_path):
+    store = SessionStore(tmp_path)
+    convs = ConversationStore(store, cap_bytes=500)
+    convs["a"] = _msgs("x" * 400)
+    convs["b"] = _msgs("y" * 400)
+
+    reloaded = ConversationStore(SessionStore(tmp_path), cap_bytes=500)
+    assert reloaded.get("a")[0]["content"] == "x" * 400
+    assert reloaded.get("missing") is None
+
+
+def test_async_load_reads_spilled_history(tmp_path, monkeypatch):
+    import asyncio
+    import threading
+
+    store = SessionStore(tmp_path)
+    convs = ConversationStore(store, cap_bytes=500)
+    convs["a"] = _msgs("x" * 400)
+    convs["b"] = _msgs("y" * 400)
+
+    threads = []
+    read = store.read
+    monkeypatch.setattr(
+        store,
+        "read",
+        lambda *a: threads.append(threading.current_thread()) or read(*a),
+    )
+    msgs = asyncio.run(convs.load("a"))
+    assert msgs[0]["content"] == "x" * 400 and convs.stats()["spilled"] == 1
+    assert threads and threads[0] is not threading.main_thread()
+    assert asyncio.run(convs.load("new")) == []
+
+
+def test_dialogs_are_written_in_batches(tmp_path):
+    store = SessionStore(tmp_path)
+    dialogs = DialogStore(store)
+    dialogs.save("a", {"fs": {"commodity_name": "maize"}})
+    dialogs.save("a", {"fs": {"commodity_name": "maize", "price_last_month": 120.0}})
+    dialogs.save("b", {"goal": "Get information about rice"})
+
+    assert not (tmp_path / "dialog").exists()
+    assert dialogs.load("a")["fs"]["price_last_month"] == 120.0
+    assert dialogs.flush() == 2
+
+    # a new store, e.g. after a restart, resumes from disk
+    resumed = DialogStore(SessionStore(tmp_path))
+    assert resumed.load("a") == {
+        "fs": {"commodity_name": "maize", "price_last_month": 120.0}
+    }
+
+    dialogs.save("a", {})
+    dialogs.flush()
+    assert not (tmp_path / "dialog" / "a.json").exists()
+    assert resumed.load("a") == {}
+
+
+def test_bad_key_does_not_block_flush(tmp_path):
+    dialogs = DialogStore(SessionStore(tmp_path))
+    dialogs.save(".evil", {})
+    dialogs.save("a", {"goal": "rice"})
+    assert dialogs.flush() == 1
+    assert dialogs.stats()["dropped"] == 1 and dialogs.pending == 0
+    assert DialogStore(SessionStore(tmp_path)).load("a") == {"goal": "rice"}
@@ -0,0 +1,51 @@
+import gzip
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+from static_assets import StaticAsset  # noqa: E402
+
+
+def test_etag_and_not_modified(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("<h1>hi</h1>")
+    asset = StaticAsset(page)
+
+    resp = asset.response({"accept-encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(resp.body) == b"<h1>hi</h1>"
+
+    etag = resp.headers["etag"]
+    resp = asset.response({"if-none-match": etag})
+    assert resp.status_code == 304
+    assert resp.body == b""
+
+
+def test_each_encoding_has_its_own_etag(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("<h1>hi</h1>")
+    asset = StaticAsset(page)
+
+    encodings = ["identity", "gzip"] + (["br"] if "br" in asset.variants else [])
+    tags = [asset.response({"accept-encoding": e}).headers["etag"] for e in encodings]
+    assert len(set(tags)) == len(tags)
+    assert all(t.startswith('"') and t.endswith('"') for t in tags)
+
+    # revalidating gets the tag of the encoding it negotiates
+    resp = asset.response({"if-none-match": tags[0], "accept-encoding": "gzip"})
+    assert resp.status_code == 304 and resp.headers["etag"] == tags[1]
+    assert asset.response({"if-none-match": '"other"'}).status_code == 200
+
+
+def test_reloads_when_mtime_changes(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text("old")
+    asset = StaticAsset(page, check_interval=0)
+    assert asset.response({}).body == b"old"
+
+    page.write_text("new")
+    os.utime(page, (1, 1))
+    assert asset.response({"accept-encoding": "identity"}).body == b"new"
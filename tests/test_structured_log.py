@@ -0,0 +1,113 @@
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import pytest  # noqa: E402
+
+from structured_log import StructuredLogger, parse_rates  # noqa: E402
+
+
+def lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_redacts_and_truncates():
+    out = io.StringIO()
+    logger = StructuredLogger(out, max_chars=40, flush_interval=0)
+    logger.log(
+        "openai.request",
+        api_key="sk-live",
+        headers={"Authorization": "Bearer abc"},
+        message="mail me at jane@example.org, key sk-abcdefghijklmnopqrstuvwxyz",
+        history=["x" * 100, 3, None],
+    )
+    logger.close()
+
+    (record,) = lines(out)
+    assert record["event"] == "openai.request" and record["ts"] > 0
+    assert record["api_key"] == "[redacted]"
+    assert record["headers"]["Authorization"] == "[redacted]"
+    assert "jane@" not in record["message"] and "[email]" in record["message"]
+    assert "abcdefghij" not in record["message"]
+    assert record["history"][0] == "x" * 40 + "…(+60 chars)"
+    assert record["history"][1:] == [3, None]
+
+
+def test_sampling_per_event():
+    assert parse_rates("a=0.25, b = 0 ,bad") == {"a": 0.25, "b": 0.0}
+    out = io.StringIO()
+    logger = StructuredLogger(
+        out, sample={"noisy": 0.1, "off": 0.0}, rng=random.Random(1), flush_interval=0
+    )
+    for _ in range(1000):
+        logger.log("noisy")
+        logger.log("off")
+        logger.log("always")
+    logger.flush()
+    stats = logger.stats()
+    assert 50 < stats["logged"] - 1000 < 150
+    assert stats["sampled_out"] == 3000 - stats["logged"]
+    logger.close()
+    assert sum(r["event"] == "always" for r in lines(out)) == 1000
+
+
+def test_writes_in_batches_off_the_caller():
+    class SlowStream(io.StringIO):
+        writes = 0
+
+        def write(self, data):
+            SlowStream.writes += 1
+            time.sleep(0.05)
+            return super().write(data)
+
+    out = SlowStream()
+    logger = StructuredLogger(out, batch_size=100, flush_interval=0.02)
+    start = time.perf_counter()
+    for i in range(500):
+        logger.log("turn", i=i)
+    assert time.perf_counter() - start < 0.05
+    logger.close()
+    assert [r["i"] for r in lines(out)] == list(range(500))
+    assert SlowStream.writes <= 10
+
+
+def test_full_queue_drops_instead_of_blocking():
+    logger = StructuredLogger(io.StringIO(), queue_size=5, flush_interval=0.2)
+    for _ in range(50):
+        logger.log("burst")
+    assert logger.stats()["dropped"] >= 40
+    logger.close()
+
+
+@pytest.mark.asyncio
+async def test_runner_logs_events_instead_of_printing(capsys, monkeypatch):
+    from types import SimpleNamespace
+
+    from simple_agents import Agent, Runner
+
+    class Completions:
+        async def create(self, model, messages, **kwargs):
+            message = SimpleNamespace(content="Hi there", function_call=None)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    monkeypatch.setattr("simple_agents.load_api_key", lambda: "test")
+    monkeypatch.setattr("simple_agents.get_async_client", lambda: client)
+    out = io.StringIO()
+    logger = StructuredLogger(out, flush_interval=0)
+    monkeypatch.setattr("structured_log._logger", logger)
+    monkeypatch.setattr("structured_log.LOG_ENABLED", True)
+    agent = Agent(name="T", instructions="Test agent", tools=[])
+    await Runner.run(agent, input="tell me a story about rice")
+    logger.close()
+
+    assert "Sending messages" not in capsys.readouterr().out
+    request, response = lines(out)
+    assert request["event"] == "openai.request" and request["messages"] == 2
+    assert request["message"] == "tell me a story about rice"
+    assert response["event"] == "openai.response" and response["content"] == "Hi there"
@@ -0,0 +1,140 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import pytest  # noqa: E402
+
+from simple_agents import (  # noqa: E402
+    Runner,
+    ToolTimeout,
+    call_tool,
+    clear_tool_cache,
+    function_tool,
+    invoke_tool,
+    shutdown_tool_processes,
+)
+
+calls = []
+
+
+@function_tool(cache_ttl=60, cache_size=2)
+def lookup(topic: str, source: str = "kb") -> str:
+    calls.append(topic)
+    return f"{topic}/{source}"
+
+
+@function_tool(timeout=0.05)
+def stuck() -> str:
+    time.sleep(0.3)
+    return "late"
+
+
+@function_tool(executor="process")
+def square(x: int) -> int:
+    return x * x
+
+
+def test_bare_decorator_keeps_function():
+    @function_tool
+    def plain(a: str) -> str:
+        return a
+
+    assert plain.is_tool and plain("x") == "x"
+    assert plain.tool_options.executor == "inline"
+    with pytest.raises(ValueError):
+        function_tool(executor="gpu")
+
+
+@pytest.mark.asyncio
+async def test_cache_is_keyed_on_bound_arguments():
+    calls.clear()
+    clear_tool_cache("lookup")
+    assert await invoke_tool(lookup, "rice") == "rice/kb"
+    assert await invoke_tool(lookup, topic="rice", source="kb") == "rice/kb"
+    assert call_tool(lookup, "rice", "kb") == "rice/kb"
+    assert calls == ["rice"]
+
+    # LRU of two entries
+    await invoke_tool(lookup, "maize")
+    await invoke_tool(lookup, "wheat")
+    await invoke_tool(lookup, "rice")
+    assert calls == ["rice", "maize", "wheat", "rice"]
+
+    stats = Runner.tool_stats()["lookup"]
+    assert stats["cache_hits"] == 2
+    assert stats["hit_rate"] == pytest.approx(2 / 6)
+    assert stats["cached"] == 2
+
+
+@pytest.mark.asyncio
+async def test_timeout_is_reported():
+    with pytest.raises(ToolTimeout, match="stuck timed out after 0.05s"):
+        await invoke_tool(stuck)
+    stats = Runner.tool_stats()["stuck"]
+    assert stats["timeouts"] == 1 and stats["errors"] == 1
+
+
+def test_local_path_honors_timeout_and_executor():
+    with pytest.raises(ToolTimeout, match="stuck timed out"):
+        call_tool(stuck)
+
+    @function_tool(executor="thread")
+    def where() -> str:
+        return threading.current_thread().name
+
+    assert call_tool(where).startswith("tool")
+
+
+@pytest.mark.asyncio
+async def test_failed_internet_search_is_not_cached(monkeypatch):
+    from types import SimpleNamespace
+
+    import requests
+
+    from info_tools import SearchFailed, get_information
+
+    clear_tool_cache("get_information")
+    responses = [
+        SimpleNamespace(ok=False, status_code=503),
+        SimpleNamespace(ok=True, json=lambda: {"Abstract": "Teff is a grain."}),
+    ]
+    monkeypatch.setattr(requests, "get", lambda *a, **k: responses.pop(0))
+    with pytest.raises(SearchFailed, match="status 503"):
+        await invoke_tool(get_information, "teff", "internet")
+    assert await invoke_tool(get_information, "teff", "internet") == "Teff is a grain."
+    assert await invoke_tool(get_information, "teff", "internet") == "Teff is a grain."
+    assert responses == []
+    clear_tool_cache("get_information")
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_caps_threads():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    @function_tool(executor="thread", max_concurrency=2)
+    def busy(i: int) -> int:
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return i
+
+    results = await asyncio.gather(*(invoke_tool(busy, i) for i in range(6)))
+    assert results == list(range(6))
+    assert peak[0] == 2
+    assert Runner.tool_stats()["busy"]["calls"] == 6
+
+
+@pytest.mark.asyncio
+async def test_process_executor():
+    try:
+        assert await invoke_tool(square, 7) == 49
+    finally:
+        shutdown_tool_processes()
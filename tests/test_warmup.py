@@ -0,0 +1,43 @@
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import chatbot_server  # noqa: E402
+from simple_agents import Runner  # noqa: E402
+
+
+def test_not_ready_before_startup():
+    client = TestClient(chatbot_server.app)
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["ready"] is False
+
+
+def test_ready_after_warm_up():
+    hits_before = dict(Runner.local_hits)
+    tools_before = Runner.tool_stats()
+    history_before = list(chatbot_server.agent.history)
+
+    with TestClient(chatbot_server.app) as client:
+        deadline = time.monotonic() + 10
+        resp = client.get("/ready")
+        while resp.status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.05)
+            resp = client.get("/ready")
+
+        assert resp.status_code == 200
+        steps = resp.json()["steps"]
+        assert steps["local_replies"]["result"] == len(chatbot_server.WARMUP_MESSAGES)
+        assert steps["docs"]["result"] >= 1
+        # without an API key there is nothing to connect to
+        assert steps["upstream"]["result"] is False
+
+    # canned requests run on a scratch agent and are not counted
+    assert dict(Runner.local_hits) == hits_before
+    assert chatbot_server.agent.history == history_before
+    assert Runner.tool_stats() == tools_before
+    assert client.get("/ready").status_code == 503
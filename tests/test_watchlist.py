@@ -0,0 +1,224 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+import pytest  # noqa: E402
+
+from food_security import FoodSecurityHandler  # noqa: E402
+from price_history import PriceHistory  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+from watchlist import AnalysisCache, Watchlist, WatchlistScheduler  # noqa: E402
+
+
+@pytest.fixture
+def history(monkeypatch):
+    history = PriceHistory.from_records(
+        [
+            ("rice", "Kenya", "2024-01", 100),
+            ("rice", "Kenya", "2024-02", 120),
+            ("maize", "Kenya", "2024-01", 50),
+            ("maize", "Kenya", "2024-02", 40),
+        ]
+    )
+    monkeypatch.setattr("food_security.get_price_history", lambda: history)
+    monkeypatch.setattr("food_security.ENRICH_WITH_LLM", False)
+    return history
+
+
+def test_watchlist_persists(tmp_path):
+    store = SessionStore(tmp_path)
+    Watchlist(store).replace([{"commodity": " Rice", "country": "Kenya"}] * 2)
+    assert Watchlist(store).entries == [{"commodity": "rice", "country": "kenya"}]
+    with pytest.raises(ValueError):
+        Watchlist(store).replace([{"commodity": "", "country": "kenya"}])
+    Watchlist(store).replace([])
+    assert Watchlist(store).entries == []
+
+
+def test_refresh_serves_matching_requests(history, monkeypatch):
+    cache = AnalysisCache()
+    monkeypatch.setattr("food_security.analysis_cache", cache)
+    watchlist = Watchlist()
+    watchlist.replace(
+        [
+            {"commodity": "rice", "country": "kenya"},
+            {"commodity": "wheat", "country": "kenya"},
+        ]
+    )
+    scheduler = WatchlistScheduler(watchlist, cache, stagger=0, jitter=0)
+    status = asyncio.run(scheduler.refresh())
+    assert status["refreshed"] == 3
+    assert status["skipped"] == ["wheat/kenya"]
+
+    data = {
+        "commodity_name": "Rice",
+        "country": "Kenya",
+        "price_last_month": "120",
+        "price_two_months_ago": 100.0,
+        "availability_level": "low",
+    }
+    calls = []
+    monkeypatch.setattr(FoodSecurityHandler, "assessment", lambda self: calls.append(1))
+    assert "rice" in FoodSecurityHandler(data).collect().lower()
+    assert calls == [] and cache.hits == 1
+
+    # different inputs are not served from the cache
+    assert cache.get({**data, "price_last_month": 130}) is None
+
+
+def test_price_changes_invalidate_cached_analyses(history, tmp_path, monkeypatch):
+    import os
+
+    import food_basket
+    import price_history
+
+    cache = AnalysisCache()
+    monkeypatch.setattr("food_security.analysis_cache", cache)
+    monkeypatch.setattr("food_basket.get_price_history", lambda: history)
+    monkeypatch.setattr("food_basket.BASKET_WEIGHTS_PATH", tmp_path / "weights.json")
+    monkeypatch.setattr("food_basket._basket", None)
+    monkeypatch.setattr("food_basket._overrides", {})
+    watchlist = Watchlist()
+    watchlist.replace([{"commodity": "rice", "country": "kenya"}])
+    scheduler = WatchlistScheduler(watchlist, cache, stagger=0, jitter=0)
+    data = {
+        "commodity_name": "rice",
+        "country": "kenya",
+        "price_last_month": 120,
+        "price_two_months_ago": 100,
+        "availability_level": "low",
+    }
+
+    asyncio.run(scheduler.refresh())
+    FoodSecurityHandler(dict(data)).collect()
+    assert cache.hits == 1
+
+    # a basket price override (as from /admin/basket/prices) is a new version
+    food_basket.update_price("rice", "kenya", 150)
+    FoodSecurityHandler(dict(data)).collect()
+    assert cache.hits == 1
+
+    asyncio.run(scheduler.refresh())
+    FoodSecurityHandler(dict(data)).collect()
+    assert cache.hits == 2
+
+    # so is a reload of the price table
+    monkeypatch.setattr("price_history._history", None)
+    monkeypatch.setattr("price_history._history_mtime", None)
+    table = tmp_path / "prices.csv"
+    table.write_text("commodity,country,month,price\nrice,kenya,2024-01,100\n")
+    version = price_history.prices_version(table)
+    assert price_history.prices_version(table) == version
+    os.utime(table, (1, 1))
+    assert price_history.prices_version(table) == version + 1
+
+
+def test_refresh_is_bounded_and_staggered(history, monkeypatch):
+    active, peak, starts = [0], [0], []
+    lock = threading.Lock()
+
+    def slow_analysis(self, cached=True):
+        with lock:
+            starts.append(time.perf_counter())
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return "Analysis: ok"
+
+    monkeypatch.setattr(FoodSecurityHandler, "_analysis", slow_analysis)
+    watchlist = Watchlist()
+    watchlist.replace(
+        [
+            {"commodity": "rice", "country": "kenya"},
+            {"commodity": "maize", "country": "kenya"},
+        ]
+    )
+    scheduler = WatchlistScheduler(
+        watchlist,
+        AnalysisCache(),
+        concurrency=2,
+        stagger=0.01,
+        jitter=0.005,
+        rng=random.Random(0),
+    )
+    asyncio.run(scheduler.refresh())
+    assert len(starts) == 6
+    assert peak[0] == 2
+    assert starts[1] - starts[0] >= 0.005
+    assert len(scheduler.cache) == 6
+
+
+def test_next_delay(monkeypatch):
+    scheduler = WatchlistScheduler(Watchlist(), interval=60)
+    assert scheduler.next_delay(1000.0) == 0
+    scheduler.status["last_run"] = 1000.0
+    assert scheduler.next_delay(1030.0) == 30
+
+    scheduler.at_hour = 3
+    now = datetime(2024, 5, 1, 4, 30).timestamp()
+    assert scheduler.next_delay(now) == 22.5 * 3600
+
+    monkeypatch.delenv("WATCHLIST_HOUR", raising=False)
+    assert WatchlistScheduler.from_env(Watchlist()).at_hour == 3
+    monkeypatch.setenv("WATCHLIST_HOUR", "")
+    assert WatchlistScheduler.from_env(Watchlist()).at_hour is None
+
+
+def test_cache_is_safe_across_threads():
+    cache = AnalysisCache(max_entries=8)
+    data = [
+        {
+            "commodity_name": "rice",
+            "country": "kenya",
+            "price_last_month": i % 16,
+            "price_two_months_ago": 1,
+            "availability_level": "low",
+        }
+        for i in range(64)
+    ]
+    errors = []
+
+    def hammer(write):
+        try:
+            for _ in range(200):
+                for d in data:
+                    cache.put(d, "text") if write else cache.get(d)
+        except Exception as exc:  # pragma: no cover - the failure being tested
+            errors.append(exc)
+
+    threads = [threading.Thread(target=hammer, args=(i % 2,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(cache) <= 8
+
+
+def test_admin_watchlist_endpoints(history, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import chatbot_server
+
+    monkeypatch.setattr(chatbot_server, "watchlist", Watchlist())
+    scheduler = WatchlistScheduler(chatbot_server.watchlist, AnalysisCache(), stagger=0)
+    monkeypatch.setattr(chatbot_server, "watchlist_scheduler", scheduler)
+    client = TestClient(chatbot_server.app)
+    token = {"access_token": "admin-token"}
+
+    resp = client.put(
+        "/admin/watchlist", params=token, json=[{"commodity": "Maize", "country": "Kenya"}]
+    )
+    assert resp.json()["entries"] == [{"commodity": "maize", "country": "kenya"}]
+    assert client.post("/admin/watchlist/refresh", params=token).json()["started"]
+
+    body = client.get("/admin/watchlist", params=token).json()
+    assert body["refreshed"] == 3
+    assert body["cache"]["entries"] == 3
@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import chatbot_server  # noqa: E402
+
+client = TestClient(chatbot_server.app)
+WS_URL = "/ws/chat?access_token=user1-token"
+
+
+async def _slow_turn(user, msg):
+    if msg == "slow":
+        await asyncio.sleep(30)
+    return f"echo {msg}"
+
+
+def test_cancel_aborts_in_flight_turn(monkeypatch):
+    monkeypatch.setattr(chatbot_server, "chat_turn", _slow_turn)
+    with client.websocket_connect(WS_URL) as ws:
+        ws.send_json({"message": "slow"})
+        ws.send_json({"type": "cancel"})
+        assert ws.receive_json() == {"cancelled": True}
+
+        ws.send_json({"message": "fast"})
+        assert ws.receive_json() == {"reply": "echo fast"}
+
+
+def test_clear_history_does_not_wait_behind_slow_turn(monkeypatch):
+    monkeypatch.setattr(chatbot_server, "chat_turn", _slow_turn)
+    with client.websocket_connect(WS_URL) as ws:
+        ws.send_json({"message": "slow"})
+        ws.send_json({"message": "queued"})
+        ws.send_json({"message": "clear history"})
+        assert ws.receive_json() == {"reply": "History cleared."}
+        ws.send_json({"type": "cancel"})
+        assert ws.receive_json() == {"cancelled": False}
+
+
+def test_msgpack_subprotocol(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+    monkeypatch.setattr(chatbot_server, "chat_turn", _slow_turn)
+    with client.websocket_connect(WS_URL, subprotocols=["msgpack", "json"]) as ws:
+        assert ws.accepted_subprotocol == "msgpack"
+        ws.send_bytes(msgpack.packb({"message": "fast"}))
+        assert msgpack.unpackb(ws.receive_bytes()) == {"reply": "echo fast"}
+
+
+def test_json_remains_the_default(monkeypatch):
+    monkeypatch.setattr(chatbot_server, "chat_turn", _slow_turn)
+    with client.websocket_connect(WS_URL, subprotocols=["json"]) as ws:
+        assert ws.accepted_subprotocol == "json"
+        ws.send_json({"message": "fast"})
+        assert ws.receive_json() == {"reply": "echo fast"}
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """Base class for rejected uploads."""
+
+
+class InvalidFilename(UploadError):
+    pass
+
+
+class UploadTooLarge(UploadError):
+    pass
+
+
+class ChecksumMismatch(UploadError):
+    pass
+
+
+class NameConflict(UploadError):
+    pass
+
+
+@dataclass
+class StoredUpload:
+    filename: str
+    path: Path
+    size: int
+    sha256: str
+
+
+def safe_filename(name: Optional[str]) -> str:
+    """Return ``name`` without any directory components."""
+    base = Path((name or "").replace("\\", "/")).name
+    if not base or base.startswith("."):
+        raise InvalidFilename(f"Invalid filename: {name!r}")
+    return base
+
+
+def _write_chunk(out: BinaryIO, digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _commit(out: BinaryIO, tmp: str, dest: Path) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+    os.replace(tmp, dest)
+
+
+def _discard(out: BinaryIO, tmp: str) -> None:
+    out.close()
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+
+
+async def store_upload(
+    file: UploadFile,
+    dest_dir: Path,
+    max_bytes: int,
+    expected_sha256: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> StoredUpload:
+    """Stream ``file`` into ``dest_dir`` without holding it in memory.
+
+    Chunks go to a temporary file next to the destination and are written
+    from a worker thread; the file is renamed into place only once the size
+    limit and optional checksum have been verified.
+    """
+    filename = safe_filename(file.filename)
+    incoming = dest_dir / ".incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=incoming, suffix=".part")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"{filename} exceeds {max_bytes} bytes")
+            await asyncio.to_thread(_write_chunk, out, digest, chunk)
+        checksum = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != checksum:
+            raise ChecksumMismatch(f"{filename} checksum mismatch")
+        dest = dest_dir / filename
+        await asyncio.to_thread(_commit, out, tmp, dest)
+    except BaseException:
+        await asyncio.to_thread(_discard, out, tmp)
+        raise
+    return StoredUpload(filename, dest, size, checksum)
+
+
+class BodyLimit:
+    """ASGI middleware refusing oversized request bodies before they are read.
+
+    Starlette spools a whole multipart body to disk before the endpoint runs,
+    so the per-file check in :func:`store_upload` cannot protect the spool.
+    ``limit(path)`` gives the byte limit for a POST to ``path`` (``None`` for
+    no limit). A larger ``Content-Length`` is answered with 413 straight away;
+    chunked bodies are counted as they arrive and cut off at the limit.
+    """
+
+    def __init__(self, app: Any, limit: Callable[[str], Optional[int]]):
+        self.app = app
+        self.limit = limit
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        max_bytes = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            max_bytes = self.limit(scope["path"])
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Request body exceeds {max_bytes} bytes"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > max_bytes:
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Any:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise HTTPException(
+                        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
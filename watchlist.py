@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from session_store import SessionStore
+
+AVAILABILITY_LEVELS = ("high", "moderate", "low")
+
+AnalysisKey = Tuple[str, str, float, float, str]
+
+
+def analysis_key(data: Dict[str, Any]) -> Optional[AnalysisKey]:
+    """Normalized analysis inputs, or None if some are missing or malformed."""
+    try:
+        return (
+            str(data["commodity_name"]).strip().lower(),
+            str(data["country"]).strip().lower(),
+            round(float(data["price_last_month"]), 2),
+            round(float(data["price_two_months_ago"]), 2),
+            str(data["availability_level"]).strip().lower(),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class AnalysisCache:
+    """Finished analysis texts keyed by their inputs.
+
+    Entries expire after ``ttl`` seconds and the least recently used one is
+    dropped past ``max_entries``. An entry put with a ``version`` (of the
+    prices it was computed from) is only served for that same version. A lock
+    guards the dict, since analyst worker threads read it while the scheduler
+    writes and evicts.
+    """
+
+    def __init__(self, ttl: float = 25 * 3600.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[AnalysisKey, Tuple[float, Any, str]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, data: Dict[str, Any], version: Any = None) -> Optional[str]:
+        key = analysis_key(data)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+            if entry is None or entry[0] < time.monotonic() or entry[1] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, data: Dict[str, Any], text: str, version: Any = None) -> None:
+        key = analysis_key(data)
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+analysis_cache = AnalysisCache(ttl=float(os.getenv("WATCHLIST_TTL", str(25 * 3600))))
+
+
+class Watchlist:
+    """Admin-managed ``(commodity, country)`` pairs, persisted in ``store``."""
+
+    KIND = "admin"
+    NAME = "watchlist"
+
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store
+        saved = store.read(self.KIND, self.NAME, []) if store else []
+        self.entries: List[Dict[str, str]] = self._clean(saved)
+
+    @staticmethod
+    def _clean(entries: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+        out: List[Dict[str, str]] = []
+        for entry in entries:
+            item = {
+                "commodity": str(entry["commodity"]).strip().lower(),
+                "country": str(entry["country"]).strip().lower(),
+            }
+            if not item["commodity"] or not item["country"]:
+                raise ValueError("commodity and country are required")
+            if item not in out:
+                out.append(item)
+        return out
+
+    def replace(self, entries: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+        self.entries = self._clean(entries)
+        if self.store is not None:
+            if self.entries:
+                self.store.write(self.KIND, self.NAME, self.entries)
+            else:
+                self.store.delete(self.KIND, self.NAME)
+        return self.entries
+
+
+class WatchlistScheduler:
+    """Precompute watchlist analyses into ``cache`` on a schedule.
+
+    Each watched pair is analysed at every availability level using the
+    latest two months of the price history as inputs, so a user who asks
+    about those figures gets the stored text without waiting. Refreshes run
+    daily at ``at_hour`` (local time) when set, otherwise every ``interval``
+    seconds. Within a refresh, job ``i`` starts after ``i * stagger`` plus up
+    to ``jitter`` random seconds and at most ``concurrency`` analyses run at
+    once, so upstream calls trickle out instead of arriving together.
+    """
+
+    def __init__(
+        self,
+        watchlist: Watchlist,
+        cache: AnalysisCache = analysis_cache,
+        concurrency: int = 2,
+        interval: float = 6 * 3600.0,
+        at_hour: Optional[int] = None,
+        stagger: float = 2.0,
+        jitter: float = 1.0,
+        rng: Optional[random.Random] = None,
+    ):
+        self.watchlist = watchlist
+        self.cache = cache
+        self.concurrency = max(concurrency, 1)
+        self.interval = interval
+        self.at_hour = at_hour
+        self.stagger = stagger
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.running = False
+        self.status: Dict[str, Any] = {
+            "last_run": None,
+            "duration": None,
+            "refreshed": 0,
+            "skipped": [],
+            "errors": {},
+        }
+
+    @classmethod
+    def from_env(cls, watchlist: Watchlist, **kwargs: Any) -> "WatchlistScheduler":
+        # off-peak by default; an empty WATCHLIST_HOUR selects interval mode
+        hour = os.getenv("WATCHLIST_HOUR", "3")
+        return cls(
+            watchlist,
+            concurrency=int(os.getenv("WATCHLIST_CONCURRENCY", "2")),
+            interval=float(os.getenv("WATCHLIST_INTERVAL", str(6 * 3600))),
+            at_hour=int(hour) if hour else None,
+            stagger=float(os.getenv("WATCHLIST_STAGGER", "2")),
+            jitter=float(os.getenv("WATCHLIST_JITTER", "1")),
+            **kwargs,
+        )
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """Seconds until the next scheduled refresh.
+
+        With ``at_hour`` set this is the next occurrence of that local hour.
+        Otherwise refreshes run every ``interval`` seconds starting right
+        away, whatever the time of day.
+        """
+        now = time.time() if now is None else now
+        if self.at_hour is None:
+            last = self.status["last_run"]
+            return 0.0 if last is None else max(last + self.interval - now, 0.0)
+        current = datetime.fromtimestamp(now)
+        target = current.replace(hour=self.at_hour, minute=0, second=0, microsecond=0)
+        if target <= current:
+            target += timedelta(days=1)
+        return (target - current).total_seconds()
+
+    def jobs(self, history: Any) -> List[Dict[str, Any]]:
+        """Analysis inputs for every watched pair with two months of prices."""
+        jobs: List[Dict[str, Any]] = []
+        skipped: List[str] = []
+        for entry in self.watchlist.entries:
+            metrics = (
+                history.metrics_for(entry["commodity"], entry["country"])
+                if history is not None
+                else None
+            )
+            prices = metrics and (metrics["last_price"], metrics["previous_price"])
+            if not prices or None in prices:
+                skipped.append(f"{entry['commodity']}/{entry['country']}")
+                continue
+            for level in AVAILABILITY_LEVELS:
+                jobs.append(
+                    {
+                        "commodity_name": entry["commodity"],
+                        "country": entry["country"],
+                        "price_last_month": metrics["last_price"],
+                        "price_two_months_ago": metrics["previous_price"],
+                        "availability_level": level,
+                    }
+                )
+        self.status["skipped"] = skipped
+        return jobs
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute every watchlist analysis once; returns ``status``."""
+        if self.running:
+            return self.status
+        if not self.watchlist.entries:
+            self.status.update(last_run=time.time(), duration=0.0, refreshed=0)
+            return self.status
+        from food_security import FoodSecurityHandler, get_price_history, prices_version
+
+        self.running = True
+        start = time.time()
+        try:
+            # read first: prices changing mid-refresh then only cause misses
+            version = await asyncio.to_thread(prices_version)
+            history = await asyncio.to_thread(get_price_history)
+            jobs = self.jobs(history)
+            gate = asyncio.Semaphore(self.concurrency)
+            errors: Dict[str, str] = {}
+
+            async def one(i: int, data: Dict[str, Any]) -> None:
+                await asyncio.sleep(i * self.stagger + self.rng.uniform(0, self.jitter))
+                async with gate:
+                    handler = FoodSecurityHandler(dict(data))
+                    try:
+                        text = await asyncio.to_thread(handler._analysis, False)
+                    except Exception as exc:
+                        name = "/".join(str(v) for v in analysis_key(data) or ())
+                        errors[name] = str(exc) or type(exc).__name__
+                        return
+                self.cache.put(data, text, version)
+
+            await asyncio.gather(*(one(i, d) for i, d in enumerate(jobs)))
+            self.status.update(
+                refreshed=len(jobs) - len(errors),
+                errors=errors,
+            )
+        finally:
+            self.running = False
+            self.status.update(last_run=start, duration=time.time() - start)
+        return self.status
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.next_delay())
+            try:
+                await self.refresh()
+            except Exception:  # keep the schedule alive
+                logging.getLogger(__name__).exception("Watchlist refresh failed")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": self.watchlist.entries,
+            "running": self.running,
+            "next_run_in": self.next_delay(),
+            **self.status,
+            "cache": self.cache.stats(),
+        }
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except Exception:  # pragma: no cover - msgpack optional
+    msgpack = None
+
+
+class JsonCodec:
+    """Text frames holding JSON; the default for browsers."""
+
+    subprotocol = "json"
+
+    def encode(self, frame: Any) -> str:
+        return json.dumps(frame, separators=(",", ":"), ensure_ascii=False)
+
+    def decode(self, data: str) -> Any:
+        return json.loads(data)
+
+    async def receive(self, ws: WebSocket) -> Any:
+        return self.decode(await ws.receive_text())
+
+    async def send(self, ws: WebSocket, frame: Any) -> None:
+        await ws.send_text(self.encode(frame))
+
+
+class MsgpackCodec:
+    """Binary frames holding MessagePack; smaller and cheaper to parse."""
+
+    subprotocol = "msgpack"
+
+    def encode(self, frame: Any) -> bytes:
+        return msgpack.packb(frame, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+    async def receive(self, ws: WebSocket) -> Any:
+        return self.decode(await ws.receive_bytes())
+
+    async def send(self, ws: WebSocket, frame: Any) -> None:
+        await ws.send_bytes(self.encode(frame))
+
+
+JSON = JsonCodec()
+
+# codecs by subprotocol name, in server preference order
+CODECS: Dict[str, Any] = {JSON.subprotocol: JSON}
+if msgpack is not None:
+    CODECS = {MsgpackCodec.subprotocol: MsgpackCodec(), **CODECS}
+
+
+def negotiate(requested: Iterable[str]) -> Any:
+    """Pick the preferred codec among the client's offered subprotocols."""
+    offered = set(requested)
+    return next((c for name, c in CODECS.items() if name in offered), JSON)
+
+
+async def accept_with_codec(ws: WebSocket) -> Any:
+    """Accept ``ws`` with a negotiated codec and return that codec.
+
+    Clients that offer no subprotocol get plain JSON text frames.
+    """
+    requested = ws.scope.get("subprotocols", [])
+    codec = negotiate(requested)
+    # only echo a subprotocol the client actually offered
+    subprotocol: Optional[str] = (
+        codec.subprotocol if codec.subprotocol in requested else None
+    )
+    await ws.accept(subprotocol=subprotocol)
+    return codec
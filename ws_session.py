@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from ws_codec import JSON
+
+
+class ChatSession:
+    """Read frames continuously while turns run one at a time in order.
+
+    Incoming messages go to a bounded queue served by a single worker, so
+    turns keep their order. A ``{"type": "cancel"}`` frame aborts the turn in
+    flight (cancelling its upstream request) and "clear history" is handled
+    immediately instead of waiting behind queued turns. Outgoing frames pass
+    through a bounded buffer; when a slow client lets it fill up, producers
+    wait rather than buffering without limit. Frames are (de)serialized by
+    ``codec`` (see :mod:`ws_codec`).
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        handle_turn: Callable[[str], Awaitable[str]],
+        handle_clear: Callable[[], None],
+        queue_size: int = 8,
+        send_buffer: int = 16,
+        codec: Any = JSON,
+    ):
+        self.ws = ws
+        self.codec = codec
+        self.handle_turn = handle_turn
+        self.handle_clear = handle_clear
+        self.inbox: asyncio.Queue = asyncio.Queue(queue_size)
+        self.outbox: asyncio.Queue = asyncio.Queue(send_buffer)
+        self.current: Optional[asyncio.Task] = None
+
+    async def serve(self) -> None:
+        sender = asyncio.create_task(self._send_loop())
+        worker = asyncio.create_task(self._work_loop())
+        try:
+            await self._read_loop()
+        finally:
+            worker.cancel()
+            sender.cancel()
+            await asyncio.gather(worker, sender, return_exceptions=True)
+
+    def cancel_current(self) -> bool:
+        if self.current is None or self.current.done():
+            return False
+        self.current.cancel()
+        return True
+
+    def _drop_pending(self) -> None:
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+
+    async def send(self, frame: Dict[str, Any]) -> None:
+        await self.outbox.put(frame)
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                data = await self.codec.receive(self.ws)
+            except WebSocketDisconnect:
+                return
+
+            if data.get("type") == "cancel":
+                await self.send({"cancelled": self.cancel_current()})
+                continue
+
+            msg = str(data.get("message", "")).strip()
+            if not msg:
+                continue
+
+            if msg.lower() == "clear history":
+                self._drop_pending()
+                self.cancel_current()
+                self.handle_clear()
+                await self.send({"reply": "History cleared."})
+                continue
+
+            try:
+                self.inbox.put_nowait(msg)
+            except asyncio.QueueFull:
+                await self.send({"error": "busy", "message": msg})
+
+    async def _work_loop(self) -> None:
+        while True:
+            msg = await self.inbox.get()
+            self.current = asyncio.create_task(self.handle_turn(msg))
+            try:
+                await asyncio.wait({self.current})
+            finally:
+                # the session is closing: abort the turn along with it
+                self.current.cancel()
+            task, self.current = self.current, None
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                await self.send({"error": "failed", "message": msg})
+                continue
+            await self.send({"reply": task.result()})
+
+    async def _send_loop(self) -> None:
+        while True:
+            frame = await self.outbox.get()
+            await self.codec.send(self.ws, frame)